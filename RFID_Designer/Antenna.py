@@ -6,7 +6,12 @@
 
 #antenna class, all sizes are in mm
 import numpy as nm
-import matplotlib.pyplot as plt
+from collections import OrderedDict
+from contextlib import contextmanager
+from DesignCache import DesignCache
+import Instrument
+
+log = Instrument.log
 
 #minimum sizes based on manufacturer capabilities
 minGap = 0.1
@@ -17,11 +22,50 @@ minWidth = 0.1
 resistivity = 1.68 * nm.power(10,-5,dtype=nm.longdouble)
 conductor_thickness = 0.0175
 
+#floating point type everything is worked out in, float64 is fast and vectorizes,
+#longdouble is kept around to check it against, see SetPrecision/Precision
+precision = nm.float64
+#float64 results of Grover's formula that may have lost more than this (relative)
+#to cancellation are worked out again in longdouble, None to never do that
+#bars apart in z (every reader/tag pair) go through the thin tape form, which keeps
+#~12 digits in float64 and practically never needs it
+cancellationTolerance = 1e-4
+
+#on disk cache of designed antennas, None to always design from scratch
+#see UseDesignCache
+designCache = None
+#in memory memo of trace pair mutual inductances, None to always use the kernel
+#see UseMutualMemo
+mutualMemo = None
+#Antenna.Mutual switches to the multipole expansion (FarFieldMutual) once the offset is
+#more than farField times the size of the coils and the expansion's error estimate is
+#under farFieldTolerance (relative), None to always use the kernel, see UseFarField
+farField = None
+farFieldTolerance = 1e-2
+#precomputed field of a fixed reader (ReaderField.ReaderField), Antenna.Mutual between
+#that reader and a tag that fits it is looked up instead, None to always use the kernel
+#see UseReaderField
+readerField = None
+
 #random utility functions
 def num2str(num, precision = 3): 
     return "%0.*f" % (precision, num) 
 
 
+#calculate the resistance with r*l/(h*w) (ignores thermal effects)
+#all sizes in cm, works on single traces or arrays of them
+def TraceResistance(length, width, height):
+    return precision(resistivity * 0.1 * length/(height*width))
+
+#calculate self inductance
+#.002 l (ln(2l/(w + t))+0.50049+((w+t)/(3l)))
+def TraceInductance(length, width, height):
+    L = nm.log(2*length/(width+height)).astype(precision)
+    L += 0.50049
+    L += (width+height)/(3*length)
+    L *= 0.002*length
+    return L
+
 #trace class, defines what a trace is and how to calculate the characteristics
 class Trace:
     def __init__(self, _startPos, _stopPos, _width, _height):
@@ -29,19 +73,12 @@ class Trace:
         self.start = _startPos
         self.stop = _stopPos
         #physical paramaters of the trace, converted to cm
-        self.width = nm.longdouble(_width/ 10)
-        self.length = nm.longdouble(self.GetLength(_startPos,_stopPos)/10)
-        self.height = nm.longdouble(_height/ 10)
+        self.width = precision(_width/ 10)
+        self.length = precision(self.GetLength(_startPos,_stopPos)/10)
+        self.height = precision(_height/ 10)
         #electrical paramaters of the trace
-        #calculate the resistance with r*l/(h*w) (ignores thermal effects)
-        self.R = nm.longdouble(resistivity * 0.1 * self.length/(self.height*self.width))
-
-        #calculate self inductance
-        #.002 l (ln(2l/(w + t))+0.50049+((w+t)/(3l)))
-        self.L = nm.longdouble(nm.log(2*self.length/(self.width+self.height)))
-        self.L += 0.50049
-        self.L += nm.longdouble((self.width+self.height)/(3*self.length))
-        self.L *= 0.002*self.length
+        self.R = TraceResistance(self.length, self.width, self.height)
+        self.L = TraceInductance(self.length, self.width, self.height)
       
     #get the length of a trace
     def GetLength(self, start, stop):
@@ -50,123 +87,756 @@ class Trace:
     #calculate mutual inductance between two traces
     #optional offset paramaters to allow for... offsetting
     def MutualInductance(self,otherTrace, zOffset = 0, xOffset = 0, yOffset = 0):
-        #inductance in uH
-        L = nm.longdouble(0)      
-
-        #rotate depending on direction vector
-        vector = [nm.abs((self.start[0] - self.stop[0])/(10*self.length)),
-                   nm.abs((self.start[1] - self.stop[1])/(10*self.length))]
-                   
-        if(vector[0] == 0):
-            x = 1
-            y = 0
-        else:
-            y = 1
-            x = 0
-        
-        #Measurements converted to cm
-        #x dimension
-        E = ((self.start[x] - (otherTrace.start[x]+xOffset)) + 
-            (self.stop[x] - (otherTrace.stop[x]+xOffset)))/20
-        a = self.width
-        d = otherTrace.width
-        
-        #y dimension, perpendicular dimension
-        l_3 = ((self.start[y] - (otherTrace.start[y]+yOffset)) + 
-                (self.stop[y] - (otherTrace.stop[y]+yOffset))) /20
-        l_2 = otherTrace.length
-        l_1 = self.length
-        
-        #z dimension
-        P = ((self.start[2] - (otherTrace.start[2]+zOffset)) + 
-            (self.stop[2] - (otherTrace.stop[2]+zOffset))) /20
-        b = self.height
-        c = otherTrace.height
-        
-        #arrays holding the X,Y,Z permutations
-        x = [E-a, E+d-a, E+d, E]
-        y = [l_3-l_1, l_3+l_2-l_1, l_3+l_2, l_3]
-        z = [P-b, P+c-b, P+c, P]
-        
-        #loop over every permutation of xyz
-        for i in range(0,4):
-            for j in range(0,4):
-                for k in range(0,4):
-                    #multiply f(x,y,z) by -1^(1+i+j+k) because... reasons?
-                    out = nm.power(-1,i+j+k+2) * self.Mb(x[i],y[j],z[k])
-                    L += out
-                 
-        #scale to the correct values
-        L *= nm.divide(0.001,(a*b*c*d))
-        return L
+        #inductance in uH, all 64 permutations are done at once by the kernel
+        return GroverMutual(self.start, self.stop, self.width, self.height, self.length,
+                            otherTrace.start, otherTrace.stop, otherTrace.width,
+                            otherTrace.height, otherTrace.length,
+                            zOffset, xOffset, yOffset)
         
     def Mb(self,x,y,z):
-        #value squares so I don't have to repeatedly compute them
-        x2 = nm.square(x)
-        y2 = nm.square(y)
-        z2 = nm.square(z)
-        #value to the third power so I don't have to repeatedly compute them
-        x3 = nm.power(x,3)
-        y3 = nm.power(y,3)
-        z3 = nm.power(z,3)
-        #value to the forth power so I don't have to repeatedly compute them
-        x4 = nm.power(x,4)
-        y4 = nm.power(y,4)
-        z4 = nm.power(z,4)
-        #distance formula because it's EVERYWHERE
-        d = nm.sqrt(x2+y2+z2)
-        #breaking rediculously long equation into parts
-        #x (y^2 z^2/4 - y^4/24 - z^4/24)
-        M_00 = x*(y2*z2/4 - y4/24 - z4/24)
-        #M_00 * ln((x+sqrt(x^2+y^2+z^2))/(sqrt(y^2+Z^2)))
-        M_01 = nm.log(nm.divide(x+d,nm.sqrt(y2+z2)))
-        
-        # +
-        #y (x^2 z^2/4 - x^4/24 - z^4/24)
-        M_10 = y*(x2*z2/4 - x4/24 - z4/24)
-        #M_10 * ln((y+sqrt(x^2+y^2+z^2))/(sqrt(x^2+z^2)))
-        M_11 = nm.log(nm.divide(y+d,nm.sqrt(x2+z2)))
-        
-        # +
-        #z (x^2 y^2/4 - x^4/24 - y^4/24)
-        M_20 = z*(x2*y2/4 - x4/24 - y4/24)
-        #M_20 * ln((z+sqrt(x^2+y^2+z^2))/(sqrt(x^2+y^2)))
-        M_21 = nm.log(nm.divide(z+d,nm.sqrt(x2+y2)))
-            
-        # +
-        # 1/60 * (x^4 + y^4 + z^4 - 3x^2y^2 - 3y^2z^2-3z^2x^2)*sqrt(x^2+y^2+z^2)
-        M_3 = 1/60*(x4 + y4 + z4 - 3*x2*y2 - 3*y2*z2 - 3*z2*x2)*d
-        
-        #If any two of the variables x, y, and z approach zero, all terms go to zero except the square root term.
-        if(nm.isinf(M_01) or nm.isnan(M_01)):
-            return M_3
-        if(nm.isinf(M_11) or nm.isnan(M_11)):
-            return M_3
-        if(nm.isinf(M_21) or nm.isnan(M_21)):
-            return M_3
-            
-        # -
-        # x*y*z^3/6 * Tan^-1(xy/(z*sqrt(x^2+y^2+z^2)))
-        M_4 = x*y*z3/6 * nm.arctan(x*y/(z*d))
-        # -
-        # x*z*y^3/6 * Tan^-1(xz/(y*sqrt(x^2+y^2+z^2)))
-        M_5 = x*z*y3/6 * nm.arctan(x*z/(y*d))
-        # -
-        # z*y*x^3/6 * Tan^-1(yz/(x*sqrt(x^2+y^2+z^2)))
-        M_6 = z*y*x3/6 * nm.arctan(y*z/(x*d))
-            
-        #If either x or y or z approaches zero, all inverse tangents go to zero.
+        return GroverMb(x,y,z)
+
+#Grover's f(x,y,z) for rectangular bars, works on scalars or whole arrays
+def GroverMb(x,y,z):
+    x = nm.asarray(x, dtype=precision)
+    y = nm.asarray(y, dtype=precision)
+    z = nm.asarray(z, dtype=precision)
+    #value squares so I don't have to repeatedly compute them
+    x2 = nm.square(x)
+    y2 = nm.square(y)
+    z2 = nm.square(z)
+    #value to the forth power so I don't have to repeatedly compute them
+    x4 = nm.square(x2)
+    y4 = nm.square(y2)
+    z4 = nm.square(z2)
+    #distance formula because it's EVERYWHERE
+    d = nm.sqrt(x2+y2+z2)
+    
+    #the degenerate corners produce inf/nan, they get masked out below
+    with nm.errstate(divide='ignore', invalid='ignore'):
+        #x (y^2 z^2/4 - y^4/24 - z^4/24) * ln((x+sqrt(x^2+y^2+z^2))/(sqrt(y^2+Z^2)))
+        M_01 = nm.log((x+d)/nm.sqrt(y2+z2))
+        #y (x^2 z^2/4 - x^4/24 - z^4/24) * ln((y+sqrt(x^2+y^2+z^2))/(sqrt(x^2+z^2)))
+        M_11 = nm.log((y+d)/nm.sqrt(x2+z2))
+        #z (x^2 y^2/4 - x^4/24 - y^4/24) * ln((z+sqrt(x^2+y^2+z^2))/(sqrt(x^2+y^2)))
+        M_21 = nm.log((z+d)/nm.sqrt(x2+y2))
         
-        M = M_00*M_01 + M_10*M_11 + M_20*M_21 + M_3 - M_4 - M_5 - M_6
+        # x*y*z^3/6 * Tan^-1(xy/(z*sqrt(x^2+y^2+z^2))) and the two rotations of it
+        xyz = x*y*z
+        M_4 = xyz*z2/6 * nm.arctan(x*y/(z*d))
+        M_5 = xyz*y2/6 * nm.arctan(x*z/(y*d))
+        M_6 = xyz*x2/6 * nm.arctan(y*z/(x*d))
+    
+        M_0 = (x*(y2*z2/4 - y4/24 - z4/24)*M_01 +
+               y*(x2*z2/4 - x4/24 - z4/24)*M_11 +
+               z*(x2*y2/4 - x4/24 - y4/24)*M_21)
+    
+    # 1/60 * (x^4 + y^4 + z^4 - 3x^2y^2 - 3y^2z^2-3z^2x^2)*sqrt(x^2+y^2+z^2)
+    M_3 = 1/60*(x4 + y4 + z4 - 3*x2*y2 - 3*y2*z2 - 3*z2*x2)*d
+    
+    #If any two of the variables x, y, and z approach zero, all terms go to zero except the square root term.
+    #If either x or y or z approaches zero, all inverse tangents go to zero.
+    degenerate = ~(nm.isfinite(M_01) & nm.isfinite(M_11) & nm.isfinite(M_21))
+    with nm.errstate(invalid='ignore'):
+        M = nm.where(degenerate, M_3, M_0 + M_3 - M_4 - M_5 - M_6)
+    
+    if(Instrument.enabled):
+        Instrument.Count("Mb", M.size)
+        Instrument.Count("Mb degenerate", nm.count_nonzero(degenerate))
+    if(not nm.all(nm.isfinite(M))):
+        log.warning("error with mutual inductance calculation...")
+    
+    return M
+
+#sign of each of the 4x4x4 permutations, -1^(i+j+k)
+_groverSign = nm.power(-1,nm.indices((4,4,4)).sum(axis=0)).astype(nm.int8)
+
+#Mutual inductance between parallel traces, everything broadcasts so arrays
+#of traces give back an array (or matrix) of mutual inductances
+#start/stop are in mm with xyz as the last axis, width/height/length in cm
+def GroverMutual(start, stop, a, b, l_1, otherStart, otherStop, d, c, l_2,
+                 zOffset = 0, xOffset = 0, yOffset = 0):
+    E, l_3, P = RelativePosition(start, stop, otherStart, otherStop, zOffset, xOffset, yOffset)
+    return PairMutual(E, l_3, P, a, b, c, d, l_1, l_2)
+
+#mutual inductance of trace pairs given their relative position, through the memo if it's on
+def PairMutual(E, l_3, P, a, b, c, d, l_1, l_2):
+    if(Instrument.enabled):
+        Instrument.Count("MutualInductance", nm.broadcast(E, l_3, P, a, b, c, d, l_1, l_2).size)
+    if(mutualMemo is not None):
+        return mutualMemo.Mutual(E, l_3, P, a, b, c, d, l_1, l_2)
+    return GroverKernel(E, l_3, P, a, b, c, d, l_1, l_2)
+
+#E, l_3 and P (above) in cm between two sets of parallel traces that go into the
+#kernels, start/stop are in mm with xyz as the last axis
+def RelativePosition(start, stop, otherStart, otherStop, zOffset = 0, xOffset = 0, yOffset = 0):
+    start = nm.asarray(start, dtype=precision)
+    stop = nm.asarray(stop, dtype=precision)
+    otherStart = nm.asarray(otherStart, dtype=precision)
+    otherStop = nm.asarray(otherStop, dtype=precision)
+    
+    #distance between the middle of both traces, converted to cm
+    delta = ((start + stop) - (otherStart + otherStop))/20
+    
+    #rotate depending on direction vector, the frame comes from the first trace (alongY)
+    #and E is taken along it, l_3 across it, for traces along x and along y alike
+    #(the kernels call E across and l_3 along, the original model has always fed them
+    #this way round), xOffset moves E and yOffset l_3, so in the rotated frame too
+    alongY = (start[...,0] == stop[...,0])
+    E = nm.where(alongY, delta[...,1], delta[...,0]) - nm.asarray(xOffset, dtype=precision)/10
+    l_3 = nm.where(alongY, delta[...,0], delta[...,1]) - nm.asarray(yOffset, dtype=precision)/10
+    P = delta[...,2] - nm.asarray(zOffset, dtype=precision)/10
+    return E, l_3, P
+
+#Grover's formula for two parallel bars given their relative position in cm
+#E across, l_3 along and P above, a/b and d/c are the widths/heights, l_1/l_2 the lengths
+def GroverKernel(E, l_3, P, a, b, c, d, l_1, l_2):
+    E, l_3, P, a, b, c, d, l_1, l_2 = nm.broadcast_arrays(*[nm.asarray(v, dtype=precision)
+                                       for v in (E, l_3, P, a, b, c, d, l_1, l_2)])
+    L = _GroverSum(E, l_3, P, a, b, c, d, l_1, l_2)
+    #scale to the correct values
+    return L * (0.001/(a*b*c*d))
+
+#same as GroverKernel with both bars shrunk down to a filament through their middle,
+#Neumann's formula for parallel filaments, a handful of terms instead of 64 corners
+#the geometric mean distance of the cross sections (0.2235(w+h)) is added to the distance
+#between them, that keeps lined up filaments finite and close to the bar formula
+def FilamentKernel(E, l_3, P, a, b, c, d, l_1, l_2):
+    E, l_3, P, a, b, c, d, l_1, l_2 = [nm.asarray(v, dtype=precision)
+                                       for v in (E, l_3, P, a, b, c, d, l_1, l_2)]
+    #distance between the two filaments
+    rho = nm.sqrt(nm.square(E + d/2 - a/2) + nm.square(P + c/2 - b/2) +
+                  nm.square(0.2235*(a + b + c + d)/2))
+    def F(u):
+        return u*nm.arcsinh(u/rho) - nm.sqrt(nm.square(u) + nm.square(rho))
+    return 0.001*(F(l_3 + l_2) - F(l_3 + l_2 - l_1) - F(l_3) + F(l_3 - l_1))
+
+#Gauss-Legendre points and weights moved onto [0,1]
+def _GaussLegendre(order):
+    points, weights = nm.polynomial.legendre.leggauss(order)
+    return (points + 1)/2, weights/2
+
+#Neumann's formula 0.001*t_1.t_2*integral(integral(1/r)) between two straight filaments
+#pointing any way at all, start/stop in cm with xyz as the last axis, everything broadcasts
+#the integral along the second filament is exact (an arcsinh), the one along the first
+#is order point Gauss-Legendre, gmd (cm) is added to the distance like FilamentKernel
+#t_1 and t_2 point from start to stop, signed = False takes |t_1.t_2| instead
+def NeumannKernel(start, stop, otherStart, otherStop, gmd = 0, order = 8, signed = True):
+    start, stop, otherStart, otherStop = [nm.asarray(v, dtype=precision)
+                                          for v in (start, stop, otherStart, otherStop)]
+    s, weights = _GaussLegendre(order)
+    vector = stop - start
+    otherVector = otherStop - otherStart
+    l_1 = nm.sqrt(nm.sum(nm.square(vector), axis=-1))
+    l_2 = nm.sqrt(nm.sum(nm.square(otherVector), axis=-1))
+    t_2 = otherVector/l_2[...,None]
+    cosine = nm.sum(vector*t_2, axis=-1)/l_1
+    if(not signed):
+        cosine = nm.abs(cosine)
+
+    #from every quadrature point on the first filament to the start of the second
+    relative = otherStart[...,None,:] - (start[...,None,:] + s[:,None]*vector[...,None,:])
+    u = nm.sum(relative*t_2[...,None,:], axis=-1)
+    rho = nm.sqrt(nm.maximum(nm.sum(nm.square(relative), axis=-1) - nm.square(u), 0) +
+                  nm.square(nm.asarray(gmd, dtype=precision))[...,None])
+    with nm.errstate(divide='ignore', invalid='ignore'):
+        inner = nm.arcsinh((u + l_2[...,None])/rho) - nm.arcsinh(u/rho)
+    if(Instrument.enabled):
+        Instrument.Count("Neumann", inner.size)
+    return 0.001*cosine*l_1*(inner @ weights)
+
+#Grover's sum for the bars (scaled up by a*b*c*d), the arguments are broadcast already
+#the z corners of the bar formula are a second difference across the thickness of both
+#bars, 0.0175mm next to distances of cm, which throws away ~10 digits of terms that are
+#roughly length^5, so bars that are apart in z go through _TapeSum instead
+def _GroverSum(E, l_3, P, a, b, c, d, l_1, l_2):
+    tape = nm.maximum(P - b, -(P + c)) >= nm.maximum(b, c)
+    if(nm.all(tape)):
+        return _TapeSum(E, l_3, P, a, b, c, d, l_1, l_2)
+    if(not nm.any(tape)):
+        return _BarSum(E, l_3, P, a, b, c, d, l_1, l_2)
+    args = (E, l_3, P, a, b, c, d, l_1, l_2)
+    L = nm.empty(E.shape, dtype=E.dtype)
+    L[tape] = _TapeSum(*[v[tape] for v in args])
+    L[~tape] = _BarSum(*[v[~tape] for v in args])
+    return L
+
+#the signed sum over all 64 corners, before it's scaled
+def _BarSum(E, l_3, P, a, b, c, d, l_1, l_2):
+    args = (E, l_3, P, a, b, c, d, l_1, l_2)
+    E, l_3, P, a, b, c, d, l_1, l_2 = [v[...,None] for v in args]
+
+    #arrays holding the X,Y,Z permutations
+    x = nm.concatenate(nm.broadcast_arrays(E-a, E+d-a, E+d, E), axis=-1)
+    y = nm.concatenate(nm.broadcast_arrays(l_3-l_1, l_3+l_2-l_1, l_3+l_2, l_3), axis=-1)
+    z = nm.concatenate(nm.broadcast_arrays(P-b, P+c-b, P+c, P), axis=-1)
+
+    #every permutation of xyz at once
+    M = _groverSign * GroverMb(x[...,:,None,None], y[...,None,:,None], z[...,None,None,:])
+    return _Recheck(_BarSum, M, args)
+
+#Grover's f(x,y,z) for thin tapes (Hoer & Love), the second derivative in z of GroverMb
+#give or take terms the x/y corners cancel, roughly length^3 instead of length^5
+#z is never 0 here, the tapes are always apart
+def GroverMt(x,y,z):
+    x2 = nm.square(x)
+    y2 = nm.square(y)
+    z2 = nm.square(z)
+    d = nm.sqrt(x2+y2+z2)
+    #ln(u + d) without losing u + d for large negative u
+    def Log(u, rest):
+        with nm.errstate(divide='ignore', invalid='ignore'):
+            return nm.log(nm.where(u >= 0, u + d, rest/(d - u)))
+    return ((x2 - z2)/2*y*Log(y, x2 + z2) + (y2 - z2)/2*x*Log(x, y2 + z2) -
+            (x2 + y2 - 2*z2)*d/6 - x*y*z*nm.arctan(x*y/(z*d)))
+
+#Gauss-Legendre points across the thickness of each bar for _TapeSum
+tapeOrder = 2
+
+#_BarSum for bars that are apart in z, the z corners of the bar formula add up to
+#integral(integral(GroverMt)) across both thicknesses, which is done by Gauss-Legendre
+#instead of cancelling the corners against each other
+def _TapeSum(E, l_3, P, a, b, c, d, l_1, l_2):
+    args = (E, l_3, P, a, b, c, d, l_1, l_2)
+    E, l_3, P, a, b, c, d, l_1, l_2 = [v[...,None] for v in args]
+    s, weights = _GaussLegendre(tapeOrder)
+
+    x = nm.concatenate(nm.broadcast_arrays(E-a, E+d-a, E+d, E), axis=-1)
+    y = nm.concatenate(nm.broadcast_arrays(l_3-l_1, l_3+l_2-l_1, l_3+l_2, l_3), axis=-1)
+    #every pair of points across the two thicknesses, with both bars the same thickness
+    #(p,q) and (q,p) land on the same z so only one of them is needed, twice
+    if(nm.all(b == c)):
+        p, q = nm.triu_indices(tapeOrder)
+        weights = weights[p]*weights[q]*nm.where(p == q, 1, 2)
+    else:
+        p, q = [v.reshape(-1) for v in nm.indices((tapeOrder,tapeOrder))]
+        weights = weights[p]*weights[q]
+    z = (P - b) + b*s[p] + c*s[q]
+
+    #scaled by the thicknesses so the sum stands in for the 64 corners of _BarSum
+    M = (_groverSign[:,:,:1]*weights)*((b*c)[...,None,None]*
+                                       GroverMt(x[...,:,None,None], y[...,None,:,None],
+                                                z[...,None,None,:]))
+    return _Recheck(_TapeSum, M, args)
+
+#sum of Grover's terms M, they can be much bigger than what they add up to so anything
+#that might have lost more than cancellationTolerance (relative) to that is worked out
+#again by Sum in longdouble
+def _Recheck(Sum, M, args):
+    L = nm.sum(M, axis=(-3,-2,-1))
+    eps = nm.finfo(L.dtype).eps
+    if(cancellationTolerance is not None and eps > nm.finfo(nm.longdouble).eps):
+        bad = eps*nm.sum(nm.abs(M), axis=(-3,-2,-1)) > cancellationTolerance*nm.abs(L)
+        if(nm.any(bad)):
+            if(Instrument.enabled):
+                Instrument.Count("longdouble fallback", nm.count_nonzero(bad))
+            with Precision(nm.longdouble):
+                L[bad] = Sum(*[v[bad].astype(nm.longdouble) for v in args])
+    return L
+
+#least recently used memo of trace pair mutual inductances
+#pairs are keyed on their relative geometry rounded to resolution (cm), so the
+#same configuration showing up in different turns/layers/designs is only worked out once
+class MutualMemo:
+    def __init__(self, maxSize = 1<<20, resolution = 1e-7):
+        self.maxSize = maxSize
+        self.resolution = resolution
+        self.hits = 0
+        self.misses = 0
+        self._memo = OrderedDict()
         
-        if(nm.isinf(M) or nm.isnan(M)):
-            #print(str(M_00)+"*"+str(M_01))
-            #print([x,y,z])
-            print("error with mutual inductance calculation...")
-            print(str(M_00*M_01)+"+"+str(M_10*M_11)+"+"+str(M_20*M_21)+"+"+str(M_3)+"-"+str(M_4)+"-"+str(M_5)+"-"+str(M_6))
+    def Mutual(self, E, l_3, P, a, b, c, d, l_1, l_2):
+        geometry = nm.broadcast_arrays(*[nm.asarray(v, dtype=precision)
+                                         for v in (E, l_3, P, a, b, c, d, l_1, l_2)])
+        shape = geometry[0].shape
+        geometry = nm.stack([v.reshape(-1) for v in geometry], axis=1)
         
-        return M
+        #repeated pairs in the same call only need one lookup
+        keys = nm.round(geometry/self.resolution).astype(nm.int64)
+        keys, first, inverse = nm.unique(keys, axis=0, return_index=True, return_inverse=True)
+        
+        L = nm.empty(len(keys), dtype=precision)
+        missing = []
+        #values worked out at a different precision don't count
+        dtype = geometry.dtype.char.encode("ascii")
+        for n in range(0,len(keys)):
+            key = dtype + keys[n].tobytes()
+            value = self._memo.get(key)
+            if(value is None):
+                missing.append(n)
+            else:
+                self._memo.move_to_end(key)
+                L[n] = value
+        #repeats inside the call count as hits, they weren't worked out again
+        self.hits += len(geometry) - len(missing)
+        self.misses += len(missing)
+        
+        if(missing):
+            rows = geometry[first[missing]]
+            L[missing] = GroverKernel(*rows.T)
+            for n in missing:
+                self._memo[dtype + keys[n].tobytes()] = L[n]
+            while(len(self._memo) > self.maxSize):
+                self._memo.popitem(last=False)
+        
+        return L[inverse.reshape(-1)].reshape(shape)
+    
+    def Clear(self):
+        self._memo.clear()
+        self.hits = 0
+        self.misses = 0
+    
+    def HitRate(self):
+        lookups = self.hits + self.misses
+        return self.hits/lookups if lookups else 0
+        
+    def Report(self):
+        return ("mutual memo: " + str(self.hits) + " hits, " + str(self.misses) +
+                " misses (" + "{0:.1f}".format(100*self.HitRate()) + "%), " +
+                str(len(self._memo)) + " stored")
+
+#turn the trace pair memo on, maxSize = None turns it back off
+def UseMutualMemo(maxSize = 1<<20, resolution = 1e-7):
+    global mutualMemo
+    if(maxSize is None):
+        mutualMemo = None
+    else:
+        mutualMemo = MutualMemo(maxSize, resolution)
+    return mutualMemo
+        
+#current direction of a trace based on where it sits in the coil, traces go
+#0->1->2->3 around each turn so i%2 decides parallel and i%4 the direction
+_currentDirection = nm.array([[1,0],[0,1],[-1,0],[0,-1]])
+
+#table of traces stored as contiguous arrays, one per field (struct of arrays)
+#assumes all traces are connected, IE 0->1->2->3->4 etc.
+class TraceTable:
+    __slots__ = ("_start", "_stop", "_width", "_height", "_length", "_L", "_R", "_count")
+    
+    #dtype defaults to the current precision
+    def __init__(self, capacity = 16, dtype = None):
+        if(dtype is None):
+            dtype = precision
+        self._count = 0
+        self._start = nm.empty((capacity,3), dtype=dtype)
+        self._stop = nm.empty((capacity,3), dtype=dtype)
+        self._width = nm.empty(capacity, dtype=dtype)
+        self._height = nm.empty(capacity, dtype=dtype)
+        self._length = nm.empty(capacity, dtype=dtype)
+        self._L = nm.empty(capacity, dtype=dtype)
+        self._R = nm.empty(capacity, dtype=dtype)
+        
+    #add a block of traces, start/stop are (n,3) in mm and the width/height in mm
+    def Append(self, start, stop, _width, _height):
+        dtype = self._width.dtype
+        start = nm.atleast_2d(nm.asarray(start, dtype=dtype))
+        stop = nm.atleast_2d(nm.asarray(stop, dtype=dtype))
+        first = self._count
+        last = first + len(start)
+        self._Reserve(last)
+        
+        self._start[first:last] = start
+        self._stop[first:last] = stop
+        #physical paramaters of the traces, converted to cm
+        self._width[first:last] = dtype.type(_width) / 10
+        self._height[first:last] = dtype.type(_height) / 10
+        self._length[first:last] = nm.sqrt(nm.square(start[:,0]-stop[:,0]) +
+                                           nm.square(start[:,1]-stop[:,1]))/10
+        #electrical paramaters of the traces
+        self._R[first:last] = TraceResistance(self._length[first:last],
+                                              self._width[first:last], self._height[first:last])
+        self._L[first:last] = TraceInductance(self._length[first:last],
+                                              self._width[first:last], self._height[first:last])
+        self._count = last
+        
+    #copies of all the per trace arrays, keyed by field name
+    def Arrays(self):
+        return {field[1:]: getattr(self, field)[:self._count].copy()
+                for field in self.__slots__[:-1]}
+    
+    #build a table straight from the arrays given by Arrays()
+    @classmethod
+    def FromArrays(cls, arrays):
+        table = cls(max(len(arrays["width"]),1), arrays["width"].dtype)
+        table._count = len(arrays["width"])
+        for field in cls.__slots__[:-1]:
+            getattr(table, field)[:table._count] = arrays[field[1:]]
+        return table
         
+    #grow the arrays so they can hold at least count traces
+    def _Reserve(self, count):
+        capacity = len(self._width)
+        if(count <= capacity):
+            return
+        while(capacity < count):
+            capacity *= 2
+        for field in self.__slots__[:-1]:
+            old = getattr(self, field)
+            new = nm.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._count] = old[:self._count]
+            setattr(self, field, new)
+        
+    def __len__(self):
+        return self._count
+    
+    def __getitem__(self, index):
+        if(index < 0):
+            index += self._count
+        if(index < 0 or index >= self._count):
+            raise IndexError("trace index out of range")
+        return TraceView(self, index)
+    
+    def __iter__(self):
+        for i in range(0,self._count):
+            yield TraceView(self, i)
+    
+    #views of the used part of each array
+    @property
+    def start(self):
+        return self._start[:self._count]
+    @property
+    def stop(self):
+        return self._stop[:self._count]
+    @property
+    def width(self):
+        return self._width[:self._count]
+    @property
+    def height(self):
+        return self._height[:self._count]
+    @property
+    def length(self):
+        return self._length[:self._count]
+    @property
+    def L(self):
+        return self._L[:self._count]
+    @property
+    def R(self):
+        return self._R[:self._count]
+    @property
+    def direction(self):
+        return _currentDirection[nm.arange(self._count)%4]
+
+#a single trace inside a TraceTable, looks like a Trace but holds no data itself
+class TraceView:
+    __slots__ = ("table", "index")
+    
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+        
+    @property
+    def start(self):
+        return self.table.start[self.index]
+    @property
+    def stop(self):
+        return self.table.stop[self.index]
+    @property
+    def width(self):
+        return self.table.width[self.index]
+    @property
+    def height(self):
+        return self.table.height[self.index]
+    @property
+    def length(self):
+        return self.table.length[self.index]
+    @property
+    def L(self):
+        return self.table.L[self.index]
+    @property
+    def R(self):
+        return self.table.R[self.index]
+        
+    MutualInductance = Trace.MutualInductance
+    Mb = Trace.Mb
+
+#the kernel is even in E, l_3 and P about the middle of each bar, and doesn't care which
+#bar is which, so every pair can be put the same way round, pairs that sit alike then
+#have the same geometry (rounded to resolution, cm)
+#returns the (n,9) E, l_3, P, a, b, c, d, l_1, l_2 of every different pair and
+#the index into it of every pair given
+def UniquePairs(E, l_3, P, a, b, c, d, l_1, l_2, resolution = 1e-9):
+    E, l_3, P, a, b, c, d, l_1, l_2 = [nm.asarray(v, dtype=precision).reshape(-1) for v in
+                                       nm.broadcast_arrays(E, l_3, P, a, b, c, d, l_1, l_2)]
+    #distances between the middles of the bars, always positive
+    E = nm.abs(E - (a - d)/2)
+    l_3 = nm.abs(l_3 - (l_1 - l_2)/2)
+    P = nm.abs(P - (b - c)/2)
+    a, d = nm.minimum(a, d), nm.maximum(a, d)
+    b, c = nm.minimum(b, c), nm.maximum(b, c)
+    l_1, l_2 = nm.minimum(l_1, l_2), nm.maximum(l_1, l_2)
+    #and back to where the kernel measures from
+    E = E + (a - d)/2
+    l_3 = l_3 + (l_1 - l_2)/2
+    P = P + (b - c)/2
+    geometry = nm.stack([E, l_3, P, a, b, c, d, l_1, l_2], axis=1)
+    keys = nm.round(geometry/resolution).astype(nm.int64)
+    first, inverse = _UniqueRows(keys)
+    return geometry[first], inverse
+
+#nm.unique(keys, axis=0) of an (n,9) int64 array, giving back the index of the first of each
+#different row and the index into those of every row
+#sorting whole rows costs as much as the kernel saves on a grid with few duplicates, so the
+#rows are hashed down to one int64 (it wraps) and only those are sorted, a hash that lands
+#two different rows together is caught and the rows are sorted after all
+_rowHash = nm.random.default_rng(19).integers(1, 1<<62, 9, dtype=nm.int64) | 1
+def _UniqueRows(keys):
+    hashes = keys @ _rowHash[:keys.shape[1]]
+    hashes, first, inverse = nm.unique(hashes, return_index=True, return_inverse=True)
+    if(not nm.array_equal(keys[first][inverse], keys)):
+        keys, first, inverse = nm.unique(keys, axis=0, return_index=True, return_inverse=True)
+    return first, inverse.reshape(-1)
+
+#partial inductance matrix of a packed set of traces
+#self inductance on the diagonal, signed mutual inductance everywhere else
+#(+ same direction, - opposite direction, 0 for orthogonal traces)
+#known is an already worked out partial inductance matrix of the traces at knownIndex,
+#only the pairs involving the other traces are calculated
+def PartialInductanceMatrix(table, known = None, knownIndex = None):
+    traceCount = len(table)
+    #+1/-1 for parallel traces, 0 when they're orthogonal
+    sign = table.direction @ table.direction.T
+    #only work out the upper triangle of parallel pairs, the rest is mirrored
+    needed = nm.triu(sign != 0, 1)
+    if(known is not None):
+        needed[nm.ix_(knownIndex,knownIndex)] = False
+    i, j = nm.nonzero(needed)
+    E, l_3, P = RelativePosition(table.start[i], table.stop[i], table.start[j], table.stop[j])
+    #a coil is full of pairs that sit the same way as another pair (or its mirror image),
+    #the other layers most of all, each one only goes through the kernel once
+    geometry, inverse = UniquePairs(E, l_3, P, table.width[i], table.height[i],
+                                    table.height[j], table.width[j],
+                                    table.length[i], table.length[j])
+    if(Instrument.enabled):
+        Instrument.Count("duplicate pairs", len(i) - len(geometry))
+    M = PairMutual(*geometry.T)[inverse]
+    
+    P = nm.zeros((traceCount,traceCount), dtype=precision)
+    if(known is not None):
+        P[nm.ix_(knownIndex,knownIndex)] = known
+    P[i,j] = sign[i,j]*M
+    P[j,i] = P[i,j]
+    P[nm.diag_indices(traceCount)] = table.L
+    return P
+
+#the point (along - width/2, across - length/2, z - height/2) in cm of every trace that the
+#kernel measures each pair from, with the traces lying along its y, see RelativePosition
+def KernelPoints(table):
+    middle = (table.start + table.stop)/20
+    alongY = (table.start[:,0] == table.stop[:,0])
+    along = nm.where(alongY, middle[:,1], middle[:,0])
+    across = nm.where(alongY, middle[:,0], middle[:,1])
+    return nm.stack([along - table.width/2, across - table.length/2,
+                     middle[:,2] - table.height/2], axis=1)
+
+#every way of putting two of the indices on A and the other two on B, for the fourth
+#moment of a sum of independent parts from their second moments A and B
+def _Pairings(A, B):
+    pairings = 0
+    for places in ("ij,kl", "ik,jl", "il,jk", "kl,ij", "jl,ik", "jk,il"):
+        pairings = pairings + nm.einsum(places + "->ijkl", A, B)
+    return pairings
+
+#what the far field expansion needs to know about the traces of one coil, for each half
+#of the traces Antenna.Mutual pairs up (i%2) the total length, the length weighted
+#middle and the second, third and fourth central moments (cm^n) of every point along
+#every trace, the traces run along the kernel's y from their KernelPoints, so a trace l
+#long adds l^2/12 and l^4/80 along y
+def CouplingMoments(table):
+    points = KernelPoints(table)
+    y = nm.array([0,1,0], dtype=float)
+    yy = nm.outer(y, y)
+    moments = []
+    for parity in (0,1):
+        half = (nm.arange(len(table))%2 == parity)
+        length = table.length[half]
+        total = nm.sum(length)
+        weight = length/total
+        centre = weight @ points[half]
+        d = points[half] - centre
+        along = weight*nm.square(length)/12
+        spread = nm.einsum("n,ni,nj->ij", weight, d, d) + nm.sum(along)*yy
+        dyy = nm.einsum("i,jk->ijk", along @ d, yy)
+        third = nm.einsum("n,ni,nj,nk->ijk", weight, d, d, d) + dyy + \
+                nm.transpose(dyy, (1,0,2)) + nm.transpose(dyy, (1,2,0))
+        fourth = nm.einsum("n,ni,nj,nk,nl->ijkl", weight, d, d, d, d) + \
+                 _Pairings(nm.einsum("n,ni,nj->ij", along, d, d), yy) + \
+                 weight @ nm.power(length, 4)/80*nm.einsum("ij,kl->ijkl", yy, yy)
+        moments.append((total, centre, spread, third, fourth))
+    return moments
+
+#offsets (mm) that Antenna.Mutual between the two trace tables is symmetric about,
+#(mirror, point), mirror is [x, y] with None for an axis it isn't mirror symmetric in and
+#point is the [x, y] it's symmetric about turned half way round (x and y mirrored at once),
+#or None
+#the kernel is even about the middle of every pair along each axis (see UniquePairs), so
+#the sum is symmetric when the middles of all the pairs Antenna.Mutual adds up, with their
+#sizes, are the same set mirrored
+#the offsets move every pair along/across its own trace (see RelativePosition) and a spiral
+#steps in by a trace every turn, so a reader/tag pair is hardly ever mirror symmetric, two
+#alike coils always are turned half way round about 0 (pair i,j is pair j,i backwards)
+#tolerance is in cm
+def CouplingSymmetry(table, other, tolerance = 1e-6):
+    i, j = nm.nonzero((nm.arange(len(table))%2)[:,None] == (nm.arange(len(other))%2)[None,:])
+    if(len(i) == 0):
+        return [None,None], None
+    middles = KernelPoints(table)[i] - KernelPoints(other)[j]
+    sizes = nm.stack([nm.minimum(table.width[i], other.width[j]),
+                      nm.maximum(table.width[i], other.width[j]),
+                      nm.minimum(table.height[i], other.height[j]),
+                      nm.maximum(table.height[i], other.height[j]),
+                      nm.minimum(table.length[i], other.length[j]),
+                      nm.maximum(table.length[i], other.length[j])], axis=1)
+    def Sorted(rows):
+        keys = nm.round(nm.concatenate([rows, sizes], axis=1)/tolerance).astype(nm.int64)
+        return keys[nm.lexsort(keys.T[::-1])]
+    pairs = Sorted(middles)
+    centre = nm.round(nm.mean(middles[:,:2], axis=0)/tolerance)*tolerance
+    def Symmetric(axes):
+        mirrored = middles.copy()
+        mirrored[:,axes] = 2*centre[axes] - middles[:,axes]
+        return nm.array_equal(pairs, Sorted(mirrored))
+    mirror = [10*centre[axis] if Symmetric([axis]) else None for axis in (0,1)]
+    point = list(10*centre) if Symmetric([0,1]) else None
+    return mirror, point
+
+#multipole expansion of Antenna.Mutual between two trace tables, good when the offset is
+#large next to the size of both coils, the offsets broadcast like Antenna.Mutual
+#every pair in the sum is 0.001*l_1*l_2/r to first order (the pairs aren't signed so the
+#sum behaves like a charge, not a dipole), the sum over the points d along both coils of
+#1/|D + d| is taken up to the fourth order term of its Taylor series with the exact
+#moments of d, returns (M, error, separation), error is the size of the sixth order term
+#for d that spread out (gaussian, E|d|^6 = tr(C)^3 + 6tr(C)tr(C^2) + 8tr(C^3)) and
+#separation is the distance between the coils in coil sizes
+#against the kernel at 1%, for readers 40-80mm and tags 15-40mm, 2 to 20mm up, the real
+#error of every offset the estimate let through was under 0.75%, the fifth order term
+#is left out since coils are close to point symmetric and it goes by the third moments
+#it takes over where the offset is ~3 coil spreads out, more than 1.5x the reader size
+#from its middle, so on a map 3x the size of the reader that's only ~10% of the points
+#and the kernel still does nearly all the work, at 5x it's about half and at 9x 85%
+#(7.5x faster)
+def FarFieldMutual(table, other, zOffset = 1, xOffset = 0, yOffset = 0):
+    offset = nm.stack(nm.broadcast_arrays(nm.asarray(xOffset, dtype=precision),
+                                          nm.asarray(yOffset, dtype=precision),
+                                          nm.asarray(zOffset, dtype=precision)), axis=-1)/10
+    M = 0
+    error = 0
+    separation = nm.inf
+    for mine, theirs in zip(CouplingMoments(table), CouplingMoments(other)):
+        total = 0.001*mine[0]*theirs[0]
+        #d is the spread of this coil minus that of the other one
+        C = mine[2] + theirs[2]
+        third = mine[3] - theirs[3]
+        fourth = mine[4] + theirs[4] + _Pairings(mine[2], theirs[2])
+        D = mine[1] - theirs[1] - offset
+        R = nm.sqrt(nm.sum(nm.square(D), axis=-1))
+        #the derivatives of 1/R contracted with the moments, over n!
+        quadrupole = (3*nm.einsum("...i,ij,...j", D, C, D) - nm.trace(C)*nm.square(R))/(2*nm.power(R,5))
+        octupole = (-15*nm.einsum("ijk,...i,...j,...k", third, D, D, D)/nm.power(R,7) +
+                    9*nm.einsum("iik,...k", third, D)/nm.power(R,5))/6
+        T = nm.einsum("iikl->kl", fourth)
+        hexadecapole = (105*nm.einsum("ijkl,...i,...j,...k,...l", fourth, D, D, D, D)/nm.power(R,9) -
+                        90*nm.einsum("...i,ij,...j", D, T, D)/nm.power(R,7) +
+                        9*nm.trace(T)/nm.power(R,5))/24
+        M = M + total*(1/R + quadrupole + octupole + hexadecapole)
+        spread = nm.trace(C)
+        error = error + total*(spread**3 + 6*spread*nm.trace(C @ C) + 8*nm.trace(C @ C @ C))/nm.power(R,7)
+        separation = nm.minimum(separation, R/nm.sqrt(spread))
+    return M, error, separation
+
+#rotation matrices (...,3,3) turning xAngle about x, then yAngle about y, then zAngle
+#about z (degrees), the angles broadcast
+def RotationMatrix(xAngle = 0, yAngle = 0, zAngle = 0):
+    xAngle, yAngle, zAngle = nm.broadcast_arrays(*[nm.radians(nm.asarray(v, dtype=precision))
+                                                   for v in (xAngle, yAngle, zAngle)])
+    def Turn(angle, i, j):
+        R = nm.zeros(angle.shape + (3,3), dtype=precision)
+        R[...,0,0] = R[...,1,1] = R[...,2,2] = 1
+        R[...,i,i] = R[...,j,j] = nm.cos(angle)
+        R[...,i,j] = -nm.sin(angle)
+        R[...,j,i] = nm.sin(angle)
+        return R
+    return Turn(zAngle, 0, 1) @ Turn(yAngle, 2, 0) @ Turn(xAngle, 1, 2)
+
+#Antenna.Mutual between two trace tables with the second one turned by pose (xAngle,
+#yAngle, zAngle in degrees, see RotationMatrix) about its own middle and then moved by
+#the offsets (mm), the offsets and angles broadcast and come back flat
+#every trace pair goes through NeumannKernel as a filament along the trace, parallel or
+#not, signed by the way each trace runs from start to stop, every layer of a coil from
+#TurnTraces goes round the same way so the pairs across a loop cancel like they should,
+#signed = False adds all the pairs up unsigned the way Antenna.Mutual does, that doesn't
+#follow the field at all once the coil is turned (it never changes sign)
+#this is its own model and doesn't give Antenna.Mutual back at pose (0,0,0): the traces
+#are filaments instead of Grover's bars, and the offsets move the whole coil in x/y where
+#Antenna.Mutual moves every pair along/across its own trace (see RelativePosition), so
+#tilts are compared against PoseMutual untilted, not against Antenna.Mutual
+#chunk limits how many kernel terms are held in memory at one time
+def PoseMutual(table, other, zOffset = 1, xOffset = 0, yOffset = 0, pose = (0,0,0),
+               order = 8, signed = True, chunk = 1<<21):
+    offset = nm.stack(nm.broadcast_arrays(*[nm.asarray(v, dtype=precision) for v in
+                                            (xOffset, yOffset, zOffset) + tuple(pose)]), axis=-1)
+    offset = offset.reshape(-1,6)
+    turn = RotationMatrix(offset[:,3], offset[:,4], offset[:,5])
+    ends = nm.concatenate([other.start, other.stop])
+    middle = (nm.min(ends, axis=0) + nm.max(ends, axis=0))/2
+    gmd = 0.2235*(table.width[:,None] + table.height[:,None] +
+                  other.width[None,:] + other.height[None,:])/2
+
+    M = nm.zeros(len(offset), dtype=precision)
+    #how many poses fit in a chunk, order terms per trace pair
+    step = max(1, chunk//(order*len(table)*max(len(other),1)))
+    with Instrument.Stage("PoseMutual"):
+        for n in range(0,len(offset),step):
+            #the turned and moved ends of the other traces in cm, (poses,1,traces,3)
+            start, stop = [((point - middle) @ nm.swapaxes(turn[n:n+step,None],-1,-2) +
+                            middle + offset[n:n+step,None,None,:3])/10
+                           for point in (other.start, other.stop)]
+            L = NeumannKernel(table.start[:,None]/10, table.stop[:,None]/10, start, stop,
+                              gmd, order, signed)
+            M[n:n+step] = nm.sum(L, axis=(-2,-1))
+    return M
+
+#switch everything over to dtype (nm.float64 or nm.longdouble)
+def SetPrecision(dtype):
+    global precision
+    precision = dtype
+
+#work in dtype for the duration of a with block
+#with Precision(nm.longdouble): ...
+@contextmanager
+def Precision(dtype):
+    global precision
+    previous = precision
+    precision = dtype
+    try:
+        yield
+    finally:
+        precision = previous
+
+#turn on the far field expansion in Antenna.Mutual past multiple times the coil size,
+#where its error estimate is under tolerance, multiple = None turns it back off
+#the estimate is what keeps it accurate, at 1% it's only ever under it past ~2.5 coil
+#spreads out anyway, multiple only keeps it away from where the series doesn't converge
+def UseFarField(multiple = 2, tolerance = 1e-2):
+    global farField, farFieldTolerance
+    farField = multiple
+    farFieldTolerance = tolerance
+
+#look Antenna.Mutual up in field (a ReaderField.ReaderField) whenever it fits,
+#field = None turns it back off
+def UseReaderField(field):
+    global readerField
+    readerField = field
+    return readerField
+
+#turn the on disk design cache on, path = None turns it back off
+def UseDesignCache(path = "Output/cache", maxBytes = 256*1024*1024):
+    global designCache
+    if(path is None):
+        designCache = None
+    else:
+        designCache = DesignCache(path, maxBytes)
+    return designCache
+
 #antenna class,
 #assumes all traces are connected, IE 0->1->2->3->4 etc.
         #if gap or trace width are not given automaticall space it such that 
@@ -192,7 +862,7 @@ class Antenna:
                 _traceWidth = (_width/(2*_turns)) -_gap
         
         #physical paramaters of traces
-        self.traces = []
+        self.traces = TraceTable()
         self.trace_Width = _traceWidth
         self.trace_Height = conductor_thickness
         
@@ -201,12 +871,45 @@ class Antenna:
         self.C = 0
         self.R = 0
         self.Z = 0
+        #partial inductance matrix of all the traces
+        self.partialL = None
         
         #special parameters, set outside the main class
         self.Q = 0
         self.layer = 0
         
     def DesignAntenna(self, _layer = 2, thickness = 0.075):
+        #only a fresh antenna can be pulled from the cache
+        if(designCache is None or len(self.traces) != 0):
+            return self._DesignAntenna(_layer, thickness)
+        
+        key = designCache.Key(self.width, self.length, self.turns, self.gap,
+                              self.trace_Width, _layer, thickness,
+                              self.trace_Height, resistivity,
+                              nm.dtype(precision).itemsize,
+                              nm.inf if cancellationTolerance is None else cancellationTolerance)
+        entry = designCache.Get(key)
+        if(entry is not None):
+            self.traces = TraceTable.FromArrays(entry)
+            self.L = entry["antennaL"][()]
+            self.R = entry["antennaR"][()]
+            self.partialL = entry["partialL"] if entry["partialL"].ndim == 2 else None
+            self.layer = _layer
+            if(entry["result"] == -1):
+                return -1
+            return
+        
+        result = self._DesignAntenna(_layer, thickness)
+        #L and R are already the per trace arrays
+        entry = self.traces.Arrays()
+        entry["antennaL"] = precision(self.L)
+        entry["antennaR"] = precision(self.R)
+        entry["partialL"] = self.partialL if self.partialL is not None else nm.zeros(0)
+        entry["result"] = -1 if result == -1 else 0
+        designCache.Put(key, entry)
+        return result
+        
+    def _DesignAntenna(self, _layer = 2, thickness = 0.075):
         self.layer = _layer
         for n in range(0,_layer):
             if(self.CoilAntenna(thickness*n,nm.power(-1,n)) == -1):
@@ -217,128 +920,177 @@ class Antenna:
         #delta is the total space between two lines
         delta = (self.gap + self.trace_Width)
         if(2*delta*self.turns > self.width or 2*delta*self.turns > self.length):
-            print("invalid design")
+            log.debug("invalid design")
             return -1
+        
+        with Instrument.Stage("CoilAntenna"):
+            #add the traces turn by turn so the antenna characteristics can be calculated
+            start, stop = self.TurnTraces(nm.arange(0,self.turns), z, clockwise)
+            self.traces.Append(start, stop, self.trace_Width, self.trace_Height)
+                    
+            #add each trace parameter to coil parameter
+            self.R += nm.sum(self.traces.R)
             
+            #self inductances plus every pair of traces counted once, the layers
+            #already designed keep their block of the matrix
+            if(self.partialL is None):
+                self.partialL = PartialInductanceMatrix(self.traces)
+            else:
+                self.partialL = PartialInductanceMatrix(self.traces, self.partialL,
+                                                        nm.arange(0,len(self.partialL)))
+            self.L += nm.trace(self.partialL) + nm.sum(nm.triu(self.partialL, 1))
+        
+    #start/stop of the four traces of each of the given turns (0 is the outside)
+    def TurnTraces(self, turns, z = 0, clockwise = 1):
+        delta = (self.gap + self.trace_Width)
+        #corners of every turn
+        inner = (turns+1)*delta
+        outer = turns*delta
+        zs = nm.full(len(turns), z)
+        corners = [nm.stack([outer, outer, zs], axis=1),
+                   nm.stack([self.width-outer, outer, zs], axis=1),
+                   nm.stack([self.width-outer, self.length-outer, zs], axis=1),
+                   nm.stack([inner, self.length-outer, zs], axis=1),
+                   nm.stack([inner, inner, zs], axis=1)]
+        #left, bottom, right, top as corner to corner
+        left = (corners[0], corners[1])
+        bottom = (corners[1], corners[2])
+        right = (corners[2], corners[3])
+        top = (corners[3], corners[4])
+        
         if(clockwise == 1):
-            for x in range(0,self.turns):
-                #left
-                start = [x*delta,x*delta,z]
-                stop = [self.width-x*delta,x*delta,z]
-                newTrace = Trace(start, stop, self.trace_Width, self.trace_Height)
-                #add the trace so the antenna characteristics can be calculated
-                self.traces.append(newTrace)
-                
-                #bottom
-                start = [self.width-x*delta,x*delta,z]
-                stop = [self.width-x*delta,self.length-x*delta,z]
-                newTrace = Trace(start, stop, self.trace_Width, self.trace_Height)
-                #add the trace so the antenna characteristics can be calculated
-                self.traces.append(newTrace)
-                
-                #right
-                start = [self.width-x*delta,self.length-x*delta,z]
-                stop = [(x+1)*delta,self.length-x*delta,z]
-                newTrace = Trace(start, stop, self.trace_Width, self.trace_Height)
-                #add the trace so the antenna characteristics can be calculated
-                self.traces.append(newTrace)
-                
-                #top
-                start = [(x+1)*delta,self.length-x*delta,z]
-                stop = [(x+1)*delta,(x+1)*delta,z]
-                newTrace = Trace(start, stop, self.trace_Width, self.trace_Height)
-                #add the trace so the antenna characteristics can be calculated
-                self.traces.append(newTrace)
+            order = [left, bottom, right, top]
         else:
-            for x in range(0,self.turns):
-                #left
-                start = [x*delta,x*delta,z]
-                stop = [self.width-x*delta,x*delta,z]
-                newTrace = Trace(start, stop, self.trace_Width, self.trace_Height)
-                #add the trace so the antenna characteristics can be calculated
-                self.traces.append(newTrace)
-                
-                #top
-                start = [(x+1)*delta,self.length-x*delta,z]
-                stop = [(x+1)*delta,(x+1)*delta,z]
-                newTrace = Trace(start, stop, self.trace_Width, self.trace_Height)
-                #add the trace so the antenna characteristics can be calculated
-                self.traces.append(newTrace)
-                
-                #right
-                start = [self.width-x*delta,self.length-x*delta,z]
-                stop = [(x+1)*delta,self.length-x*delta,z]
-                newTrace = Trace(start, stop, self.trace_Width, self.trace_Height)
-                #add the trace so the antenna characteristics can be calculated
-                self.traces.append(newTrace)
-                
-                #bottom
-                start = [self.width-x*delta,x*delta,z]
-                stop = [self.width-x*delta,self.length-x*delta,z]
-                newTrace = Trace(start, stop, self.trace_Width, self.trace_Height)
-                #add the trace so the antenna characteristics can be calculated
-                self.traces.append(newTrace)
-                
-        #add each trace parameter to coil parameter
-        for trace in self.traces:
-            self.L += trace.L
-            self.R += trace.R
-        
-        #which trace the iterator is currently on
-        x = 0
-        traceCount = len(self.traces)
-        Mplus = 0
-        Mminus = 0
-        for i in range(0,traceCount):
-            #increment x to prevent double counting traces    
-            x += 1
-            for j in range(x,traceCount):
-                #make sure the traces are paralell
-                if(i%2 == j%2):
-                    #check they are going the same direction
-                    L = self.traces[i].MutualInductance(self.traces[j])
-                    if(i%4 == j%4):
-                        Mplus += L
-                    else:
-                        Mminus += L      
-        
-        self.L += Mplus - Mminus
+            order = [left, top, right, bottom]
+        
+        start = nm.stack([side[0] for side in order], axis=1).reshape(-1,3)
+        stop = nm.stack([side[1] for side in order], axis=1).reshape(-1,3)
+        return start, stop
+    
+    #add one more turn to the inside of every layer of a designed antenna
+    #only the new traces get worked out, the rest of the partial inductance matrix is kept
+    #gives the same antenna as designing one with turns+1 from scratch
+    @Instrument.Timed("AddTurn")
+    def AddTurn(self, thickness = 0.075):
+        if(self.partialL is None):
+            log.error("antenna has to be designed first")
+            return -1
+        delta = (self.gap + self.trace_Width)
+        if(2*delta*(self.turns+1) > self.width or 2*delta*(self.turns+1) > self.length):
+            log.debug("invalid design")
+            return -1
+        
+        #each layer is a block of 4*turns traces, the new turn goes on the end of each block
+        oldTraces = self.traces
+        oldCount = 4*self.turns
+        self.turns += 1
+        starts = []
+        stops = []
+        known = []
+        for n in range(0,self.layer):
+            starts.append(oldTraces.start[n*oldCount:(n+1)*oldCount])
+            stops.append(oldTraces.stop[n*oldCount:(n+1)*oldCount])
+            start, stop = self.TurnTraces(nm.array([self.turns-1]), thickness*n, nm.power(-1,n))
+            starts.append(start)
+            stops.append(stop)
+            known.append(nm.arange(0,oldCount) + n*(oldCount+4))
+        
+        self.traces = TraceTable(len(oldTraces) + 4*self.layer)
+        self.traces.Append(nm.concatenate(starts), nm.concatenate(stops),
+                           self.trace_Width, self.trace_Height)
+        self.partialL = PartialInductanceMatrix(self.traces, self.partialL, nm.concatenate(known))
+        
+        #add it up the same way DesignAntenna does, one layer at a time
+        self.L = 0
+        self.R = 0
+        for n in range(1,self.layer+1):
+            P = self.partialL[:n*4*self.turns,:n*4*self.turns]
+            self.L += nm.trace(P) + nm.sum(nm.triu(P, 1))
+            self.R += nm.sum(self.traces.R[:n*4*self.turns])
 
     #TODO this might not actually be correct... however I don't have a good way to test ATM
     #Seems pretty good, used in other calculations and everything looks okay...
     #optional offset values to allow for... offsetting
-    def Mutual(self, otherAntenna, zOffset = 1, xOffset = 0, yOffset = 0):
-        Mplus = 0
-        Mminus = 0        
-        
-        traceCount = len(self.traces)
-        otherTraces = len(otherAntenna.traces)
-        for i in range(0,traceCount):
-            #couple with all the traces of the other antenna
-            for j in range(0,otherTraces):
-                #make sure the traces are paralell
-                if(i%2 == j%2):
-                    #Get the mutual inductance between two traces
-                    L = self.traces[i].MutualInductance(otherAntenna.traces[j],
-                                                        zOffset,xOffset,yOffset)
-                    #Check they are going the same direction, makes some bad assumptions...                    
-                    if(i%4 != j%4):
-                        Mplus += L
-                    else:
-                        Mminus += L 
-                      
-        #print(str(Mplus) + " - " + str(Mminus))
-        return Mplus + Mminus
+    #the offsets can be arrays, every (x,y,z) offset is worked out at once
+    #and the result has the broadcast shape of the offsets
+    #chunk limits how many kernel terms are held in memory at one time
+    #pose (xAngle, yAngle, zAngle in degrees) turns the other antenna first, the angles
+    #broadcast with the offsets and every trace pair goes through PoseMutual instead,
+    #which is a different model, pose = (0,0,0) isn't the same as no pose, signed goes
+    #to PoseMutual
+    def Mutual(self, otherAntenna, zOffset = 1, xOffset = 0, yOffset = 0, chunk = 1<<19,
+               pose = None, signed = True):
+        table = self.traces
+        other = otherAntenna.traces
+        if(pose is not None):
+            shape = nm.broadcast(zOffset, xOffset, yOffset, *pose).shape
+            M = PoseMutual(table, other, zOffset, xOffset, yOffset, pose, signed = signed,
+                           chunk = chunk)
+            M = M.reshape(shape)
+            if(M.ndim == 0):
+                return M[()]
+            return M
+        
+        #make sure the traces are paralell
+        #all the parallel pairs are summed, same direction or not, makes some bad assumptions...
+        i, j = nm.nonzero((nm.arange(len(table))%2)[:,None] == (nm.arange(len(other))%2)[None,:])
+        
+        zOffset, xOffset, yOffset = nm.broadcast_arrays(zOffset, xOffset, yOffset)
+        shape = zOffset.shape
+        zOffset = zOffset.reshape(-1,1)
+        xOffset = xOffset.reshape(-1,1)
+        yOffset = yOffset.reshape(-1,1)
+        
+        M = nm.zeros(len(zOffset), dtype=precision)
+        #only the offsets too close for the far field expansion go through the kernel
+        near = nm.arange(len(zOffset))
+        if(readerField is not None and readerField.Matches(table, other)):
+            fieldM, covered = readerField.Interpolate(other, zOffset[:,0], xOffset[:,0], yOffset[:,0])
+            M[covered] = fieldM[covered]
+            near = near[~covered]
+        if(farField is not None and len(near)):
+            farM, error, separation = FarFieldMutual(table, other, zOffset[near,0],
+                                                     xOffset[near,0], yOffset[near,0])
+            far = (separation > farField) & (error < farFieldTolerance*nm.abs(farM))
+            M[near[far]] = farM[far]
+            near = near[~far]
+            if(Instrument.enabled):
+                Instrument.Count("far field", nm.count_nonzero(far))
+        
+        #where every pair of traces sits without any offset, the offsets only move that
+        E, l_3, P = RelativePosition(table.start[i], table.stop[i], other.start[j], other.stop[j])
+        sizes = (table.width[i], table.height[i], other.height[j], other.width[j],
+                 table.length[i], other.length[j])
+        #how many offsets fit in a chunk, 64 terms per trace pair
+        step = max(1, chunk//(64*max(len(i),1)))
+        with Instrument.Stage("Mutual"):
+            for n in range(0,len(near),step):
+                rows = near[n:n+step]
+                #across a grid of offsets a lot of pairs end up sitting the same way as
+                #another pair at another offset, each of those goes through the kernel once
+                geometry, inverse = UniquePairs(E - xOffset[rows]/10, l_3 - yOffset[rows]/10,
+                                                P - zOffset[rows]/10, *sizes)
+                if(Instrument.enabled):
+                    Instrument.Count("duplicate pairs", len(inverse) - len(geometry))
+                L = PairMutual(*geometry.T)[inverse].reshape(len(rows),-1)
+                M[rows] = nm.sum(L, axis=-1)
+        
+        M = M.reshape(shape)
+        if(M.ndim == 0):
+            return M[()]
+        return M
     
     #k = M/(sqrt(L1*L2))
-    def K(self, otherAntenna, zOffset = 1, xOffset = 0, yOffset = 0):
-        Mutual = self.Mutual(otherAntenna,zOffset,xOffset,yOffset)
+    def K(self, otherAntenna, zOffset = 1, xOffset = 0, yOffset = 0, pose = None, signed = True):
+        Mutual = self.Mutual(otherAntenna,zOffset,xOffset,yOffset,pose = pose,signed = signed)
         return Mutual/(nm.sqrt(self.L*otherAntenna.L))
         
     def GetDimensions(self):
         return [self.width,self.length,self.turns,self.gap,self.trace_Width]
     
     def Draw(self, figure, label=-1):
+        #only pull in matplotlib when something actually gets drawn
+        import matplotlib.pyplot as plt
         plt.figure(figure) 
         if(label != -1):
             plt.title(label)
@@ -366,127 +1118,120 @@ class Antenna:
         plt.axis("scaled")
         plt.show()
         
+    #Eagle script of the traces in Output/name.scr, see Export for other formats
+    @Instrument.Timed("Eagle export")
     def GenerateEagle(self,name = "Test"):    
-        #Eagle wire command WIRE CW (0 1) (0 -1);        
-        output = open("Output/"+str(name)+".scr","w")
-        output.write("GRID MM \n")
-        output.write("LAYER 1 \n")
-        
-        #print out all the reaces
-        for trace in self.traces:
-            output.write("WIRE " + num2str(trace.width*10) + " 'antenna' ( "+
-                           num2str(trace.start[0])+" "+num2str(trace.start[1])+
-                        ") ("+num2str(trace.stop[0])+" "+num2str(trace.stop[1])+" ); \n")
-
-        output.close()
+        import Export
+        Export.Save(self, name)
         
+    #Eagle script with round topped turns in Output/name.scr
+    @Instrument.Timed("Eagle export")
     def GenerateRoundEagle(self,name = "Test"):    
-        #Eagle wire command WIRE CW (0 1) (0 -1);   
-        #Eagle arc command ARC CW (0 1) (0 -1) (1 0);
-        output = open("Output/"+str(name)+".scr","w")
-        output.write("GRID MM \n")
-        output.write("LAYER 1 \n")
-        
-        #iterates over the traces,
-        #TODO make this better, assuming a standard 4 turn antenna...
-        delta = self.trace_Width + self.gap
-        
-        #print out all the reaces
-        for n in range(0,self.turns):
-            #height of the arc
-            arc = nm.abs(((delta*n) - (self.width - delta*n))/2)
-            
-            #left
-            x0 = num2str(delta*n)
-            x1 = num2str(delta*n)
-            y0 = num2str(delta*(n-1))
-            y1 = num2str(self.length - delta*n - arc)
-            output.write("WIRE " + num2str(self.trace_Width) + 
-                " '"+name+"' ( " + x0 + "  " + y0 + " )" +
-                "( " + x1 + "  " + y1 + " ); \n")
-                
-            
-            #top left arc
-            x0 = num2str(self.width - delta*n)
-            x1 = num2str(delta*n)
-            y0 = num2str(self.length - delta*n  - arc)
-            y1 = num2str(self.length - delta*n  - arc)
-            output.write("ARC '"+name+"' CCW (" +
-                    x0 + " " + y0 + ") (" +
-                    x1 + " " + y1 + ") (" +
-                    x1 + " " + y1 + "); \n")
-                    #num2str(self.length - delta*n + arc) + "); \n")
-            
-               
-            #right
-            x0 = num2str(self.width - delta*n)
-            x1 = num2str(self.width - delta*n)
-            y0 = num2str(delta*n)
-            y1 = num2str(self.length - delta*n - arc)
-            output.write("WIRE " + num2str(self.trace_Width) + 
-                " '"+name+"' ( " + x0 + " " + y0 + " )"+
-                "( " + x1 + " " + y1 + " ); \n")
-                
-            #bottom
-            x0 = num2str(self.width - delta*n)
-            x1 = num2str(delta*(n+1))
-            y0 = num2str(delta*n)
-            y1 = num2str(delta*n)
-            output.write("WIRE " + num2str(self.trace_Width) + 
-                " '"+name+"' ( " + x0 + " " + y0 + " )"+
-                "( " + x1 + " " + y1 + " ); \n")
-        
-        #if it's dual layer draw the second layer, mirrored
-        if(self.layer > 1):
-            #define bottom layer
-            output.write("LAYER 16 \n")
-            #print out all the traces
-            for n in range(0,self.turns):
-                #height of the arc
-                arc = nm.abs(((delta*n) - (self.width - delta*n))/2)
-                
-                #left
-                x0 = num2str(delta*n)
-                x1 = num2str(delta*n)
-                y0 = num2str(delta*n)
-                y1 = num2str(self.length - delta*n - arc)
-                output.write("WIRE " + num2str(self.trace_Width) + 
-                    " '"+name+"' ( " + x0 + "  " + y0 + " )" +
-                    "( " + x1 + "  " + y1 + " ); \n")
-                    
-                
-                #top left arc
-                x0 = num2str(self.width - delta*n)
-                x1 = num2str(delta*n)
-                y0 = num2str(self.length - delta*n  - arc)
-                y1 = num2str(self.length - delta*n  - arc)
-                output.write("ARC '"+name+"' CCW (" +
-                        x0 + " " + y0 + ") (" +
-                        x1 + " " + y1 + ") (" +
-                        x1 + " " + y1 + "); \n")
-                        #num2str(self.length - delta*n + arc) + "); \n")
-                
-                   
-                #right
-                x0 = num2str(self.width - delta*n)
-                x1 = num2str(self.width - delta*n)
-                y0 = num2str(delta*(n-1))
-                y1 = num2str(self.length - delta*n - arc)
-                output.write("WIRE " + num2str(self.trace_Width) + 
-                    " '"+name+"' ( " + x0 + " " + y0 + " )"+
-                    "( " + x1 + " " + y1 + " ); \n")
-                    
-                #bottom
-                x0 = num2str(self.width - delta*(n+1))
-                x1 = num2str(delta*n)
-                y0 = num2str(delta*n)
-                y1 = num2str(delta*n)
-                output.write("WIRE " + num2str(self.trace_Width) + 
-                    " '"+name+"' ( " + x0 + " " + y0 + " )"+
-                    "( " + x1 + " " + y1 + " ); \n")
-        
-        output.close()
+        import Export
+        Export.Save(self, name, rounded = True)
         
+
+#mutual inductance (uH) between every pair of designed antennas placed at positions (mm),
+#(N,3) or (...,N,3) for a batch of layouts, gives back (N,N) or (...,N,N)
+#antenna j is offset by positions[j] - positions[i] from antenna i the same way
+#Antenna.Mutual offsets it, that's the same as i offset the other way from j so M_ij = M_ji,
+#only i < j is worked out
+#every trace pair is signed by the current direction of both traces the same way
+#PartialInductanceMatrix signs them, and the diagonal is each antenna's own partial
+#inductance matrix summed up the same way, so M_ij goes to L_i as two alike antennas close
+#in and |k_ij| < 1 (Antenna.Mutual and Antenna.L are the original model's unsigned/layer by
+#layer sums and would give k > 1 for tags stacked close together)
+#the trace pairs of every antenna pair in every layout go through the kernel together,
+#pairs that sit alike (a stack of identical tags is full of them) only once
+#chunk limits how many kernel terms are held in memory at one time
+def CouplingMatrix(antennas, positions, chunk = 1<<21):
+    positions = nm.asarray(positions, dtype=precision)
+    shape = positions.shape[:-2]
+    positions = positions.reshape((-1,) + positions.shape[-2:])
+    count = len(antennas)
+    tables = [antenna.traces for antenna in antennas]
+    start = nm.concatenate([table.start for table in tables])
+    stop = nm.concatenate([table.stop for table in tables])
+    width = nm.concatenate([table.width for table in tables])
+    height = nm.concatenate([table.height for table in tables])
+    length = nm.concatenate([table.length for table in tables])
+    direction = nm.concatenate([table.direction for table in tables])
+    base = nm.cumsum([0] + [len(table) for table in tables])
+
+    #every parallel trace pair of every antenna pair i < j
+    first, second = nm.triu_indices(count, 1)
+    owner, i, j = [], [], []
+    for pair, (n, m) in enumerate(zip(first, second)):
+        a, b = nm.nonzero(tables[n].direction @ tables[m].direction.T != 0)
+        owner.append(nm.full(len(a), pair))
+        i.append(a + base[n])
+        j.append(b + base[m])
+    owner, i, j = [nm.concatenate(v).astype(int) if len(v) else nm.zeros(0, dtype=int)
+                   for v in (owner, i, j)]
+    #+1 same direction, -1 opposite
+    sign = nm.sum(direction[i]*direction[j], axis=-1)
+
+    M = nm.zeros((len(positions), len(first)), dtype=precision)
+    #how many layouts fit in a chunk, 64 terms per trace pair
+    step = max(1, chunk//(64*max(len(i),1)))
+    with Instrument.Stage("CouplingMatrix"):
+        for n in range(0,len(positions),step):
+            layouts = positions[n:n+step]
+            offset = (layouts[:,second] - layouts[:,first])[:,owner]
+            E, l_3, P = RelativePosition(start[i], stop[i], start[j], stop[j],
+                                         offset[...,2], offset[...,0], offset[...,1])
+            geometry, inverse = UniquePairs(E, l_3, P, width[i], height[i], height[j], width[j],
+                                            length[i], length[j])
+            if(Instrument.enabled):
+                Instrument.Count("duplicate pairs", E.size - len(geometry))
+            L = PairMutual(*geometry.T)[inverse].reshape(len(layouts),-1)*sign
+            index = (nm.arange(len(layouts))[:,None]*len(first) + owner[None,:]).reshape(-1)
+            M[n:n+step] = nm.bincount(index, weights=L.reshape(-1),
+                                      minlength=len(layouts)*len(first)).reshape(len(layouts),-1)
+
+    matrix = nm.zeros((len(positions), count, count), dtype=precision)
+    matrix[:,first,second] = M
+    matrix[:,second,first] = M
+    for n, antenna in enumerate(antennas):
+        partialL = antenna.partialL
+        if(partialL is None):
+            partialL = PartialInductanceMatrix(antenna.traces)
+        matrix[:,n,n] = nm.sum(partialL)
+    return matrix.reshape(shape + (count, count))
+
+#coupling coefficients k_ij = M_ij/sqrt(L_i*L_j) of a CouplingMatrix, ones on the diagonal
+def CouplingCoefficients(M):
+    L = nm.sqrt(nm.diagonal(M, axis1=-2, axis2=-1))
+    return M/(L[...,:,None]*L[...,None,:])
+
+#the Panasonic/ST reference coils from the old Test() blocks
+referenceDesigns = ([(30,40,n,0.3,0.5) for n in range(1,11)] +
+                    [(20,20,n,0.3,0.5) for n in range(1,11)])
+
+#designs every reference coil in float64 and in longdouble and gives back the
+#largest relative difference of L and of K (against the usual reader) between the two,
+#plus whether both precisions rank the designs by K the same way
+def ComparePrecision(designs = None, layers = 2, zOffset = 20, xOffset = 0, yOffset = 0):
+    if(designs is None):
+        designs = referenceDesigns
+    results = []
+    for dtype in (nm.float64, nm.longdouble):
+        with Precision(dtype):
+            readAnt = Antenna(80,60,4,0.3,1)
+            readAnt.DesignAntenna(1)
+            L = []
+            K = []
+            for design in designs:
+                ant = Antenna(*design)
+                ant.DesignAntenna(layers)
+                L.append(ant.L)
+                K.append(readAnt.K(ant,zOffset,xOffset,yOffset))
+            results.append((nm.array(L, dtype=nm.longdouble), nm.array(K, dtype=nm.longdouble)))
+    
+    (L64, K64), (Lld, Kld) = results
+    return {"L": float(nm.max(nm.abs(L64-Lld)/nm.abs(Lld))),
+            "K": float(nm.max(nm.abs(K64-Kld)/nm.abs(Kld))),
+            "ranking": bool(nm.all(nm.argsort(K64) == nm.argsort(Kld)))}
      
 """
 def Test():
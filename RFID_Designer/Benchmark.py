@@ -0,0 +1,177 @@
+##########################################
+#Benchmarks for the inductance and coupling hot paths
+#every run is timed and checked against the reference coils so a speedup
+#that breaks the physics gets caught, results are written out as json
+#so runs can be compared over time
+##########################################
+import Antenna as AntennaModule
+from Antenna import Antenna, Trace
+import Main
+import Instrument
+import numpy as nm
+import contextlib
+import tempfile
+import platform
+import json
+import time
+import sys
+import io
+import os
+
+log = Instrument.log
+
+#reference inductances (uH) from the old Test() blocks, single layer coils
+#with 0.3mm gap and 0.5mm traces for 1-10 turns
+referenceData = {
+    "30x40": {"size": [30,40],
+              "Panasonic": [0.143,0.451,0.872,1.38,1.956,2.583,3.250,3.943,4.654,5.372],
+              "ST": [0.13328,0.42085,0.81101,1.28,1.81,2.36,2.91,3.47,4.02,4.57]},
+    "20x20": {"size": [20,20],
+              "Panasonic": [0.074,0.230,0.435,0.671,0.926,1.189,1.451,1.702,1.937,2.107],
+              "ST": [0.06666,0.19876,0.36427,0.54412,0.72448,0.89215,1.04,1.16,1.26,1.33]}}
+#how far off the model is allowed to be from the mean of the reference data
+referenceTolerance = 0.35
+
+#what the model itself gave for the reference coils when the benchmarks were written,
+#a change bigger than regressionTolerance means the calculation changed, not just the speed
+regressionData = {
+    "30x40": [0.13349796, 0.37063188, 0.69728674, 1.09901651, 1.5612368,
+              2.06933037, 2.60872426, 3.16495875, 3.72375828, 4.27111837],
+    "20x20": [0.07033146, 0.1928968, 0.35428451, 0.54073826, 0.73849687,
+              0.93402216, 1.11424886, 1.2669921, 1.38226387, 1.45828508]}
+#two layer coils (30x40, 1-6 turns) and the reader to tag K at a few (x, y, z) offsets (mm),
+#these go through the layer pairs and the reader/tag pairs the single layer coils never touch
+regressionLayers = {"size": [30,40], "layers": 2,
+                    "L": [0.3988744862, 1.105384679, 2.077131191, 3.270713033, 4.642304421,
+                          6.147968637]}
+regressionCoupling = {"offsets": [[0,0,20], [40,30,20], [20,10,10], [-30,-40,20], [110,100,40]],
+                      "K": [0.4548512733, 0.3960714675, 0.6504546820, 0.2761750257,
+                            0.1372593774]}
+regressionTolerance = 1e-6
+
+#runs function repeat times and gives back the fastest and mean time in seconds
+def _Time(function, repeat = 3):
+    times = []
+    for n in range(0,repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times), sum(times)/len(times)
+
+def _Designed(width, length, turns, gap, traceWidth, layers = 1):
+    ant = Antenna(width, length, turns, gap, traceWidth)
+    ant.DesignAntenna(layers)
+    return ant
+
+#L of every reference coil compared to the reference data and the regression values
+def CheckAccuracy():
+    accuracy = {}
+    for name, data in referenceData.items():
+        L = nm.array([float(_Designed(data["size"][0], data["size"][1], n, 0.3, 0.5).L)
+                      for n in range(1,11)])
+        reference = (nm.array(data["Panasonic"]) + nm.array(data["ST"]))/2
+        regression = nm.array(regressionData[name])
+        accuracy[name] = {"L": L.tolist(),
+                          "referenceError": float(nm.max(nm.abs(L - reference)/reference)),
+                          "regressionError": float(nm.max(nm.abs(L - regression)/regression))}
+        accuracy[name]["passed"] = (accuracy[name]["referenceError"] <= referenceTolerance and
+                                    accuracy[name]["regressionError"] <= regressionTolerance)
+
+    #the frozen values only, there's no reference data for these
+    def Regression(values, frozen):
+        error = float(nm.max(nm.abs(values - frozen)/nm.abs(frozen)))
+        return {"regressionError": error, "passed": error <= regressionTolerance}
+    size = regressionLayers["size"]
+    L = nm.array([float(_Designed(size[0], size[1], n, 0.3, 0.5, regressionLayers["layers"]).L)
+                  for n in range(1,len(regressionLayers["L"])+1)])
+    accuracy["30x40 2 layers"] = dict(L = L.tolist(), **Regression(L, regressionLayers["L"]))
+    readAnt = _Designed(80,60,4,0.3,1)
+    testAnt = _Designed(30,40,4,0.3,0.5,2)
+    K = nm.array([float(readAnt.K(testAnt,z,x,y)) for x, y, z in regressionCoupling["offsets"]])
+    accuracy["K"] = dict(K = K.tolist(), **Regression(K, regressionCoupling["K"]))
+    return accuracy
+
+#times every hot path, quick cuts the sizes down for a fast sanity check
+def RunBenchmarks(quick = False, repeat = 3):
+    results = []
+    def Record(name, function, repeat = repeat, **info):
+        best, mean = _Time(function, repeat)
+        info.update({"name": name, "seconds": best, "mean": mean, "repeat": repeat})
+        results.append(info)
+        log.info(name.ljust(40) + "{0:10.4f} s".format(best))
+
+    #single trace pair, the innermost kernel
+    traceA = Trace([0,0,0],[30,0,0],0.5,AntennaModule.conductor_thickness)
+    traceB = Trace([0,1,0],[30,1,0],0.5,AntennaModule.conductor_thickness)
+    calls = 100 if quick else 1000
+    Record("Trace.MutualInductance", lambda: [traceA.MutualInductance(traceB) for n in range(0,calls)],
+           calls = calls)
+
+    #designing coils of different sizes
+    turnCounts = [1,4] if quick else [1,4,8,12]
+    for layers in (1,2):
+        for turns in turnCounts:
+            Record("DesignAntenna " + str(turns) + " turns " + str(layers) + " layers",
+                   lambda: _Designed(50,60,turns,0.15,1.9,layers), turns = turns, layers = layers)
+
+    #reader to tag coupling
+    readAnt = _Designed(80,60,4,0.3,1)
+    testAnt = _Designed(30,40,4,0.3,0.5,2)
+    testAnt.Q = Main.GetQ(testAnt.L,testAnt.R)
+    Record("Antenna.Mutual", lambda: readAnt.Mutual(testAnt,20,40,30))
+    Record("Antenna.K", lambda: readAnt.K(testAnt,20,40,30))
+
+    #offset maps and a small sweep write to Output/, keep that out of the way
+    home = os.getcwd()
+    work = tempfile.mkdtemp()
+    os.makedirs(os.path.join(work,"Output","scr"))
+    os.chdir(work)
+    try:
+        steps = [10] if quick else [10,5,2.5]
+        for step in steps:
+            Record("offsetMap step " + str(step) + "mm",
+                   lambda: Main.offsetMap(readAnt,testAnt,[-30,-40],[110,100],step),
+                   step = step)
+
+        def Sweep():
+            with contextlib.redirect_stdout(io.StringIO()):
+                Main.Iterate([10,20,10],[10,20,10],[1,4 if quick else 6],[0.5,1.5,0.5],
+                             1 if quick else 2, cache = None, checkpoint = None, plot = False,
+                             resultPath = tempfile.mkdtemp(dir = work))
+        Record("Iterate (reduced)", Sweep, repeat = 1)
+    finally:
+        os.chdir(home)
+
+    return results
+
+#runs everything and writes the json report to output, returns the report
+def Benchmark(output = None, quick = False, repeat = 3):
+    accuracy = CheckAccuracy()
+    report = {"time": time.strftime("%Y-%m-%d %H:%M:%S"),
+              "python": platform.python_version(),
+              "numpy": nm.__version__,
+              "machine": platform.machine(),
+              "precision": nm.dtype(AntennaModule.precision).name,
+              "quick": quick,
+              "results": RunBenchmarks(quick, repeat),
+              "accuracy": accuracy,
+              "passed": all(check["passed"] for check in accuracy.values())}
+    for name, check in accuracy.items():
+        message = (name + ("" if "referenceError" not in check else
+                           " reference error " + "{0:.3f}".format(check["referenceError"])) +
+                   " regression error " + "{0:.2e}".format(check["regressionError"]))
+        if(check["passed"]):
+            log.info(message + " ok")
+        else:
+            log.error(message + " FAILED")
+
+    if(output is None):
+        output = "Output/bench" + time.strftime("%d_%m_%Y-%H_%M_%S") + ".json"
+    with open(output, "w") as outputFile:
+        json.dump(report, outputFile, indent=1)
+    return report
+
+if __name__ == "__main__":
+    Instrument.ConfigureLogging()
+    report = Benchmark(quick = "--quick" in sys.argv)
+    sys.exit(0 if report["passed"] else 1)
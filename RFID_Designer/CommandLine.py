@@ -0,0 +1,214 @@
+##########################################
+#Command line for the designer
+#python RFID_Designer <sweep|optimize|map|export|bench> ... (or python CommandLine.py ...)
+#only argparse is imported up front, every subcommand pulls in just the modules
+#it needs when it runs so a short job like exporting one script starts quickly
+#and nothing ever touches matplotlib unless it's plotting
+##########################################
+import argparse
+import sys
+import os
+
+#reader antenna everything is tested against, same as Main.Iterate
+defaultReader = [80,60,4,0.3,1]
+
+def _Logging(level):
+    import Instrument
+    import logging
+    Instrument.ConfigureLogging(getattr(logging, level))
+
+#matplotlib without a window, plots only ever go to files from here
+def _Headless():
+    import matplotlib
+    matplotlib.use("Agg")
+
+def _Reader(values):
+    from Antenna import Antenna
+    readAnt = Antenna(values[0],values[1],int(values[2]),values[3],values[4])
+    readAnt.DesignAntenna()
+    return readAnt
+
+def Sweep(args):
+    import Main
+    if(args.plot):
+        _Headless()
+    Main.Iterate(args.width, args.length, [int(n) for n in args.turns], args.trace_width,
+                 args.layers, workers = args.workers,
+                 cache = None if args.no_cache else args.cache,
+                 resultPath = args.result_path,
+                 checkpoint = None if args.no_checkpoint else args.checkpoint,
+                 plot = args.plot, plotWorkers = args.workers,
+                 profile = args.profile if args.profile is not None else False,
+                 screen = args.screen, screenMargin = args.screen_margin,
+                 screenValidate = args.screen_validate)
+
+def Optimize(args):
+    import Main
+    Main.OptimizeSweep(args.width, args.length, [int(n) for n in args.turns], args.layers,
+                       args.objective, args.tol, args.gap, args.workers, args.result_path)
+
+def Map(args):
+    import Antenna as AntennaModule
+    import Main
+    readAnt = _Reader(args.reader)
+    testAnt = AntennaModule.Antenna(args.tag[0],args.tag[1],int(args.tag[2]),args.tag[3],args.tag[4])
+    if(testAnt.DesignAntenna(int(args.tag[5])) == -1):
+        print("invalid tag design", file=sys.stderr)
+        return 1
+    testAnt.Q = Main.GetQ(testAnt.L,testAnt.R)
+    if(args.far_field is not None):
+        AntennaModule.UseFarField(args.far_field)
+
+    figure = -1
+    if(args.plot is not None):
+        _Headless()
+        figure = 1
+    if(args.pose):
+        Main.poseMap(readAnt,testAnt,args.min,args.max,args.step,figure,args.z,
+                     args.offset[0],args.offset[1],args.z_angle,not args.unsigned)
+    elif(args.adaptive):
+        Main.AdaptiveOffsetMap(readAnt,testAnt,args.min,args.max,args.step,
+                               tolerance = args.tolerance,figure = figure,zOffset = args.z)
+    else:
+        Main.offsetMap(readAnt,testAnt,args.min,args.max,args.step,figure,args.z,
+                       symmetry = not args.no_symmetry)
+    if(args.plot is not None):
+        Main.SavePlotToFile(args.plot)
+
+#designs listed like AntennaDesigns.txt/TheBest.txt, w= l= n= g= w= N= ... per line,
+#the first six numbers are width, length, turns, gap, trace width and layers
+def ReadDesigns(fileName):
+    import re
+    designs = []
+    with open(fileName, "r") as designFile:
+        for line in designFile:
+            values = re.sub("[a-zA-Z]+(=)", " ", line).split()
+            if(len(values) >= 6):
+                values = [float(value) for value in values[:6]]
+                designs.append(values[:2] + [int(values[2])] + values[3:5] + [int(values[5])])
+    return designs
+
+def Export(args):
+    import Export
+    designs = [design[:2] + [int(design[2])] + design[3:5] + [int(design[5])]
+               for design in args.design or []]
+    if(args.designs is not None):
+        designs += ReadDesigns(args.designs)
+    if(args.results is not None):
+        from ResultStore import ResultReader
+        rows = ResultReader(args.results).All()
+        designs += list(Export.Pareto(rows) if args.pareto else rows)
+    written = Export.ExportDesigns(designs, args.format, "Output", args.name, args.archive,
+                                   rounded = not args.square, workers = args.workers)
+    print(str(len(written)) + " files written" +
+          ("" if args.archive is None else " to " + args.archive))
+
+def Bench(args):
+    import Benchmark
+    report = Benchmark.Benchmark(args.output, args.quick, args.repeat)
+    return 0 if report["passed"] else 1
+
+def Parser():
+    parser = argparse.ArgumentParser(prog="RFID_Designer",
+                                     description="NFC/RFID tag antenna designer")
+    parser.add_argument("--log-level", default="INFO",
+                        choices=["DEBUG","INFO","WARNING","ERROR"])
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+
+    sweep = commands.add_parser("sweep", help="sweep tag designs against the reader (Main.Iterate)")
+    sweep.add_argument("--width", type=float, nargs=3, default=[10,45,5], metavar=("START","STOP","STEP"))
+    sweep.add_argument("--length", type=float, nargs=3, default=[8,9,1], metavar=("START","STOP","STEP"))
+    sweep.add_argument("--turns", type=float, nargs=2, default=[1,11], metavar=("START","STOP"))
+    sweep.add_argument("--trace-width", type=float, nargs=3, default=[0.15,1.65,0.1],
+                       metavar=("START","STOP","STEP"))
+    sweep.add_argument("--layers", type=int, default=1)
+    sweep.add_argument("--workers", type=int, default=1)
+    sweep.add_argument("--result-path", default=None)
+    sweep.add_argument("--cache", default="Output/cache")
+    sweep.add_argument("--no-cache", action="store_true")
+    sweep.add_argument("--checkpoint", default="Output/Iterate.checkpoint")
+    sweep.add_argument("--no-checkpoint", action="store_true")
+    sweep.add_argument("--plot", action="store_true", help="write the per cell plots")
+    sweep.add_argument("--screen", type=int, default=None,
+                       help="only work out the best SCREEN designs of each cell by the surrogate")
+    sweep.add_argument("--screen-margin", type=float, default=None, metavar="MARGIN",
+                       help="with --screen, also work out anything within MARGIN (relative) of the best")
+    sweep.add_argument("--screen-validate", action="store_true",
+                       help="with --screen, work everything out anyway and log how well the shortlist did")
+    sweep.add_argument("--profile", nargs="?", const=True, default=None, metavar="JSON",
+                       help="print the stage timings, and write them to JSON if given")
+    sweep.set_defaults(run=Sweep)
+
+    optimize = commands.add_parser("optimize",
+                                   help="best trace width (and gap) of every tag size (Main.OptimizeSweep)")
+    optimize.add_argument("--width", type=float, nargs=3, default=[10,45,5], metavar=("START","STOP","STEP"))
+    optimize.add_argument("--length", type=float, nargs=3, default=[8,9,1], metavar=("START","STOP","STEP"))
+    optimize.add_argument("--turns", type=float, nargs=2, default=[1,11], metavar=("START","STOP"))
+    optimize.add_argument("--layers", type=int, default=1)
+    optimize.add_argument("--objective", default="R_t", choices=["R_t","K"])
+    optimize.add_argument("--tol", type=float, default=0.01, help="how close (mm) the optimum has to be")
+    optimize.add_argument("--gap", type=float, default=None,
+                          help="keep the gap fixed and only search the trace width")
+    optimize.add_argument("--workers", type=int, default=1)
+    optimize.add_argument("--result-path", default=None)
+    optimize.set_defaults(run=Optimize)
+
+    offsetMap = commands.add_parser("map", help="R_t over tag offsets (Main.offsetMap)")
+    offsetMap.add_argument("--reader", type=float, nargs=5, default=defaultReader,
+                           metavar=("WIDTH","LENGTH","TURNS","GAP","TRACE"))
+    offsetMap.add_argument("--tag", type=float, nargs=6, required=True,
+                           metavar=("WIDTH","LENGTH","TURNS","GAP","TRACE","LAYERS"))
+    offsetMap.add_argument("--min", type=float, nargs=2, default=[-30,-40], metavar=("X","Y"))
+    offsetMap.add_argument("--max", type=float, nargs=2, default=[110,100], metavar=("X","Y"))
+    offsetMap.add_argument("--step", type=float, default=10)
+    offsetMap.add_argument("--z", type=float, default=20)
+    offsetMap.add_argument("--adaptive", action="store_true", help="use Main.AdaptiveOffsetMap")
+    offsetMap.add_argument("--tolerance", type=float, default=0.01)
+    offsetMap.add_argument("--far-field", type=float, default=None, metavar="MULTIPLE")
+    offsetMap.add_argument("--no-symmetry", action="store_true",
+                           help="work out every point even when the coupling is symmetric")
+    offsetMap.add_argument("--pose", action="store_true",
+                           help="map tilt about x/y instead, --min/--max/--step are in degrees (Main.poseMap), "
+                                "the pose model has its own untilted baseline, it isn't comparable to a plain map")
+    offsetMap.add_argument("--offset", type=float, nargs=2, default=[0,0], metavar=("X","Y"),
+                           help="where the tag sits for --pose")
+    offsetMap.add_argument("--z-angle", type=float, default=0, help="turn about z for --pose")
+    offsetMap.add_argument("--unsigned", action="store_true",
+                           help="sum the trace pairs for --pose unsigned like a plain map does")
+    offsetMap.add_argument("--plot", default=None, metavar="PDF")
+    offsetMap.set_defaults(run=Map)
+
+    export = commands.add_parser("export", help="write CAD files of designs to Output/ (Export.py)")
+    export.add_argument("--design", type=float, nargs=6, action="append",
+                        metavar=("WIDTH","LENGTH","TURNS","GAP","TRACE","LAYERS"))
+    export.add_argument("--designs", default=None, metavar="FILE",
+                        help="designs listed like AntennaDesigns.txt")
+    export.add_argument("--results", default=None, metavar="FOLDER",
+                        help="every design in a sweep's result store")
+    export.add_argument("--pareto", action="store_true",
+                        help="only the designs of --results no other beats on both R_t and K")
+    export.add_argument("--format", nargs="+", default=["scr"], choices=["scr","svg","dxf","kicad"])
+    export.add_argument("--archive", default=None, metavar="ZIP",
+                        help="write everything into one zip instead of loose files")
+    export.add_argument("--workers", type=int, default=1)
+    export.add_argument("--name", default="scr/Best")
+    export.add_argument("--square", action="store_true", help="square corners (GenerateEagle)")
+    export.set_defaults(run=Export)
+
+    bench = commands.add_parser("bench", help="run the benchmarks (Benchmark.Benchmark)")
+    bench.add_argument("--quick", action="store_true")
+    bench.add_argument("--repeat", type=int, default=3)
+    bench.add_argument("--output", default=None)
+    bench.set_defaults(run=Bench)
+    return parser
+
+def Run(argv = None):
+    args = Parser().parse_args(argv)
+    _Logging(args.log_level)
+    #everything writes into Output/ under wherever it's run from
+    os.makedirs("Output", exist_ok=True)
+    return args.run(args) or 0
+
+if __name__ == "__main__":
+    sys.exit(Run())
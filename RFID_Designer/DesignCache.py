@@ -0,0 +1,107 @@
+##########################################
+#On disk cache of designed antennas
+#every design is stored as an .npz named after a hash of everything that goes
+#into designing it, so the same antenna is only ever solved once
+##########################################
+import numpy as nm
+import Instrument
+import hashlib
+import os
+
+#bump this whenever the way antennas are calculated or stored changes, old entries are
+#ignored
+cacheVersion = 2
+
+class DesignCache:
+    #path is the folder holding the entries, maxBytes bounds the size of the folder
+    #the least recently used entries are removed first when it gets too big
+    def __init__(self, path = "Output/cache", maxBytes = 256*1024*1024):
+        self.path = path
+        self.maxBytes = maxBytes
+        self.hits = 0
+        self.misses = 0
+        #estimated size of the folder, worked out on the first write
+        self._size = None
+        os.makedirs(self.path, exist_ok=True)
+
+    #hash all the parameters of a design into a file name
+    def Key(self, *parameters):
+        text = repr((cacheVersion,) + tuple(float(p) for p in parameters))
+        return hashlib.sha1(text.encode("ascii")).hexdigest()
+
+    def _File(self, key):
+        return os.path.join(self.path, key + ".npz")
+
+    #returns the stored arrays for key or None if it isn't in the cache
+    def Get(self, key):
+        fileName = self._File(key)
+        try:
+            with Instrument.Stage("design cache read"), nm.load(fileName) as data:
+                entry = {name: data[name] for name in data.files}
+        except (OSError, ValueError, EOFError):
+            self.misses += 1
+            return None
+        #mark it as recently used
+        try:
+            os.utime(fileName)
+        except OSError:
+            pass
+        self.hits += 1
+        return entry
+
+    #store a dictionary of arrays under key
+    def Put(self, key, entry):
+        fileName = self._File(key)
+        #write to a temporary file first so other processes never see half an entry
+        temp = fileName + "." + str(os.getpid()) + ".tmp"
+        with Instrument.Stage("design cache write"):
+            with open(temp, "wb") as output:
+                nm.savez(output, **entry)
+            os.replace(temp, fileName)
+
+        if(self._size is None):
+            self._size = self._Scan()[1]
+        else:
+            self._size += os.path.getsize(fileName)
+        if(self._size > self.maxBytes):
+            self.Evict()
+
+    #all the entries oldest first and the total size of them
+    def _Scan(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.path):
+            if(not name.endswith(".npz")):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.path, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+            total += stat.st_size
+        entries.sort()
+        return entries, total
+
+    #remove the least recently used entries until the cache fits in maxBytes
+    def Evict(self):
+        entries, total = self._Scan()
+        for mtime, size, name in entries:
+            if(total <= self.maxBytes):
+                break
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                pass
+            total -= size
+        self._size = total
+
+    def Clear(self):
+        for mtime, size, name in self._Scan()[0]:
+            os.remove(os.path.join(self.path, name))
+        self._size = 0
+
+    def Report(self):
+        lookups = self.hits + self.misses
+        rate = 100*self.hits/lookups if lookups else 0
+        return ("design cache: " + str(self.hits) + " hits, " + str(self.misses) +
+                " misses (" + "{0:.1f}".format(rate) + "%)")
@@ -0,0 +1,282 @@
+##########################################
+#Batch export of antenna designs to CAD files
+#every design goes through one geometry pass (wires and arcs per layer) that all the
+#writers share, each file is built up in memory and written in one go, either as
+#loose files or into a single zip, and big batches can be spread over a process pool
+#the writers are pluggable, anything with an extension and Write(geometry) -> text
+#can go in writers
+##########################################
+from Antenna import Antenna, num2str
+import numpy as nm
+import Instrument
+import multiprocessing
+import zipfile
+import os
+
+#the outline of one design, primitives are
+#("wire", layer, width, x0, y0, x1, y1), a straight trace from (x0, y0) to (x1, y1)
+#("arc", layer, width, x0, y0, x1, y1), half a circle counter clockwise from (x0, y0)
+#to (x1, y1) with the two as the ends of its diameter
+#layer 0 is the top, everything in mm
+class Geometry:
+    def __init__(self, name, signal, width, length, layers, primitives):
+        self.name = name
+        #the net the traces are drawn on in Eagle
+        self.signal = signal
+        self.width = width
+        self.length = length
+        self.layers = layers
+        self.primitives = primitives
+
+#straight traces, the same ones Antenna.DesignAntenna lays out
+def SquareGeometry(antenna, name):
+    traces = antenna.traces
+    if(len(traces) == 0):
+        #not designed yet, the traces are all that's needed, not the inductance
+        starts = []
+        stops = []
+        layers = []
+        for n in range(0,max(antenna.layer,1)):
+            start, stop = antenna.TurnTraces(nm.arange(0,antenna.turns), 0.075*n, nm.power(-1,n))
+            starts.append(start)
+            stops.append(stop)
+            layers.append(nm.full(len(start), n))
+        start = nm.concatenate(starts)
+        stop = nm.concatenate(stops)
+        layer = nm.concatenate(layers)
+        width = nm.full(len(start), antenna.trace_Width)
+    else:
+        start = traces.start
+        stop = traces.stop
+        #layers are stacked up in z, one per height
+        layer = nm.unique(start[:,2], return_inverse=True)[1].reshape(-1)
+        width = traces.width*10
+    primitives = [("wire", int(layer[i]), width[i], start[i,0], start[i,1], stop[i,0], stop[i,1])
+                  for i in range(0,len(start))]
+    return Geometry(name, "antenna", antenna.width, antenna.length,
+                    int(nm.max(layer)) + 1 if len(layer) else 1, primitives)
+
+#round topped spiral of Antenna.GenerateRoundEagle, each turn is a left and right side,
+#a half circle across the top and a bottom, the second layer (if there is one) mirrored
+def RoundGeometry(antenna, name):
+    delta = antenna.trace_Width + antenna.gap
+    width = antenna.width
+    length = antenna.length
+    t = antenna.trace_Width
+    primitives = []
+    for n in range(0,antenna.turns):
+        #radius of the top
+        arc = nm.abs(((delta*n) - (width - delta*n))/2)
+        top = length - delta*n - arc
+        primitives += [("wire", 0, t, delta*n, delta*(n-1), delta*n, top),
+                       ("arc", 0, t, width - delta*n, top, delta*n, top),
+                       ("wire", 0, t, width - delta*n, delta*n, width - delta*n, top),
+                       ("wire", 0, t, width - delta*n, delta*n, delta*(n+1), delta*n)]
+    if(antenna.layer > 1):
+        for n in range(0,antenna.turns):
+            arc = nm.abs(((delta*n) - (width - delta*n))/2)
+            top = length - delta*n - arc
+            primitives += [("wire", 1, t, delta*n, delta*n, delta*n, top),
+                           ("arc", 1, t, width - delta*n, top, delta*n, top),
+                           ("wire", 1, t, width - delta*n, delta*(n-1), width - delta*n, top),
+                           ("wire", 1, t, width - delta*(n+1), delta*n, delta*n, delta*n)]
+    return Geometry(name, name, width, length, 2 if antenna.layer > 1 else 1, primitives)
+
+#Eagle script, run it in the board editor
+class EagleWriter:
+    extension = "scr"
+    #Eagle layer of each design layer, anything under the top goes on the bottom
+    layers = [1, 16]
+
+    def Write(self, geometry):
+        lines = ["GRID MM \n", "LAYER 1 \n"]
+        layer = 0
+        for primitive in geometry.primitives:
+            kind, primitiveLayer, width, x0, y0, x1, y1 = primitive
+            if(primitiveLayer != layer):
+                layer = primitiveLayer
+                lines.append("LAYER " + str(self.layers[min(layer,1)]) + " \n")
+            if(kind == "wire"):
+                lines.append("WIRE " + num2str(width) + " '" + geometry.signal + "' ( " +
+                             num2str(x0) + " " + num2str(y0) + " ) ( " +
+                             num2str(x1) + " " + num2str(y1) + " ); \n")
+            else:
+                lines.append("ARC '" + geometry.signal + "' CCW (" + num2str(x0) + " " +
+                             num2str(y0) + ") (" + num2str(x1) + " " + num2str(y1) + ") (" +
+                             num2str(x1) + " " + num2str(y1) + "); \n")
+        return "".join(lines)
+
+#SVG drawing, one group per layer, y points up like the board
+class SvgWriter:
+    extension = "svg"
+    colours = ["#c83737", "#3737c8"]
+
+    def Write(self, geometry):
+        margin = 1 + max([primitive[2] for primitive in geometry.primitives] or [0])
+        height = geometry.length
+        def Point(x, y):
+            return num2str(x) + " " + num2str(height - y)
+        lines = ['<svg xmlns="http://www.w3.org/2000/svg" viewBox="' + num2str(-margin) + " " +
+                 num2str(-margin) + " " + num2str(geometry.width + 2*margin) + " " +
+                 num2str(height + 2*margin) + '" width="' + num2str(geometry.width + 2*margin) +
+                 'mm" height="' + num2str(height + 2*margin) + 'mm">\n',
+                 "<title>" + geometry.name + "</title>\n"]
+        for layer in range(0,geometry.layers):
+            lines.append('<g fill="none" stroke="' + self.colours[min(layer,1)] +
+                         '" stroke-linecap="round" opacity="0.8">\n')
+            for kind, primitiveLayer, width, x0, y0, x1, y1 in geometry.primitives:
+                if(primitiveLayer != layer):
+                    continue
+                if(kind == "wire"):
+                    path = "M " + Point(x0, y0) + " L " + Point(x1, y1)
+                else:
+                    #counter clockwise on the board is sweep flag 0 once y is flipped
+                    radius = num2str(nm.hypot(x1 - x0, y1 - y0)/2)
+                    path = ("M " + Point(x0, y0) + " A " + radius + " " + radius +
+                            " 0 0 0 " + Point(x1, y1))
+                lines.append('<path d="' + path + '" stroke-width="' + num2str(width) + '"/>\n')
+            lines.append("</g>\n")
+        lines.append("</svg>\n")
+        return "".join(lines)
+
+#DXF (R12) drawing, every trace is a polyline with the trace width so the arcs are
+#bulges of 1 (half circles), layers TOP and BOTTOM
+class DxfWriter:
+    extension = "dxf"
+    layers = ["TOP", "BOTTOM"]
+
+    def Write(self, geometry):
+        lines = ["0\nSECTION\n2\nENTITIES\n"]
+        for kind, layer, width, x0, y0, x1, y1 in geometry.primitives:
+            name = self.layers[min(layer,1)]
+            lines.append("0\nPOLYLINE\n8\n" + name + "\n66\n1\n10\n0.0\n20\n0.0\n30\n0.0\n40\n" +
+                         num2str(width) + "\n41\n" + num2str(width) + "\n")
+            bulge = "42\n1.0\n" if kind == "arc" else ""
+            lines.append("0\nVERTEX\n8\n" + name + "\n10\n" + num2str(x0) + "\n20\n" +
+                         num2str(y0) + "\n30\n0.0\n" + bulge)
+            lines.append("0\nVERTEX\n8\n" + name + "\n10\n" + num2str(x1) + "\n20\n" +
+                         num2str(y1) + "\n30\n0.0\n")
+            lines.append("0\nSEQEND\n8\n" + name + "\n")
+        lines.append("0\nENDSEC\n0\nEOF\n")
+        return "".join(lines)
+
+#KiCad footprint (.kicad_mod), copper lines and arcs on F.Cu/B.Cu, y points down in KiCad
+class KicadWriter:
+    extension = "kicad_mod"
+    layers = ["F.Cu", "B.Cu"]
+
+    def Write(self, geometry):
+        def Point(x, y):
+            return num2str(x) + " " + num2str(0 - y)
+        name = os.path.basename(geometry.name)
+        lines = ['(footprint "' + name + '" (version 20211014) (generator RFID_Designer)\n',
+                 '  (layer "F.Cu")\n',
+                 '  (fp_text reference "REF**" (at 0 1) (layer "F.SilkS") hide\n',
+                 '    (effects (font (size 1 1) (thickness 0.15))))\n',
+                 '  (fp_text value "' + name + '" (at 0 2) (layer "F.Fab") hide\n',
+                 '    (effects (font (size 1 1) (thickness 0.15))))\n']
+        for kind, layer, width, x0, y0, x1, y1 in geometry.primitives:
+            stroke = ' (stroke (width ' + num2str(width) + ') (type solid)) (layer "' + self.layers[min(layer,1)] + '"))\n'
+            if(kind == "wire"):
+                lines.append("  (fp_line (start " + Point(x0, y0) + ") (end " + Point(x1, y1) + ")" + stroke)
+            else:
+                #a quarter turn counter clockwise from the start around the middle
+                middle = ((x0 + x1)/2 + (y1 - y0)/2, (y0 + y1)/2 + (x0 - x1)/2)
+                lines.append("  (fp_arc (start " + Point(x0, y0) + ") (mid " + Point(*middle) +
+                             ") (end " + Point(x1, y1) + ")" + stroke)
+        lines.append(")\n")
+        return "".join(lines)
+
+#every writer, keyed by the name used to ask for it
+writers = {"scr": EagleWriter(), "svg": SvgWriter(), "dxf": DxfWriter(), "kicad": KicadWriter()}
+
+#(width, length, turns, gap, trace width, layers) of an Antenna, a tuple of them or a
+#row of a ResultStore
+def DesignTuple(design):
+    if(isinstance(design, Antenna)):
+        return (design.width, design.length, design.turns, design.gap,
+                design.trace_Width, design.layer)
+    if(isinstance(design, nm.void)):
+        return (float(design["width"]), float(design["length"]), int(design["turns"]),
+                float(design["gap"]), float(design["traceWidth"]), int(design["layers"]))
+    return tuple(design)
+
+#the rows of a ResultStore (or any structured array of them) that no other row beats
+#on both fields, bigger is better
+def Pareto(rows, fields = ("R_t", "K")):
+    rows = rows[nm.isfinite(rows[fields[0]]) & nm.isfinite(rows[fields[1]])]
+    order = nm.lexsort((-rows[fields[1]], -rows[fields[0]]))
+    rows = rows[order]
+    #best so far on the second field going down the first
+    best = nm.maximum.accumulate(rows[fields[1]])
+    keep = nm.ones(len(rows), dtype=bool)
+    keep[1:] = rows[fields[1]][1:] > best[:-1]
+    return rows[keep]
+
+#file name (without extension) and text of every format of one design,
+#job is (index, design tuple, formats, rounded, name)
+def _Render(job):
+    index, design, formats, rounded, name = job
+    antenna = Antenna(design[0], design[1], int(design[2]), design[3], design[4])
+    antenna.layer = int(design[5])
+    fileName = (name + str(antenna.width) + "x" + str(antenna.length) + "x" +
+                str(antenna.layer) + "_" + str(index))
+    if(rounded):
+        geometry = RoundGeometry(antenna, fileName)
+    else:
+        geometry = SquareGeometry(antenna, fileName)
+    return [(fileName + "." + writers[form].extension, writers[form].Write(geometry))
+            for form in formats]
+
+#write every design out in every one of formats (keys of writers), named name + the
+#size + _index under folder like Iterate always has, or into the zip archive instead
+#rounded picks the round topped layout (GenerateRoundEagle) over the straight traces
+#designs are Antennas, (width, length, turns, gap, trace width, layers) tuples or
+#ResultStore rows, workers > 1 renders them in a process pool
+#returns the names of everything written
+def ExportDesigns(designs, formats = ("scr",), folder = "Output", name = "scr/Best",
+                  archive = None, rounded = True, workers = 1, chunksize = 16):
+    jobs = [(index, DesignTuple(design), tuple(formats), rounded, name)
+            for index, design in enumerate(designs)]
+    written = []
+    with Instrument.Stage("export"):
+        if(workers > 1 and len(jobs) > 1):
+            pool = multiprocessing.Pool(workers)
+            rendered = pool.imap(_Render, jobs, chunksize)
+        else:
+            pool = None
+            rendered = map(_Render, jobs)
+
+        if(archive is not None):
+            os.makedirs(os.path.dirname(archive) or ".", exist_ok=True)
+            output = zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED)
+        try:
+            for files in rendered:
+                for fileName, text in files:
+                    if(archive is not None):
+                        output.writestr(fileName, text)
+                    else:
+                        path = os.path.join(folder, fileName)
+                        os.makedirs(os.path.dirname(path), exist_ok=True)
+                        with open(path, "w") as outputFile:
+                            outputFile.write(text)
+                    written.append(fileName)
+        finally:
+            if(archive is not None):
+                output.close()
+            #everything's been rendered unless something went wrong, then the rest isn't needed
+            if(pool is not None):
+                pool.terminate()
+                pool.join()
+    Instrument.Count("exported files", len(written))
+    return written
+
+#one design straight to Output/name.<extension>, what Antenna.GenerateEagle and
+#GenerateRoundEagle do
+def Save(antenna, name, rounded = False, form = "scr"):
+    if(rounded):
+        geometry = RoundGeometry(antenna, name)
+    else:
+        geometry = SquareGeometry(antenna, name)
+    with open("Output/" + str(name) + "." + writers[form].extension, "w") as output:
+        output.write(writers[form].Write(geometry))
@@ -0,0 +1,196 @@
+##########################################
+#Frequency response of designed antennas
+#the PEEC solve only gives L and the DC resistance, this works out how R, Q and R_t
+#move with frequency around them, everything broadcasts so a whole band of frequencies,
+#loads and designs is one numpy computation with L and the geometry reused for all of it
+#resistance: skin effect across the thickness of a planar trace (Yue & Wong) times the
+#current crowding across its width from its own field and that of the other turns
+#(proximity effect), worked out by splitting the turns into filaments and solving for the
+#current in each (Weeks et al., "Resistive and inductive skin effect in rectangular
+#conductors", IBM J. Res. Dev. 23(6), 1979), that holds well past the ~1MHz the crowding
+#starts at for these traces, where Kuhn & Ibrahim's 1 + (f/f_crit)^2/10 ("Analysis of
+#current crowding effects in multiturn spiral inductors", 2001) only holds up to f_crit
+#self resonance: turn to turn capacitance of coplanar strips (Hilberg's approximation of
+#the elliptic integrals) plus the overlap between layers, both weighted by the voltage
+#across them, the capacitance across the coil scales both L and R up towards f_self
+#frequencies are in MHz, sizes in mm, L in uH and C in pF like everywhere else
+##########################################
+import numpy as nm
+import functools
+import Antenna as AntennaModule
+import Main
+
+#permeability of free space (H/m) and permittivity (pF/mm)
+mu_0 = 4e-7*nm.pi
+epsilon_0 = 8.854e-3
+#relative permittivity of the board the antenna sits on, FR4
+permittivity = 4.3
+#frequency the tag is tuned to with its capacitor
+f_0 = Main.w_0/(2*nm.pi)
+
+#depth (mm) the current gets into the copper at f (MHz), inf at DC
+def SkinDepth(f):
+    rho = AntennaModule.resistivity*1e-3
+    with nm.errstate(divide="ignore"):
+        return 1e3*nm.sqrt(rho/(nm.pi*nm.asarray(f, dtype=float)*1e6*mu_0)).astype(float)
+
+#AC over DC resistance of a trace thickness (mm) thick, current only in the skin of it
+#R = rho*l/(w*delta*(1 - e^(-t/delta))), 1 at DC
+def SkinFactor(f, thickness = AntennaModule.conductor_thickness):
+    ratio = thickness/SkinDepth(f)
+    with nm.errstate(invalid="ignore"):
+        return nm.where(ratio > 0, ratio/-nm.expm1(-ratio), 1.0)
+
+#filaments every trace is split into across its width for ProximityFactor, narrower
+#towards the edges where the current crowds, the narrowest is W*(1 - cos(pi/n))/2 wide
+#and has to stay under the skin depth, 24 is within ~2% of twice as many up to 30MHz
+proximityFilaments = 24
+
+#one side of a width x length spiral in cross section, per unit length, the turns*layers
+#traces split into filaments and the opposite side span (mm) away carrying the current back
+#with R and L the filament resistances and inductances (ln of the distances, the
+#geometric mean distance of the filament for its own), R^-1/2 L R^-1/2 = U lam U^T and
+#G is R^-1/2 U added up over the filaments of every trace, so the trace voltages for the
+#same current through every trace at any w come from G diag(1/(1 + j w lam)) G^T V = 1
+#returns G, lam (s) and the DC resistance of the traces added up
+@functools.lru_cache(maxsize=256)
+def _CrossSection(span, traceWidth, gap, turns, layers, spacing, thickness, filaments):
+    rho = float(AntennaModule.resistivity)*1e-3
+    edges = traceWidth/2*(1 - nm.cos(nm.pi*nm.arange(filaments+1)/filaments))
+    #every filament of every trace in m, outside turn first
+    x = (nm.arange(turns)[:,None]*(traceWidth + gap) + (edges[:-1] + edges[1:])[None,:]/2)
+    x = nm.tile(x.reshape(-1), layers)*1e-3
+    z = nm.repeat(nm.arange(layers)*(spacing + thickness), turns*filaments)*1e-3
+    w = nm.tile(nm.diff(edges), turns*layers)*1e-3
+    t = thickness*1e-3
+    distance = nm.hypot(x[:,None] - x[None,:], z[:,None] - z[None,:])
+    distance[nm.diag_indices(len(x))] = 0.2235*(w + t)
+    image = nm.hypot(span*1e-3 - x[:,None] - x[None,:], z[:,None] - z[None,:])
+    L = mu_0/(2*nm.pi)*nm.log(image/distance)
+    scale = nm.sqrt(w*t/rho)
+    lam, U = nm.linalg.eigh(scale[:,None]*L*scale[None,:])
+    G = nm.add.reduceat(scale[:,None]*U, nm.arange(0,len(x),filaments), axis=0)
+    return G, lam, turns*layers*rho/(traceWidth*1e-3*t)
+
+#AC over DC resistance from the current crowding across the width of the traces of a
+#width x length (mm) spiral at f (MHz), the sides along y are width apart and the sides
+#along x length apart, each weighted by how long they are, the corners are left out
+#1 at DC, like (f/f_crit)^2 well below f_crit and like sqrt(f) well above it
+#everything broadcasts, the cross section is solved once for every different design
+def ProximityFactor(f, width, length, turns, gap, traceWidth, layers = 1, spacing = 0.075,
+                    thickness = AntennaModule.conductor_thickness):
+    f, width, length, turns, gap, traceWidth, layers = nm.broadcast_arrays(
+        *[nm.asarray(v, dtype=float) for v in (f, width, length, turns, gap, traceWidth, layers)])
+    designs, inverse = nm.unique(nm.stack([width, length, turns, gap, traceWidth, layers],
+                                          axis=-1).reshape(-1,6), axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    frequencies = f.reshape(-1)
+    factor = nm.empty(len(frequencies))
+    for n, (W, L, N, S, w, m) in enumerate(designs):
+        at = nm.nonzero(inverse == n)[0]
+        sides = 0
+        for span, side in ((W, L), (L, W)):
+            G, lam, R = _CrossSection(span, w, S, int(N), int(m), spacing, thickness,
+                                      proximityFilaments)
+            A = nm.einsum("ti,fi,ui->ftu", G, 1/(1 + 2j*nm.pi*1e6*frequencies[at,None]*lam), G)
+            V = nm.linalg.solve(A, nm.ones(A.shape[:-1] + (1,)))[...,0]
+            sides = sides + side*nm.sum(V.real, axis=-1)/R
+        factor[at] = sides/(W + L)
+    return factor.reshape(f.shape)
+
+#capacitance (pF/mm) between two coplanar traces gap apart, the fringing field through
+#the board and air (Hilberg's K(k')/K(k)) plus the sides of the copper facing each other
+def InterturnCapacitance(traceWidth, gap, thickness = AntennaModule.conductor_thickness):
+    traceWidth, gap = nm.asarray(traceWidth, dtype=float), nm.asarray(gap, dtype=float)
+    k = gap/(gap + 2*traceWidth)
+    kPrime = nm.sqrt(1 - nm.square(k))
+    def Ratio(x):
+        root = nm.sqrt(x)
+        return nm.log(2*(1 + root)/(1 - root))/nm.pi
+    small = k <= 1/nm.sqrt(2)
+    fringe = nm.where(small, Ratio(nm.where(small, kPrime, 0.5)),
+                      1/Ratio(nm.where(small, 0.5, k)))
+    return epsilon_0*((permittivity + 1)/2*fringe + thickness/gap)
+
+#self capacitance (pF) of a width x length (mm) spiral, from the energy stored between
+#neighbouring turns with V/(layers*turns) across each and between stacked layers
+#spacing (mm) apart where the difference goes from 2V/layers at the outside to 0
+def SelfCapacitance(width, length, turns, gap, traceWidth, layers = 1, spacing = 0.075,
+                    thickness = AntennaModule.conductor_thickness):
+    width, length, gap, traceWidth = [nm.asarray(v, dtype=float) for v in (width, length, gap, traceWidth)]
+    turns, layers = nm.asarray(turns), nm.asarray(layers)
+    pitch = gap + traceWidth
+    #perimeter of the outer turn and what every turn further in loses of it
+    perimeter = 2*(width + length) - 4*traceWidth
+    #turns - 1 facing pairs, each as long as the inner turn of the pair
+    pairs = nm.maximum(turns - 1, 0)
+    adjacent = pairs*perimeter - 8*pitch*pairs*(pairs + 1)/2
+    turnC = InterturnCapacitance(traceWidth, gap, thickness)*adjacent/(layers*nm.square(turns))
+    overlap = turns*perimeter - 8*pitch*turns*(turns - 1)/2
+    layerC = epsilon_0*permittivity*traceWidth*overlap/spacing
+    layerC = (layers - 1)*layerC*4/(3*nm.square(layers))
+    return turnC + layerC
+
+#self resonant frequency (MHz) of L (uH) with C (pF), inf without any capacitance
+def SelfResonance(L, C):
+    C = nm.asarray(C, dtype=float)
+    with nm.errstate(divide="ignore"):
+        return 1e3/(2*nm.pi*nm.sqrt(L*C))
+
+#response of designs with inductance L (uH) and DC resistance R at frequencies f (MHz)
+#into loads R_l, every argument broadcasts against the others
+#k and L_1 are the coupling to and inductance of the reader, for R_t
+#proximity is the ProximityFactor of the designs at f, 1 leaves the current crowding out
+#returns a dict of arrays: R and L (seen at the terminals with the self capacitance,
+#R/(1 - (f/f_self)^2)^2 and L/(1 - (f/f_self)^2)), Q, bandwidth (MHz) and f_self, plus
+#detuning (the fraction of the power left when the tag is tuned to tuning MHz) and R_t
+#when k and L_1 are given
+#past f_self the coil looks like a capacitor, L and Q come out negative there
+def Response(L, R, f, C = 0, R_l = Main.R_L, k = None, L_1 = None,
+             tuning = f_0, thickness = AntennaModule.conductor_thickness, proximity = 1):
+    f = nm.asarray(f, dtype=float)
+    result = {}
+    result["f_self"] = SelfResonance(L, C) + 0*f
+    resonance = 1 - nm.square(f/result["f_self"])
+    result["R"] = R*SkinFactor(f, thickness)*proximity/nm.square(resonance)
+    result["L"] = L/resonance
+    result["Q"] = Main.GetQ(result["L"], result["R"], R_l, f)
+    result["bandwidth"] = f/result["Q"]
+    detuning = f/tuning - tuning/f
+    result["detuning"] = 1/(1 + nm.square(result["Q"]*detuning))
+    if(k is not None and L_1 is not None):
+        result["R_t"] = Main.GetR_t(k, L_1, result["Q"], f)*result["detuning"]
+    return dict(zip(result, nm.broadcast_arrays(*result.values())))
+
+#Response of designed antennas over frequencies and loads, the arrays come back shaped
+#(len(frequencies), len(loads), len(designs))
+#couplings are the k of every design to the reader readAnt, for R_t
+def DesignResponse(designs, frequencies, loads = (Main.R_L,), couplings = None, readAnt = None,
+                   tuning = f_0, spacing = 0.075):
+    def Column(values):
+        return nm.asarray(values, dtype=float)[None,None,:]
+    L = Column([design.L for design in designs])
+    R = Column([design.R for design in designs])
+    width = Column([design.width for design in designs])
+    length = Column([design.length for design in designs])
+    turns = Column([design.turns for design in designs])
+    gap = Column([design.gap for design in designs])
+    traceWidth = Column([design.trace_Width for design in designs])
+    layers = Column([max(design.layer, 1) for design in designs])
+    C = SelfCapacitance(width, length, turns, gap, traceWidth, layers, spacing)
+    k = None if couplings is None else Column(couplings)
+    L_1 = None if readAnt is None else readAnt.L
+    f = nm.asarray(frequencies, dtype=float)[:,None,None]
+    proximity = ProximityFactor(f, width, length, turns, gap, traceWidth, layers, spacing)
+    return Response(L, R, f, C, nm.asarray(loads, dtype=float)[None,:,None], k, L_1, tuning,
+                    proximity = proximity)
+
+#resonant frequencies (MHz) of a stack of tags that are each tuned to tuning on their own,
+#from their Antenna.CouplingMatrix M (...,N,N), sorted low to high
+#with C_i = 1/(w_0^2 L_i) the loop equations come down to k v = (w_0/w)^2 v, so every
+#eigenvalue of the coupling coefficients gives one mode, nan for modes the model can't hold
+#a tag split far from tuning by its neighbours is what detunes and collides in a stack
+def StackModes(M, tuning = f_0):
+    k = AntennaModule.CouplingCoefficients(M)
+    with nm.errstate(invalid="ignore", divide="ignore"):
+        return nm.sort(tuning/nm.sqrt(nm.linalg.eigvalsh(k)), axis=-1)
@@ -0,0 +1,161 @@
+##########################################
+#Instrumentation for finding out where a run spends its time
+#counters and stage timers cost one global check while they're turned off,
+#Enable() them, do the run and get the summary with Report()/Summary()/WriteSummary()
+#everything that used to be printed goes through log instead
+##########################################
+import functools
+import logging
+import json
+import time
+
+#every module logs through this, per point/per design chatter is at DEBUG,
+#progress at INFO, anything that went wrong at WARNING and up
+log = logging.getLogger("RFID_Designer")
+
+#counters and stage timers only record anything while this is True
+enabled = False
+#name -> count
+counters = {}
+#name -> [calls, seconds], the time of a stage includes any stages inside it
+stages = {}
+#name -> latest progress of a long loop, see Progress
+progress = {}
+
+#turn the instrumentation on (or off), reset clears whatever was recorded before
+def Enable(on = True, reset = True):
+    global enabled
+    enabled = on
+    if(reset):
+        Reset()
+
+def Reset():
+    counters.clear()
+    stages.clear()
+    progress.clear()
+
+#send the log to the console at level, for scripts and the command line
+def ConfigureLogging(level = logging.INFO):
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(message)s", level=level)
+    log.setLevel(level)
+
+#add n to the counter name
+def Count(name, n = 1):
+    if(enabled):
+        counters[name] = counters.get(name, 0) + int(n)
+
+#times the with block it's used in and adds it to the stage name
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        stage = stages.setdefault(self.name, [0, 0.0])
+        stage[0] += 1
+        stage[1] += time.perf_counter() - self.start
+        return False
+
+#stands in for _Stage while the instrumentation is off
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+_noStage = _NoStage()
+
+#with Stage("offsetMap"): ...
+def Stage(name):
+    if(enabled):
+        return _Stage(name)
+    return _noStage
+
+#Stage around a whole function
+#@Timed("plot")
+def Timed(name):
+    def Decorate(function):
+        @functools.wraps(function)
+        def Wrapper(*args, **kwargs):
+            with Stage(name):
+                return function(*args, **kwargs)
+        return Wrapper
+    return Decorate
+
+#progress and time left of a loop of total steps, logged at INFO every interval seconds
+#the logging happens whether or not the instrumentation is on, the summary only when it is
+class Progress:
+    def __init__(self, name, total, interval = 10):
+        self.name = name
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.start = time.time()
+        self._lastLog = self.start
+
+    def Update(self, steps = 1):
+        self.done += steps
+        now = time.time()
+        if(now - self._lastLog >= self.interval or self.done == self.total):
+            self._lastLog = now
+            log.info(self.Status())
+            if(enabled):
+                progress[self.name] = self.State()
+
+    #seconds left going by the average rate so far, None until something is done
+    def ETA(self):
+        if(self.done == 0):
+            return None
+        return (time.time() - self.start)*(self.total - self.done)/self.done
+
+    def State(self):
+        elapsed = time.time() - self.start
+        return {"done": self.done, "total": self.total, "seconds": elapsed,
+                "rate": self.done/elapsed if elapsed > 0 else 0, "eta": self.ETA()}
+
+    def Status(self):
+        state = self.State()
+        eta = "?" if state["eta"] is None else _Clock(state["eta"])
+        percent = 100*self.done/self.total if self.total else 100
+        return (self.name + " " + "{0:.1f}".format(percent) + "% (" + str(self.done) + "/" +
+                str(self.total) + ") " + "{0:.1f}".format(state["rate"]) + "/s ETA " + eta)
+
+    #record the final state
+    def Finish(self):
+        if(enabled):
+            progress[self.name] = self.State()
+
+def _Clock(seconds):
+    seconds = int(seconds)
+    return str(seconds//3600) + ":" + str(seconds//60%60).zfill(2) + ":" + str(seconds%60).zfill(2)
+
+#everything recorded so far as plain python types
+def Summary():
+    return {"counters": dict(counters),
+            "stages": {name: {"calls": calls, "seconds": seconds}
+                       for name, (calls, seconds) in stages.items()},
+            "progress": dict(progress)}
+
+#the summary as a text table, slowest stage first
+def Report():
+    lines = ["stage".ljust(24) + "calls".rjust(10) + "seconds".rjust(12) + "ms/call".rjust(12)]
+    for name, (calls, seconds) in sorted(stages.items(), key=lambda stage: -stage[1][1]):
+        lines.append(name.ljust(24) + str(calls).rjust(10) + "{0:12.3f}".format(seconds) +
+                     "{0:12.3f}".format(1000*seconds/calls))
+    lines.append("")
+    lines.append("counter".ljust(24) + "count".rjust(10))
+    for name, count in sorted(counters.items()):
+        lines.append(name.ljust(24) + str(count).rjust(10))
+    return "\n".join(lines)
+
+def WriteSummary(fileName):
+    with open(fileName, "w") as summaryFile:
+        json.dump(Summary(), summaryFile, indent=1)
@@ -1,12 +1,18 @@
 from Antenna import Antenna#custom antenna function
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-from matplotlib import cm
-from matplotlib.ticker import LinearLocator, FormatStrFormatter
-from matplotlib.backends.backend_pdf import PdfPages
+import Antenna as AntennaModule
+from ResultStore import ResultWriter, ResultReader
+import Instrument
+import Surrogate
+import Optimize
+import Export
 import numpy as nm
 import time
 import re
+import multiprocessing
+import itertools
+import functools
+import json
+import os
 
 ##########################################
 #NFC design calculator based on
@@ -17,6 +23,14 @@ w_0 = 2 * nm.pi * 13.56
 #Equal to V^2/P
 R_L = 1250
 
+log = Instrument.log
+
+#matplotlib is only imported the first time something gets plotted so sweeps
+#can run headless without paying for it
+def _Pyplot():
+    import matplotlib.pyplot as plt
+    return plt
+
 #next open figure
 nFig = 5
 
@@ -26,21 +40,29 @@ N_2 = []
 M_12 = []
 V_2 = []
 
+#angular frequency of f (MHz), w_0 when f is None
+#everything below takes arrays of frequencies, see Frequency.py for R(f)
+def _Omega(f):
+    if(f is None):
+        return w_0
+    return 2 * nm.pi * nm.asarray(f)
+
 #Get the reccomended turn count for a given geometry
-def GetN(L,R, R_l = R_L):
-    turns = nm.power(2*R*R_l/(nm.square(w_0)*nm.square(L)),1/3)
+def GetN(L,R, R_l = R_L, f = None):
+    turns = nm.power(2*R*R_l/(nm.square(_Omega(f))*nm.square(L)),1/3)
     return nm.ceil(turns)
 
 #Get the quality facotr of a coupled tag
 #Q_2 = 1/(w_0*L_2/R_l + R_2/(w_0*L_2))
-def GetQ(L,R,R_l = R_L):
-    Q = 1/((w_0*L/R_l) + (R/(w_0*L)))
+def GetQ(L,R,R_l = R_L, f = None):
+    w = _Omega(f)
+    Q = 1/((w*L/R_l) + (R/(w*L)))
     return Q
 
 #Get the power approximation
 #R_t = w_0*k^2*L_1*Q_2
-def GetR_t(k,L,Q):
-    R_t = w_0*nm.square(k)*L*Q
+def GetR_t(k,L,Q, f = None):
+    R_t = _Omega(f)*nm.square(k)*L*Q
     return R_t
     
 #Get the root-mean-square power dissipated by the tag
@@ -76,7 +98,7 @@ def GetBest(readAnt,width,length,zOffset = 20, plot = 0):
         testAnt = Antenna(width, length, n, 0.15)
         testAnt.DesignAntenna()
         #print out the calculated values of the created antenna
-        print("N: " + str(n) + " L: " + str(testAnt.L) + " R: " + str(testAnt.R))
+        log.info("N: %s L: %s R: %s", n, testAnt.L, testAnt.R)
         
         #Get the quality factor
         Q = GetQ(testAnt.L,testAnt.R)
@@ -109,6 +131,7 @@ def GetBest(readAnt,width,length,zOffset = 20, plot = 0):
         bestAnt.append(testAnt)
     
     if(plot == 1):        
+        plt = _Pyplot()
         plt.figure(1)
         
         #Antenna impedance
@@ -132,14 +155,17 @@ def GetBest(readAnt,width,length,zOffset = 20, plot = 0):
         plt.legend(bbox_to_anchor=(1.05, 1), loc=2, borderaxespad=0.)
         
     #WHO WON, WHOS NEXT... I have no idea how to decide...
-    print("antenna " + str(nm.argmax(R_tmax)) + "WINS!!!")
+    log.info("antenna %s WINS!!!", nm.argmax(R_tmax))
     return bestAnt[nm.argmax(R_tmax)]
     
 def GetQKRN(readAnt,testAnt,xOffset = 0,yOffset = 0,zOffset = 20, layers = 1):
     #Create the antenna, if it's invalid stop!   
     if(testAnt.DesignAntenna(layers) == -1):
         return [0,0,0,0]
-    
+    return DesignedQKRN(readAnt,testAnt,xOffset,yOffset,zOffset)
+
+#same as GetQKRN for an antenna that's already designed
+def DesignedQKRN(readAnt,testAnt,xOffset = 0,yOffset = 0,zOffset = 20):
     #Get the quality factor and add it to the antenna if needed later
     Q = GetQ(testAnt.L,testAnt.R)
     testAnt.Q = Q
@@ -151,12 +177,30 @@ def GetQKRN(readAnt,testAnt,xOffset = 0,yOffset = 0,zOffset = 20, layers = 1):
     #get the impedance and add it
     N = GetN(testAnt.L,testAnt.R)
     
-    print([Q,K,R_t,N])
+    log.debug("Q K R_t N %s", [Q,K,R_t,N])
     
     return [Q,K,R_t,N]
+
+#Designs an antenna one turn at a time and yields (n, antenna, QKRN) for every 
+#turn count in range(turns[0],turns[1]), each turn only adds its own traces
+#the same antenna is extended in place so copy anything that needs to be kept
+def TurnSweep(readAnt,length,width,gap,traceWidth,turns,
+              xOffset = 0,yOffset = 0,zOffset = 20,layers = 1):
+    ant = Antenna(length,width,turns[0],gap,traceWidth)
+    valid = (ant.DesignAntenna(layers) != -1)
+    for n in range(turns[0],turns[1]):
+        if(valid and n > turns[0]):
+            valid = (ant.AddTurn() != -1)
+        if(not valid):
+            #too many turns to fit, adding more won't help
+            yield n, ant, [0,0,0,0]
+        else:
+            yield n, ant, DesignedQKRN(readAnt,ant,xOffset,yOffset,zOffset)
         
 #QKR label for the dataset, figure to add data to
+@Instrument.Timed("plot")
 def QKRNGraph(Q_2,k,R_t,N,title = "Q K R",fig = 2):
+    plt = _Pyplot()
     plt.figure(fig) 
     
     #Q factor of antenna
@@ -194,31 +238,170 @@ def QKRNGraph(Q_2,k,R_t,N,title = "Q K R",fig = 2):
     
 #Creates a 3d array mapping the impedance at points above the antenna
 #Returns the heightmap 
-def offsetMap(readAnt,testAnt,minXY,maxXY,step = 10,figure = -1,zOffset = 20):
+#every point of the map is worked out in one K call, see Antenna.Mutual
+#when the coupling is symmetric (Antenna.CouplingSymmetry) only the points up to the centre
+#are worked out and the rest copied from their mirror image, points whose mirror image
+#is off the grid and maps of coils that aren't symmetric are worked out in full
+@Instrument.Timed("offsetMap")
+def offsetMap(readAnt,testAnt,minXY,maxXY,step = 10,figure = -1,zOffset = 20,symmetry = True):
     #X,Y,Z coordinates for the map
     x1 = nm.arange(minXY[0],maxXY[0],step)
     y1 = nm.arange(minXY[1],maxXY[1],step)
     
     X, Y = nm.meshgrid(x1,y1)
-    #Calculate the R_t at a given (X,Y) location
-    def F(x,y):
-        #Get the coupling coeffecient at zOffset centered on the reader
-        tempk = nm.abs(readAnt.K(testAnt,zOffset,x,y))
-        #Get the R_t
-        R_t = GetR_t(tempk,readAnt.L,testAnt.Q)
-        print(str([x,y])+"="+str(R_t))
-        return R_t  
-        
-    #loop through possible positions with a step size of step
-    z = nm.array([F(x,y) for x,y in zip(nm.ravel(X), nm.ravel(Y))])
-    Z = z.reshape(X.shape)
+    
+    #the point each grid point is worked out at
+    if(symmetry):
+        mirror, point = AntennaModule.CouplingSymmetry(readAnt.traces,testAnt.traces)
+    else:
+        mirror, point = [None,None], None
+    columns = _MirrorIndex(x1,mirror[0],step)
+    rows = _MirrorIndex(y1,mirror[1],step)
+    index = rows[:,None]*len(x1) + columns[None,:]
+    if(point is not None and None in mirror):
+        #turned half way round, whichever of the two comes first
+        turnedColumns = _MirrorIndex(x1,point[0],step,True)
+        turnedRows = _MirrorIndex(y1,point[1],step,True)
+        turned = (turnedRows[:,None] >= 0) & (turnedColumns[None,:] >= 0)
+        turnedIndex = index[turnedRows[:,None],turnedColumns[None,:]]
+        index = nm.where(turned, nm.minimum(index,turnedIndex), index)
+    need, spread = nm.unique(index, return_inverse=True)
+    if(Instrument.enabled):
+        Instrument.Count("offsetMap mirrored",X.size - len(need))
+    
+    #Get the coupling coeffecient at zOffset for the points needed all at once
+    tempk = nm.abs(readAnt.K(testAnt,zOffset,X.flat[need],Y.flat[need]))
+    #Get the R_t, spread back over the whole grid
+    Z = GetR_t(tempk,readAnt.L,testAnt.Q)[spread.reshape(X.shape)]
      
     #save the data to a files
-    nm.savez("Output/R_tMap"+str(figure),X,Y,Z)
+    with Instrument.Stage("offsetMap write"):
+        nm.savez("Output/R_tMap"+str(figure),X=X,Y=Y,Z=Z)
     if(figure != -1):
         Plot3D(X,Y,Z,figure)
     return Z
-    
+
+#index of the value each grid value is worked out at, its mirror image about centre
+#if it's past the centre and the mirror image is on the grid, otherwise itself
+#everywhere = True gives the mirror image on either side of the centre instead, -1 where
+#it's off the grid
+def _MirrorIndex(values,centre,step,everywhere = False):
+    index = nm.arange(len(values))
+    if(centre is None or len(values) == 0):
+        return nm.full(len(values), -1) if everywhere else index
+    mirror = nm.rint((2*centre - values - values[0])/step).astype(int)
+    onGrid = (mirror >= 0) & (mirror < len(values))
+    onGrid[onGrid] &= nm.abs(values[mirror[onGrid]] - (2*centre - values[onGrid])) < 1e-6*step
+    if(everywhere):
+        return nm.where(onGrid, mirror, -1)
+    onGrid &= (values > centre)
+    index[onGrid] = mirror[onGrid]
+    return index
+
+#R_t of testAnt tilted about x and y (degrees, minAngle to maxAngle in steps of step) at
+#one offset over the reader, the same kind of map as offsetMap with angles for X and Y
+#every pose goes through Antenna.Mutual in one batch, see Antenna.PoseMutual
+#the pose model isn't offsetMap's model even untilted, so the map is measured against its
+#own untilted R_t (logged and saved as baseline), not against offsetMap at the same offset
+#signed = False sums the trace pairs unsigned, see Antenna.PoseMutual
+def poseMap(readAnt,testAnt,minAngle,maxAngle,step = 10,figure = -1,zOffset = 20,
+            xOffset = 0,yOffset = 0,zAngle = 0,signed = True):
+    x1 = nm.arange(minAngle[0],maxAngle[0],step)
+    y1 = nm.arange(minAngle[1],maxAngle[1],step)
+    X, Y = nm.meshgrid(x1,y1)
+
+    tempk = nm.abs(readAnt.K(testAnt,zOffset,xOffset,yOffset,pose = (X,Y,zAngle),signed = signed))
+    Z = GetR_t(tempk,readAnt.L,testAnt.Q)
+    baseline = GetR_t(nm.abs(readAnt.K(testAnt,zOffset,xOffset,yOffset,pose = (0,0,zAngle),
+                                       signed = signed)),readAnt.L,testAnt.Q)
+    log.info("pose model R_t untilted %s, offsetMap model %s (not comparable)", baseline,
+             GetR_t(nm.abs(readAnt.K(testAnt,zOffset,xOffset,yOffset)),readAnt.L,testAnt.Q))
+
+    with Instrument.Stage("offsetMap write"):
+        nm.savez("Output/R_tPoseMap"+str(figure),X=X,Y=Y,Z=Z,baseline=baseline)
+    if(figure != -1):
+        Plot3D(X,Y,Z,figure)
+    return Z
+
+#same map as offsetMap but only sampled finely where it needs to be, it starts on a grid
+#of coarse (mm) cells and keeps splitting any cell where R_t in the middle is more than
+#tolerance (relative to the largest R_t of the coarse grid) away from what the corners
+#give, or where K changes sign, down to cells of step (mm)
+#every level's new points are worked out in one batch
+#returns (samples, X, Y, Z), samples is an (n,3) array of the x, y, R_t actually worked
+#out and X, Y, Z is the map resampled onto a regular step grid (bilinear within each
+#cell) that Plot3D can take
+@Instrument.Timed("offsetMap")
+def AdaptiveOffsetMap(readAnt,testAnt,minXY,maxXY,step = 1,coarse = 16,tolerance = 0.01,
+                      figure = -1,zOffset = 20):
+    #coarse cells are a power of two fine steps so every split lands on the fine grid
+    size = 1 << max(int(nm.ceil(nm.log2(coarse/step))),0)
+    x = minXY[0] + step*nm.arange(max(int(nm.ceil((maxXY[0]-minXY[0])/(step*size))),1)*size+1)
+    y = minXY[1] + step*nm.arange(max(int(nm.ceil((maxXY[1]-minXY[1])/(step*size))),1)*size+1)
+    #signed K at every fine grid point, nan until it's worked out
+    K = nm.full((len(y),len(x)),nm.nan)
+    
+    #work out the corners and middle of the given cells that aren't known yet, all at once
+    def Sample(rows,columns,size):
+        half = size//2
+        rows = nm.concatenate([rows,rows,rows+size,rows+size,rows+half])
+        columns = nm.concatenate([columns,columns+size,columns,columns+size,columns+half])
+        new = nm.isnan(K[rows,columns])
+        rows, columns = nm.unique(nm.stack([rows[new],columns[new]]),axis=1)
+        if(len(rows)):
+            Instrument.Count("offsetMap samples",len(rows))
+            K[rows,columns] = readAnt.K(testAnt,zOffset,x[columns],y[rows])
+    
+    rows, columns = [grid.ravel() for grid in
+                     nm.meshgrid(nm.arange(0,len(y)-1,size),nm.arange(0,len(x)-1,size),indexing="ij")]
+    scale = None
+    #(rows, columns, size) of every cell that didn't get split
+    leaves = []
+    while(len(rows)):
+        Sample(rows,columns,size)
+        if(size == 1):
+            split = nm.zeros(len(rows),dtype=bool)
+        else:
+            corners = nm.stack([K[rows,columns],K[rows,columns+size],
+                                K[rows+size,columns],K[rows+size,columns+size],
+                                K[rows+size//2,columns+size//2]])
+            R_t = GetR_t(nm.abs(corners),readAnt.L,testAnt.Q)
+            if(scale is None):
+                scale = nm.max(R_t)
+            sign = nm.sign(corners)
+            split = ((nm.abs(R_t[4] - nm.mean(R_t[:4],axis=0)) > tolerance*scale) |
+                     (nm.min(sign,axis=0) != nm.max(sign,axis=0)))
+        leaves.append((rows[~split],columns[~split],size))
+        #four children for every split cell
+        size //= 2
+        rows = nm.concatenate([rows[split],rows[split],rows[split]+size,rows[split]+size])
+        columns = nm.concatenate([columns[split],columns[split]+size,columns[split],columns[split]+size])
+    
+    #fill in the regular grid, coarse cells first so the finer ones overwrite their edges
+    Kgrid = nm.full(K.shape,nm.nan)
+    for rows, columns, size in leaves:
+        t = nm.arange(size+1)/size
+        wy = t[None,:,None]
+        wx = t[None,None,:]
+        cell = lambda r, c: K[rows+r,columns+c][:,None,None]
+        Kgrid[rows[:,None,None]+nm.arange(size+1)[None,:,None],
+              columns[:,None,None]+nm.arange(size+1)[None,None,:]] = (
+            cell(0,0)*(1-wy)*(1-wx) + cell(0,size)*(1-wy)*wx +
+            cell(size,0)*wy*(1-wx) + cell(size,size)*wy*wx)
+    sampled = ~nm.isnan(K)
+    Kgrid[sampled] = K[sampled]
+    
+    X, Y = nm.meshgrid(x,y)
+    Z = GetR_t(nm.abs(Kgrid),readAnt.L,testAnt.Q)
+    samples = nm.stack([X[sampled],Y[sampled],Z[sampled]],axis=1)
+    log.info("adaptive map: %s of %s points worked out",len(samples),Z.size)
+    
+    with Instrument.Stage("offsetMap write"):
+        nm.savez("Output/R_tMap"+str(figure),X=X,Y=Y,Z=Z,samples=samples)
+    if(figure != -1):
+        Plot3D(X,Y,Z,figure)
+    return samples, X, Y, Z
+
 #Plots an XYZ file based on an input, assumes it's a numpy files
 def Plot3DFile(file, fig = 1):
     #Get the input file
@@ -231,10 +414,15 @@ def Plot3DFile(file, fig = 1):
     Plot3D(X,Y,Z,fig)
     
 #plot a 3d X Y Z graph on figure fig
+@Instrument.Timed("plot")
 def Plot3D(X,Y,Z,fig=1):
+    plt = _Pyplot()
+    from mpl_toolkits.mplot3d import Axes3D
+    from matplotlib import cm
+    from matplotlib.ticker import LinearLocator, FormatStrFormatter
     #create a new 3d graph
     fig = plt.figure(fig)
-    ax = fig.gca(projection='3d')
+    ax = fig.add_subplot(111, projection='3d')
     
     #set the graph to be a 3d surface
     surf = ax.plot_surface(X,Y,Z, rstride=1, cstride=1, cmap=cm.coolwarm,
@@ -247,7 +435,10 @@ def Plot3D(X,Y,Z,fig=1):
     #put a color bar on the side to help with determining values
     fig.colorbar(surf, shrink=0.5, aspect=5)
     
+@Instrument.Timed("plot write")
 def SavePlotToFile(filename,figs=None, dpi=200):
+    plt = _Pyplot()
+    from matplotlib.backends.backend_pdf import PdfPages
     pp = PdfPages(filename)
     if figs is None:
         figs = [plt.figure(n) for n in plt.get_fignums()]
@@ -257,11 +448,318 @@ def SavePlotToFile(filename,figs=None, dpi=200):
     plt.close('all')
     pp.close()
     
+#reader antenna the sweep designs are tested against, set once per worker process
+_sweepReader = None
+
+def _InitSweepWorker(readAnt, cache = None):
+    global _sweepReader
+    _sweepReader = readAnt
+    #every worker needs its own handle on the design cache
+    if(cache is not None):
+        AntennaModule.UseDesignCache(cache)
+
+#evaluate one (layers, length, width, trace width, turns) design of the sweep grid
+def _SweepDesign(design):
+    L,l,w,t,n = design
+    #dual layer, the number of turns is 2*n...
+    return GetQKRN(_sweepReader,Antenna(l,w,n,0.15,t),layers = L,
+                   xOffset = 40,yOffset = 30)
+
+#evaluate every turn count of one (layers, length, width, trace width) of the sweep grid
+def _SweepTurns(design):
+    L,l,w,t,turns = design
+    return [QKRN for n, ant, QKRN in TurnSweep(_sweepReader,l,w,0.15,t,turns,
+                                              xOffset = 40,yOffset = 30,layers = L)]
+
+#rebuild a design the same way GetQKRN leaves it so it can be saved/exported
+def _SweepAntenna(design):
+    L,l,w,t,n = design
+    ant = Antenna(l,w,n,0.15,t)
+    if(ant.DesignAntenna(L) != -1):
+        ant.Q = GetQ(ant.L,ant.R)
+    return ant
+
+#labels sweep dimensions the way the sweep loops print them, 10.0 -> 10
+def _SweepLabel(value):
+    if(float(value).is_integer()):
+        return str(int(value))
+    return str(value)
+
+#plot workers never have a screen to draw on
+def _InitPlotWorker():
+    import matplotlib
+    matplotlib.use("Agg")
+
+#draws the QKRN graphs of one (layers, length, width) cell and saves them to fileName
+def _RenderCell(job):
+    fileName, rows = job
+    label = _SweepLabel(rows["width"][0]) + "x" + _SweepLabel(rows["length"][0])
+    #one figure per trace width, in the order the sweep did them
+    traceWidths, first = nm.unique(rows["traceWidth"], return_index=True)
+    for t in traceWidths[nm.argsort(first)]:
+        design = rows[rows["traceWidth"] == t]
+        #QKR label for the dataset, figure to add data to
+        QKRNGraph(design["Q"],design["K"],design["R_t"],design["N"],
+                  "th:"+str(t),label+"th-"+str(t))
+    SavePlotToFile(fileName)
+
+#renders the QKRN report of every cell of a sweep from its ResultStore folder
+#workers > 1 renders the cells in a process pool
+def RenderSweepPlots(resultPath, outputFolder = "Output", workers = 1):
+    rows = ResultReader(resultPath).All()
+    cells = nm.stack([rows["layers"],rows["width"],rows["length"]],axis=1)
+    cells, first, inverse = nm.unique(cells,axis=0,return_index=True,return_inverse=True)
+    inverse = inverse.reshape(-1)
+    jobs = []
+    for n in nm.argsort(first):
+        cell = rows[inverse == n]
+        fileName = (outputFolder + "/" + _SweepLabel(cell["width"][0]) + "x" +
+                    _SweepLabel(cell["length"][0]) + " x " + str(cell["layers"][0]) +
+                    "_40x_30y.pdf")
+        jobs.append((fileName,cell))
+    
+    if(workers > 1):
+        with multiprocessing.Pool(workers,_InitPlotWorker) as pool:
+            pool.map(_RenderCell,jobs)
+    else:
+        for job in jobs:
+            _RenderCell(job)
+
+#Surrogate estimate of Q, K, R_t and N for every design of a sweep, a dictionary of
+#arrays shaped (cells, trace widths, turn counts) with nan where a design doesn't fit
+#cells are (layers, length, width) the same as Iterate, all the turn counts and trace
+#widths of one antenna size come out of one vectorized Surrogate call
+def ScreenDesigns(readAnt, cells, traceWidths, turns, gap = 0.15,
+                  xOffset = 40, yOffset = 30, zOffset = 20):
+    traceWidths = nm.asarray(traceWidths, dtype=float)
+    n = nm.arange(turns[0],turns[1])
+    turnCount = max(turns[1]-1,1)
+    maxLayers = max(cell[0] for cell in cells)
+    shape = (len(cells),len(traceWidths),len(n))
+    screened = {name: nm.full(shape,nm.nan) for name in ("Q","K","R_t","N")}
+    
+    sizes = {}
+    for c, (L,l,w) in enumerate(cells):
+        if((l,w) not in sizes):
+            sizes[(l,w)] = (Surrogate.SpiralInductance(l,w,gap,traceWidths,turnCount,maxLayers),
+                            Surrogate.SpiralResistance(l,w,gap,traceWidths,turnCount),
+                            Surrogate.SpiralMutual(readAnt,l,w,gap,traceWidths,turnCount,
+                                                   maxLayers,zOffset,xOffset,yOffset))
+        L_2, R_2, M = sizes[(l,w)]
+        #same check as Antenna.CoilAntenna
+        valid = (n >= 1) & (2*(gap+traceWidths[:,None])*n <= min(l,w))
+        L_2 = nm.where(valid, L_2[:,L-1,n-1], nm.nan)
+        R_2 = R_2[:,n-1]*Surrogate.LayerFactor(L)
+        K = nm.abs(M[:,L-1,n-1])/nm.sqrt(readAnt.L*L_2)
+        Q = GetQ(L_2,R_2)
+        screened["Q"][c] = Q
+        screened["K"][c] = K
+        screened["R_t"][c] = GetR_t(K,readAnt.L,Q)
+        screened["N"][c] = GetN(L_2,R_2)
+    return screened
+
+#designs of each cell worth working out in full, the top best by K and the top best by R_t
+#plus anything within margin (relative) of the best, shaped like ScreenDesigns
+def Shortlist(screened, top = 2, margin = None):
+    keep = nm.zeros(screened["K"].shape, dtype=bool)
+    for name in ("K","R_t"):
+        score = screened[name].reshape(len(keep),-1)
+        score = nm.where(nm.isnan(score), -nm.inf, score)
+        best = nm.zeros(score.shape, dtype=bool)
+        nm.put_along_axis(best, nm.argsort(-score,axis=1)[:,:top], True, axis=1)
+        if(margin is not None):
+            best |= score >= (1-margin)*nm.max(score,axis=1,keepdims=True)
+        keep |= (best & nm.isfinite(score)).reshape(keep.shape)
+    return keep
+
+#compares the surrogate ranking of one cell with the exact results of the designs worked
+#out in full, done is a list of ((trace width, turn count) index, QKRN), adds it to tally
+def _TallyScreen(tally, screened, shortlist, cell, done):
+    if(not done):
+        return
+    index = tuple(nm.array([d[0] for d in done]).T)
+    upper = nm.triu(nm.ones((len(done),len(done)),dtype=bool),1)
+    tally["cells"] = tally.get("cells",0) + 1
+    for name, column in (("K",1),("R_t",2)):
+        surrogate = nm.nan_to_num(screened[name][cell][index],nan=-nm.inf)
+        exact = nm.array([float(d[1][column]) for d in done])
+        tally[name+" top"] = tally.get(name+" top",0) + int(nm.argmax(surrogate) == nm.argmax(exact))
+        #pairs of designs that fit that the surrogate puts in the same order as the exact calculation
+        fits = nm.isfinite(surrogate)
+        pairs = upper & fits[:,None] & fits[None,:]
+        with nm.errstate(invalid='ignore'):
+            same = (nm.sign(surrogate[:,None]-surrogate[None,:]) == nm.sign(exact[:,None]-exact[None,:]))
+        tally[name+" pairs"] = tally.get(name+" pairs",0) + int(nm.sum(pairs))
+        tally[name+" concordant"] = tally.get(name+" concordant",0) + int(nm.sum(same[pairs]))
+        #only known when everything was worked out in full
+        if(len(done) == screened[name][cell].size):
+            winner = tuple(i[nm.argmax(exact)] for i in index)
+            tally[name+" found"] = tally.get(name+" found",0) + int(shortlist[cell][winner])
+
+#how well the surrogate ranking agreed with the exact results
+def _ScreenReport(tally, evaluated, total):
+    text = ("surrogate screening: " + str(evaluated) + " of " + str(total) +
+            " designs worked out in full")
+    cells = tally.get("cells",0)
+    for name in ("K","R_t"):
+        if(cells == 0):
+            break
+        text += (", " + name + " top pick agreed in " + str(tally[name+" top"]) + "/" + str(cells) +
+                 " cells, " + "{0:.1f}".format(100*tally[name+" concordant"]/max(tally[name+" pairs"],1)) +
+                 "% of pairs ranked the same")
+        if(name+" found" in tally):
+            text += ", best design shortlisted in " + str(tally[name+" found"]) + "/" + str(cells)
+    return text
+
+#maximizes objective ("R_t" or "K") of one (length, width, turns, layers) antenna over a
+#continuous trace width and gap, anywhere between the minWidth/minGap manufacturing
+#limits and the widest spacing the turns fit in, tol is in mm
+#gap = a number keeps the gap fixed and only searches the trace width (golden section),
+#otherwise both are searched at once (Nelder-Mead)
+#returns (traceWidth, gap, QKRN, evaluations), traceWidth is None if nothing fits
+def OptimizeDesign(readAnt, length, width, turns, layers = 1, objective = "R_t", tol = 0.01,
+                   gap = None, xOffset = 40, yOffset = 30, zOffset = 20, maxEvaluations = 100):
+    column = {"K": 1, "R_t": 2}[objective]
+    #widest gap + trace width that still fits, just inside so rounding can't push it out
+    space = min(length,width)/(2*turns)*(1 - 1e-9)
+    smallest = AntennaModule.minWidth + (AntennaModule.minGap if gap is None else gap)
+    if(space < smallest):
+        return None, gap, [0,0,0,0], 0
+    
+    results = {}
+    def Evaluate(t, g):
+        QKRN = GetQKRN(readAnt,Antenna(length,width,turns,g,t),xOffset,yOffset,zOffset,layers)
+        results[(t,g)] = QKRN
+        return QKRN[column]
+    
+    if(gap is not None):
+        t, value, evaluations = Optimize.GoldenSection(lambda t: Evaluate(t,gap),
+                                                       AntennaModule.minWidth, space - gap,
+                                                       tol, maxEvaluations)
+        return t, gap, results[(t,gap)], evaluations
+    
+    #u picks the spacing (gap + width), v how it's split, the unit square covers every
+    #design that fits without going under either limit
+    def Design(x):
+        s = smallest + x[0]*(space - smallest)
+        t = AntennaModule.minWidth + x[1]*(s - smallest)
+        return t, s - t
+    scale = max(space - smallest, tol)
+    x, value, evaluations = Optimize.NelderMead(lambda x: Evaluate(*Design(x)),
+                                                [0.5,0.5], [0,0], [1,1], [0.25,0.25],
+                                                tol/scale, maxEvaluations)
+    t, g = Design(x)
+    return t, g, results[(t,g)], evaluations
+
+#optimize one (layers, length, width, turns) of an OptimizeSweep
+def _OptimizeCell(job):
+    L,l,w,n,objective,tol,gap = job
+    return OptimizeDesign(_sweepReader,l,w,n,L,objective,tol,gap)
+
+#OptimizeDesign for every (layers, length, width, turns) of the grid instead of stepping the
+#trace width, every optimum is saved to the ResultStore folder resultPath
+#returns a list of ((layers, length, width, traceWidth, turns, gap), QKRN, evaluations)
+def OptimizeSweep(width = [10,45,5],length = [8,9,1],turns = [1,11],layers = 1,
+                  objective = "R_t", tol = 0.01, gap = None, workers = 1, resultPath = None):
+    readAnt = Antenna(80,60,4,0.3,1)
+    readAnt.DesignAntenna()
+    jobs = [(L,l,w,n,objective,tol,gap) for L in range(1,layers+1)
+                                        for l in nm.arange(length[0],length[1],length[2])
+                                        for w in nm.arange(width[0],width[1],width[2])
+                                        for n in range(turns[0],turns[1])]
+    if(workers > 1):
+        with multiprocessing.Pool(workers,_InitSweepWorker,(readAnt,)) as pool:
+            optima = pool.map(_OptimizeCell,jobs)
+    else:
+        _InitSweepWorker(readAnt)
+        optima = [_OptimizeCell(job) for job in jobs]
+    
+    if(resultPath is None):
+        resultPath = "Output/Optimized"+time.strftime("%d_%m_%Y-%H_%M_%S")
+    results = []
+    with ResultWriter(resultPath) as store:
+        for (L,l,w,n,objective,tol,gap), (t,g,QKRN,evaluations) in zip(jobs,optima):
+            if(t is None):
+                continue
+            store.Append([L,l,w,n,g,t] + list(QKRN))
+            results.append(((L,l,w,t,n,g),QKRN,evaluations))
+    log.info("optimized %s designs with %s evaluations", len(results),
+             sum(result[2] for result in results))
+    return results
+
+#sweep checkpoints are json, a design (L,l,w,t,n) is stored as a list
+def _DesignToList(design):
+    if(design is None):
+        return None
+    #item() keeps ints as ints so the names/labels come out the same on a resume
+    return [nm.asarray(value).item() for value in design]
+
+#state saved by an unfinished sweep with the same parameters, None if there isn't one
+def _LoadCheckpoint(checkpoint,parameters):
+    if(checkpoint is None or not os.path.exists(checkpoint)):
+        return None
+    with open(checkpoint,"r") as checkpointFile:
+        state = json.load(checkpointFile)
+    #json turns the tuples into lists so compare it the same way
+    if(state["parameters"] != json.loads(json.dumps(parameters))):
+        log.warning("checkpoint is from a different sweep, starting over")
+        return None
+    return state
+
+@Instrument.Timed("checkpoint write")
+def _SaveCheckpoint(checkpoint,state):
+    if(checkpoint is None):
+        return
+    #write then rename so a crash never leaves half a checkpoint
+    with open(checkpoint+".tmp","w") as checkpointFile:
+        json.dump(state,checkpointFile)
+    os.replace(checkpoint+".tmp",checkpoint)
+
+#puts back the design cache that was in use before the call, whatever happens in it,
+#the same way Antenna.Precision puts back the precision
+def _KeepDesignCache(function):
+    @functools.wraps(function)
+    def Wrapped(*args, **kwargs):
+        previous = AntennaModule.designCache
+        try:
+            return function(*args, **kwargs)
+        finally:
+            AntennaModule.designCache = previous
+    return Wrapped
+
 #iterate over the given parameters to find the best designs
 #Finds best designs for every intermediarry as well
+#workers > 1 spreads the designs over a process pool, chunksize designs at a time,
+#the results are gathered in order so the output is the same as a serial run
+#cache is the folder of the on disk design cache, None to design everything from scratch
+#incremental grows each antenna a turn at a time (TurnSweep) instead of designing every turn count
+#every result is streamed to the ResultStore folder resultPath as it comes in
+#checkpoint is a file recording every finished (layers, length, width) cell, if the
+#sweep gets interrupted running it again with the same parameters carries on from there,
+#it's saved at most every checkpointSeconds so the results aren't split into tiny chunks
+#nothing is plotted during the sweep, plot renders the QKRN reports from the results
+#afterwards (plotWorkers processes at a time), plot = False leaves it headless
+#progress and the time left are logged at INFO every progressSeconds
+#profile records where the time went (see Instrument) and prints the summary at the end,
+#the json version is saved to profile if it's a file name, with workers > 1 only the
+#work done in this process is counted
+#screen = k ranks every design with the Surrogate estimate first (ScreenDesigns) and only
+#works out the top k by K and by R_t of each cell (plus anything within screenMargin of
+#the best) in full, only those get saved, screenValidate works everything out anyway to
+#check the shortlist, how well the rankings agreed is logged at the end
+@_KeepDesignCache
 def Iterate(width = [10,45,5],length = [8,9,1],
             turns = [1,11],traceWidth = [0.15,1.65,0.1],
-            layers = 1):
+            layers = 1, workers = 1, chunksize = 8, cache = "Output/cache",
+            incremental = True, resultPath = None,
+            checkpoint = "Output/Iterate.checkpoint", checkpointSeconds = 60,
+            plot = True, plotWorkers = 1, progressSeconds = 10, profile = False,
+            screen = None, screenMargin = None, screenValidate = False):
+    if(profile):
+        Instrument.Enable()
+    
+    designCache = AntennaModule.UseDesignCache(cache)
+    
      #create a model of the reader antenna
     readAnt = Antenna(80,60,4,0.3,1)
     readAnt.DesignAntenna()
@@ -272,74 +770,190 @@ def Iterate(width = [10,45,5],length = [8,9,1],
     #Create an output file for the best designs
     bestFile = open('TheBest.txt', 'w')
     
-    antennaSave = []
-    
-    #number of layers (1 or 2)
-    for L in range(1,layers+1):
-        #length of the antennas
-        for l in nm.arange(length[0],length[1],length[2]):
-            #width of the antenna
-            for w in nm.arange(width[0],width[1],width[2]):
-                bestR = -1
-                bestK = -1
-                #temporary placeholder antennas
-                bestR_ant = Antenna(80,60,4,0.3,1)
-                bestK_ant = Antenna(80,60,4,0.3,1)
-                #thickness of traces
-                for t in nm.arange(traceWidth[0],traceWidth[1],traceWidth[2]): 
-                    #temporary holder for QKR
-                    Q = []
-                    K = []
-                    R = []
-                    N = []
-                    
-                    print(str(l)+"x"+str(w)+"w x" + str(L) +" "+ "g:0.15"+"th"+str(t))
-                    #number of turns
-                    for n in range(turns[0],turns[1]):
-                        ant1 = Antenna(l,w,n,0.15,t)
-                        #dual layer, the number of turns is 2*n...
-                        QKRN = GetQKRN(readAnt,ant1,layers = L,
-                                       xOffset = 40,yOffset = 30)
-                        Q.append(QKRN[0])
-                        K.append(QKRN[1])
-                        R.append(QKRN[2])
-                        N.append(QKRN[3])
-                        #check if it has the highest K
-                        if(QKRN[1]>bestK):
-                            #if so make it the new contender and see if anything else can beat it
-                            bestK = QKRN[1]
-                            bestK_ant = ant1
+    #pick up from the last run if it was stopped part way through
+    parameters = [width,length,turns,traceWidth,layers,incremental]
+    if(screen is not None):
+        parameters.append([screen,screenMargin,screenValidate])
+    state = _LoadCheckpoint(checkpoint,parameters)
+    if(state is not None and resultPath is not None and resultPath != state["resultPath"]):
+        log.warning("checkpoint is for %s not %s, starting over", state["resultPath"], resultPath)
+        state = None
+    resuming = state is not None
+    if(resuming):
+        resultPath = state["resultPath"]
+        log.info("resuming from cell %s", state["cells"])
+    else:
+        state = {"parameters": parameters, "cells": 0, "rows": 0, "best": []}
+    
+    #Save all the numbers from the trial run as they come in
+    if(resultPath is None):
+        resultPath = "Output/Results"+time.strftime("%d_%m_%Y-%H_%M_%S")
+    state["resultPath"] = resultPath
+    store = ResultWriter(resultPath)
+    if(resuming):
+        #anything past the last finished cell gets done again
+        store.Truncate(state["rows"])
+    else:
+        #a new sweep into a folder that already has results goes after them, never over them
+        if(store.rows > 0):
+            log.warning("%s already holds %s rows, the new results go after them",
+                        resultPath, store.rows)
+        state["rows"] = store.rows
+    
+    #every (layers, length, width) cell in the order the sweep walks through them
+    cells = [(L,l,w) for L in range(1,layers+1)
+                     for l in nm.arange(length[0],length[1],length[2])
+                     for w in nm.arange(width[0],width[1],width[2])]
+    traceWidths = nm.arange(traceWidth[0],traceWidth[1],traceWidth[2])
+    turnCounts = range(turns[0],turns[1])
+    
+    #which (cell, trace width, turn count) designs get worked out in full
+    evaluated = nm.ones((len(cells),len(traceWidths),len(turnCounts)),dtype=bool)
+    screened = None
+    if(screen is not None):
+        with Instrument.Stage("screening"):
+            screened = ScreenDesigns(readAnt,cells,traceWidths,turns)
+            shortlist = Shortlist(screened,screen,screenMargin)
+        if(not screenValidate):
+            evaluated = shortlist
+        #the shortlisted designs are done one at a time
+        incremental = False
+    
+    #every design of the unfinished cells
+    if(incremental):
+        #one task per turn sweep, each gives back the QKRN for every turn count
+        designs = [(L,l,w,t,turns) for L,l,w in cells[state["cells"]:] for t in traceWidths]
+        evaluate = _SweepTurns
+    else:
+        designs = [(L,l,w,t,n) for c, (L,l,w) in enumerate(cells) if c >= state["cells"]
+                               for i, t in enumerate(traceWidths)
+                               for j, n in enumerate(turnCounts) if evaluated[c,i,j]]
+        evaluate = _SweepDesign
+    
+    pool = None
+    try:
+        if(workers > 1):
+            pool = multiprocessing.Pool(workers,_InitSweepWorker,(readAnt,cache))
+            results = pool.imap(evaluate,designs,chunksize)
+        else:
+            _InitSweepWorker(readAnt)
+            results = map(evaluate,designs)
+        if(incremental):
+            results = itertools.chain.from_iterable(results)
+    
+        progress = Instrument.Progress("Iterate",int(nm.sum(evaluated[state["cells"]:])),
+                                       progressSeconds)
+        screenTally = {}
+        cell = 0
+        lastCheckpoint = time.time()
+        #number of layers (1 or 2)
+        for L in range(1,layers+1):
+            #length of the antennas
+            for l in nm.arange(length[0],length[1],length[2]):
+                #width of the antenna
+                for w in nm.arange(width[0],width[1],width[2]):
+                    cell += 1
+                    if(cell <= state["cells"]):
+                        #finished last time, just get the winners back
+                        for design in state["best"][cell-1]:
+                            if(design is None):
+                                TheBest.append(Antenna(80,60,4,0.3,1))
+                            else:
+                                TheBest.append(_SweepAntenna(tuple(design)))
+                        continue
+                
+                    bestR = -1
+                    bestK = -1
+                    #temporary placeholder antennas
+                    bestR_ant = Antenna(80,60,4,0.3,1)
+                    bestK_ant = Antenna(80,60,4,0.3,1)
+                    bestR_design = None
+                    bestK_design = None
+                    done = []
+                    #thickness of traces
+                    for i, t in enumerate(traceWidths): 
+                        log.debug("%sx%sw x%s g:0.15th%s", l, w, L, t)
+                        #number of turns
+                        for j, n in enumerate(turnCounts):
+                            if(not evaluated[cell-1,i,j]):
+                                continue
+                            ant1 = Antenna(l,w,n,0.15,t)
+                            QKRN = next(results)
+                            if(screened is not None):
+                                done.append(((i,j),QKRN))
+                            #check if it has the highest K
+                            if(QKRN[1]>bestK):
+                                #if so make it the new contender and see if anything else can beat it
+                                bestK = QKRN[1]
+                                bestK_design = (L,l,w,t,n)
                             
-                        #check if it has the highest R
-                        if(QKRN[2]>bestR):
-                            #if so make it the new contender and see if anything else can beat it
-                            bestR = QKRN[2]
-                            bestR_ant = ant1
+                            #check if it has the highest R
+                            if(QKRN[2]>bestR):
+                                #if so make it the new contender and see if anything else can beat it
+                                bestR = QKRN[2]
+                                bestR_design = (L,l,w,t,n)
             
-                        #QKR label for the dataset, figure to add data to
-                        QKRNGraph(Q,K,R,N,"th:"+str(t),str(l)+"x"+str(w)+"th-"+str(t))
-                        #Add the data to the master save file so you don't have to 
-                        #simulate every GOD DAMN TIME!!!!
-                        antennaSave.append([ant1.GetDimensions(),Q,K,R,N])
-    
-                SavePlotToFile("Output/"+str(l)+"x"+str(w)+" x " + str(L) + "_40x_30y.pdf")
+                            #Add the data to the master save file so you don't have to 
+                            #simulate every GOD DAMN TIME!!!!
+                            store.Append([L] + ant1.GetDimensions() + QKRN)
+                            progress.Update()
                 
-                #add the new best to... the best
-                TheBest.append(bestR_ant)
-                TheBest.append(bestK_ant)
-            
-    #Save all the numbers from the trial run
-    nm.savez("Output/DataDump"+time.strftime("%d_%m_%Y-%H_%M_%S"),antennaSave)
+                    if(screened is not None):
+                        _TallyScreen(screenTally,screened,shortlist,cell-1,done)
+                
+                    #only the winners get built in full
+                    if(bestR_design is not None):
+                        bestR_ant = _SweepAntenna(bestR_design)
+                    if(bestK_design is not None):
+                        bestK_ant = _SweepAntenna(bestK_design)
+                
+                    #add the new best to... the best
+                    TheBest.append(bestR_ant)
+                    TheBest.append(bestK_ant)
+                
+                    #the cell is done, save where the sweep is up to
+                    state["best"].append([_DesignToList(bestR_design),_DesignToList(bestK_design)])
+                    if(time.time() - lastCheckpoint >= checkpointSeconds):
+                        store.Flush()
+                        state["cells"] = cell
+                        state["rows"] = store.rows
+                        _SaveCheckpoint(checkpoint,state)
+                        lastCheckpoint = time.time()
+    finally:
+        #terminate, not close, a sweep that stopped part way doesn't wait on the
+        #designs still queued up
+        if(pool is not None):
+            pool.terminate()
+            pool.join()
+    
+    if(designCache is not None):
+        #only counts this process, the workers keep their own counts
+        log.info(designCache.Report())
+    store.Close()
+    progress.Finish()
+    if(screened is not None):
+        log.info(_ScreenReport(screenTally,int(nm.sum(evaluated)),evaluated.size))
+    #finished, the next run starts from scratch
+    if(checkpoint is not None and os.path.exists(checkpoint)):
+        os.remove(checkpoint)
+    
+    #the graphs are drawn from the saved results now the sweep is done
+    if(plot):
+        RenderSweepPlots(resultPath,"Output",plotWorkers)
         
-    i = 0
     #save the best designs
     for Best in TheBest:
         bestFile.write("w="+str(Best.width)+" l="+str(Best.length)+" n="+
             str(Best.turns)+" g="+str(Best.gap)+" w="+str(Best.trace_Width)+
             " L="+str(Best.layer)+" R="+str(Best.R)+"\n")
-        Best.GenerateRoundEagle("scr/Best"+str(Best.width)+"x"+str(Best.length)+"x"+str(Best.layer)+"_"+str(i))
-        i += 1
     bestFile.close()
+    Export.ExportDesigns(TheBest, workers = plotWorkers)
+    
+    if(profile):
+        log.info(Instrument.Report())
+        if(isinstance(profile, str)):
+            Instrument.WriteSummary(profile)
+        Instrument.Enable(False, reset=False)
         
     """
     #Currently set so the tag is placed on every corner of the reader
@@ -384,6 +998,14 @@ def __Main__():
     antenna.DesignAntenna(2)
     antenna.GenerateRoundEagle("RoundedAntenna")
        
-    plt.show()
-    
-__Main__()
\ No newline at end of file
+    _Pyplot().show()
+    
+#only run when started directly, the sweep worker processes import this file
+#with arguments it's the command line (CommandLine.py), without it's __Main__
+if __name__ == "__main__":
+    import sys
+    if(len(sys.argv) > 1):
+        import CommandLine
+        sys.exit(CommandLine.Run())
+    Instrument.ConfigureLogging()
+    __Main__()
\ No newline at end of file
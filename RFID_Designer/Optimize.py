@@ -0,0 +1,104 @@
+##########################################
+#Derivative free searches for the best value of an expensive function
+#every evaluation is a full antenna design so both keep the number of calls down
+#and remember every point they've already tried
+##########################################
+import numpy as nm
+
+#golden ratio step, 1/phi
+_inversePhi = (nm.sqrt(5) - 1)/2
+
+#wraps f so the same point is never worked out twice, counts the real calls
+class _Counted:
+    def __init__(self, f, resolution):
+        self.f = f
+        self.resolution = resolution
+        self.seen = {}
+        self.evaluations = 0
+
+    def __call__(self, x):
+        key = tuple(nm.round(nm.atleast_1d(x)/self.resolution).astype(nm.int64))
+        if(key not in self.seen):
+            self.evaluations += 1
+            self.seen[key] = self.f(x)
+        return self.seen[key]
+
+#golden section search for the maximum of f on [lower, upper], assumes one peak
+#stops when the bracket is narrower than tol, returns (x, f(x), evaluations)
+def GoldenSection(f, lower, upper, tol = 1e-3, maxEvaluations = 100):
+    f = _Counted(f, tol/10)
+    a, b = lower, upper
+    c = b - _inversePhi*(b - a)
+    d = a + _inversePhi*(b - a)
+    fc, fd = f(c), f(d)
+    while(b - a > tol and f.evaluations < maxEvaluations):
+        if(fc >= fd):
+            b, d, fd = d, c, fc
+            c = b - _inversePhi*(b - a)
+            fc = f(c)
+        else:
+            a, c, fc = c, d, fd
+            d = a + _inversePhi*(b - a)
+            fd = f(d)
+    #the ends are worth a look too, the best design often sits on a limit
+    candidates = [(fc, c), (fd, d), (f(lower), lower), (f(upper), upper)]
+    best = max(candidates, key=lambda candidate: candidate[0])
+    return best[1], best[0], f.evaluations
+
+#Nelder-Mead simplex search for the maximum of f over the box lower..upper,
+#f takes an array of parameters and anything outside the box is clipped back onto it
+#stops when every side of the simplex is shorter than tol or after maxEvaluations
+#returns (x, f(x), evaluations)
+def NelderMead(f, x0, lower, upper, step, tol = 1e-3, maxEvaluations = 200):
+    lower = nm.asarray(lower, dtype=float)
+    upper = nm.asarray(upper, dtype=float)
+    counted = _Counted(f, tol/10)
+    def F(x):
+        return counted(nm.clip(x, lower, upper))
+
+    x0 = nm.clip(nm.asarray(x0, dtype=float), lower, upper)
+    #starting simplex, one step along every axis, pointed back into the box at an edge
+    simplex = [x0]
+    for i in range(0,len(x0)):
+        x = x0.copy()
+        x[i] += step[i] if x[i] + step[i] <= upper[i] else -step[i]
+        simplex.append(x)
+    simplex = nm.array(simplex)
+    values = nm.array([F(x) for x in simplex])
+
+    while(counted.evaluations < maxEvaluations):
+        #best first
+        order = nm.argsort(-values)
+        simplex = simplex[order]
+        values = values[order]
+        if(nm.all(nm.ptp(simplex, axis=0) < tol)):
+            break
+
+        centroid = nm.mean(simplex[:-1], axis=0)
+        reflected = nm.clip(2*centroid - simplex[-1], lower, upper)
+        fr = F(reflected)
+        if(fr > values[0]):
+            expanded = nm.clip(3*centroid - 2*simplex[-1], lower, upper)
+            fe = F(expanded)
+            if(fe > fr):
+                simplex[-1], values[-1] = expanded, fe
+            else:
+                simplex[-1], values[-1] = reflected, fr
+        elif(fr > values[-2]):
+            simplex[-1], values[-1] = reflected, fr
+        else:
+            #contract towards the better of the worst point and its reflection
+            if(fr > values[-1]):
+                contracted = (centroid + reflected)/2
+            else:
+                contracted = (centroid + simplex[-1])/2
+            fk = F(contracted)
+            if(fk > max(fr, values[-1])):
+                simplex[-1], values[-1] = contracted, fk
+            else:
+                #nothing better nearby, shrink everything towards the best point
+                simplex[1:] = (simplex[0] + simplex[1:])/2
+                values[1:] = [F(x) for x in simplex[1:]]
+
+    best = nm.argmax(values)
+    return nm.clip(simplex[best], lower, upper), values[best], counted.evaluations
@@ -0,0 +1,178 @@
+##########################################
+#Precomputed coupling field of a fixed reader antenna
+#every term of Antenna.Mutual between a reader trace and a tag trace comes down to a
+#function of where the two ends of the tag trace sit, so the sum of it over all the
+#reader's traces is worked out once on a grid and kept memory mapped on disk
+#a tag's coupling is then two lookups per tag trace instead of a kernel call
+#for every reader x tag trace pair, AntennaModule.UseReaderField(ReaderField(...))
+#makes Antenna.Mutual use it for every tag that fits
+##########################################
+import Antenna as AntennaModule
+import numpy as nm
+import Instrument
+import hashlib
+import os
+
+#bump this whenever the table is worked out differently, old tables are ignored
+fieldVersion = 1
+#the table is worked out in this, the corners of Grover's formula cancel down to a tiny
+#fraction of themselves so longdouble is a lot more accurate but slower
+buildPrecision = nm.float64
+
+#sign of the x/z corners of Grover's formula, the y corners are taken apart in _Potential
+_cornerSign = nm.power(-1,nm.indices((4,4)).sum(axis=0)).astype(nm.int8)
+
+#Grover's formula summed over the x and z corners for one end u of the second bar:
+#the kernel is _Potential(l_3 + l_2) - _Potential(l_3) with the first bar's own ends
+#(u and u - l_1) already taken, see AntennaModule._GroverSum, broadcasts, all in cm
+def _Potential(E, u, P, a, b, c, d, l_1):
+    x = nm.stack(nm.broadcast_arrays(E-a, E+d-a, E+d, E), axis=-1)[...,:,None]
+    z = nm.stack(nm.broadcast_arrays(P-b, P+c-b, P+c, P), axis=-1)[...,None,:]
+    u = nm.asarray(u)[...,None,None]
+    l_1 = nm.asarray(l_1)[...,None,None]
+    H = _cornerSign*(AntennaModule.GroverMb(x, u, z) - AntennaModule.GroverMb(x, u - l_1, z))
+    return nm.sum(H, axis=(-2,-1))*(0.001/(a*b*c*d))
+
+#the along/across/z middle (cm) of every trace, measured the way RelativePosition does
+#for pairs with a trace pointing along y (alongY) or x
+def _Frame(table, alongY):
+    middle = (table.start + table.stop)/20
+    if(alongY):
+        return middle[:,1], middle[:,0], middle[:,2]
+    return middle[:,0], middle[:,1], middle[:,2]
+
+class ReaderField:
+    #the field of readAnt for tags of traceWidth x traceHeight (mm) traces and no bigger than
+    #size (mm) either way, at offsets minXY..maxXY (mm) with layers zs (mm) above the reader,
+    #for a tag at zOffset that's zOffset + thickness*layer for every layer
+    #step is the grid spacing (mm), the table is stored in path under a hash of all of it
+    def __init__(self, readAnt, minXY, maxXY, zs, size, traceWidth,
+                 traceHeight = AntennaModule.conductor_thickness, step = 0.5,
+                 path = "Output/field"):
+        self.readAnt = readAnt
+        self.reader = readAnt.traces
+        self.step = step/10
+        self.width = traceWidth/10
+        self.height = traceHeight/10
+        #offsets move the middle of every tag trace, which can be anywhere in the tag,
+        #and the ends of a trace are up to size before its middle
+        self.origin = nm.array([minXY[0] - step, minXY[1] - size - step])/10
+        self.shape = (int(nm.ceil((maxXY[0] - minXY[0] + size)/step)) + 3,
+                      int(nm.ceil((maxXY[1] - minXY[1] + 2*size)/step)) + 3)
+        self.zs = nm.unique(nm.asarray(zs, dtype=float))/10
+
+        #the reader traces split up by which half of the tag they pair with (i%2)
+        #and the direction they point, which sets the frame the kernel works in
+        parity = nm.arange(len(self.reader))%2
+        alongY = (self.reader.start[:,0] == self.reader.stop[:,0])
+        self.groups = [(p, y, nm.nonzero((parity == p) & (alongY == y))[0])
+                       for p in (0,1) for y in (False,True)]
+        self.groups = [group for group in self.groups if len(group[2])]
+
+        self.path = path
+        self.fileName = os.path.join(path, self.Key() + ".npy")
+        self.table = self._Load()
+
+    #hash of everything that goes into the table
+    def Key(self):
+        key = hashlib.sha1()
+        key.update(repr((fieldVersion, self.step, self.width, self.height, tuple(self.origin),
+                         self.shape, tuple(self.zs), nm.dtype(buildPrecision).name)).encode("ascii"))
+        for array in (self.reader.start, self.reader.stop, self.reader.width, self.reader.height):
+            key.update(nm.ascontiguousarray(array, dtype=nm.float64).tobytes())
+        return key.hexdigest()
+
+    #the table memory mapped from disk, worked out first if it isn't there yet
+    def _Load(self):
+        if(not os.path.exists(self.fileName)):
+            os.makedirs(self.path, exist_ok=True)
+            #write to a temporary file first so other processes never see half a table
+            temp = self.fileName + "." + str(os.getpid()) + ".tmp"
+            with Instrument.Stage("reader field build"):
+                table = nm.lib.format.open_memmap(temp, mode="w+", dtype=nm.float64,
+                                                  shape=(len(self.groups), len(self.zs)) + self.shape)
+                self._Build(table)
+                table.flush()
+                del table
+            os.replace(temp, self.fileName)
+        return nm.load(self.fileName, mmap_mode="r")
+
+    #the sum of _Potential over the reader traces of every group at every grid point
+    def _Build(self, table, chunk = 1<<18):
+        s = self.origin[0] + self.step*nm.arange(self.shape[0])
+        t = self.origin[1] + self.step*nm.arange(self.shape[1])
+        reader = self.reader
+        for g, (parity, alongY, index) in enumerate(self.groups):
+            along, across, z = _Frame(reader, alongY)
+            along, across, z = along[index,None,None], across[index,None,None], z[index,None,None]
+            a = reader.width[index,None,None]
+            b = reader.height[index,None,None]
+            l_1 = reader.length[index,None,None]
+            rows = max(1, chunk//(len(index)*self.shape[1]))
+            with AntennaModule.Precision(buildPrecision):
+                for k, height in enumerate(self.zs):
+                    for n in range(0,self.shape[0],rows):
+                        E = (along - s[None,n:n+rows,None]).astype(buildPrecision)
+                        u = (across - t[None,None,:]).astype(buildPrecision)
+                        H = _Potential(E, u, z - height, a, b, self.height, self.width, l_1)
+                        table[g,k,n:n+rows] = nm.sum(H, axis=0)
+
+    #does the table work for the pair of trace tables Antenna.Mutual was given
+    def Matches(self, table, other):
+        return (table is self.reader and len(other) > 0 and
+                nm.allclose(other.width, self.width) and nm.allclose(other.height, self.height))
+
+    #the table at (s, t, z) (cm) in group g, bilinear in s and t and linear between
+    #z planes, nan anywhere off the table
+    def _Lookup(self, g, s, t, z):
+        i = (s - self.origin[0])/self.step
+        j = (t - self.origin[1])/self.step
+        k = nm.interp(z, self.zs, nm.arange(len(self.zs)), left=nm.nan, right=nm.nan)
+        inside = ((i >= 0) & (i <= self.shape[0] - 1) & (j >= 0) & (j <= self.shape[1] - 1) &
+                  nm.isfinite(k))
+        i0 = nm.clip(nm.floor(nm.where(inside, i, 0)).astype(int), 0, self.shape[0] - 2)
+        j0 = nm.clip(nm.floor(nm.where(inside, j, 0)).astype(int), 0, self.shape[1] - 2)
+        k0 = nm.clip(nm.floor(nm.where(inside, k, 0)).astype(int), 0, max(len(self.zs) - 2, 0))
+        k1 = nm.minimum(k0 + 1, len(self.zs) - 1)
+        fi, fj, fk = i - i0, j - j0, nm.where(inside, k, 0) - k0
+        plane = self.table[g]
+        def Bilinear(k):
+            return ((1-fi)*(1-fj)*plane[k,i0,j0] + fi*(1-fj)*plane[k,i0+1,j0] +
+                    (1-fi)*fj*plane[k,i0,j0+1] + fi*fj*plane[k,i0+1,j0+1])
+        value = (1-fk)*Bilinear(k0) + fk*Bilinear(k1)
+        return nm.where(inside, value, nm.nan)
+
+    #Antenna.Mutual between the reader and the tag traces other at the flat arrays of
+    #offsets (mm), returns (M, covered), M is only good where covered is True
+    def Interpolate(self, other, zOffset, xOffset, yOffset):
+        zOffset, xOffset, yOffset = [nm.asarray(v, dtype=float)[:,None] for v in (zOffset, xOffset, yOffset)]
+        parity = nm.arange(len(other))%2
+        M = nm.zeros(len(zOffset))
+        with Instrument.Stage("reader field lookup"):
+            for g, (p, alongY, index) in enumerate(self.groups):
+                half = (parity == p)
+                along, across, z = _Frame(other, alongY)
+                s = along[half] + xOffset/10
+                t = across[half] + yOffset/10
+                z = z[half] + zOffset/10
+                #the kernel measures both ends of the tag trace from the reader trace
+                M += nm.sum(self._Lookup(g, s, t - other.length[half], z) -
+                            self._Lookup(g, s, t, z), axis=-1)
+        covered = nm.isfinite(M)
+        Instrument.Count("reader field", nm.count_nonzero(covered))
+        return M, covered
+
+    #largest relative difference between the table and the exact Antenna.Mutual
+    #for testAnt at the given offsets, nan if none of them are on the table
+    def Check(self, testAnt, zOffset = 20, xOffset = 0, yOffset = 0):
+        zOffset, xOffset, yOffset = [v.reshape(-1) for v in nm.broadcast_arrays(zOffset, xOffset, yOffset)]
+        M, covered = self.Interpolate(testAnt.traces, zOffset, xOffset, yOffset)
+        if(not nm.any(covered)):
+            return nm.nan
+        previous = AntennaModule.readerField
+        AntennaModule.readerField = None
+        try:
+            exact = self.readAnt.Mutual(testAnt, zOffset[covered], xOffset[covered], yOffset[covered])
+        finally:
+            AntennaModule.readerField = previous
+        return float(nm.max(nm.abs(M[covered] - exact)/nm.abs(exact)))
@@ -0,0 +1,132 @@
+##########################################
+#Streaming store for sweep results
+#rows are written as they come in to a folder of .npy chunks so nothing is lost
+#if a sweep dies, and the chunks can be memory mapped and filtered without
+#loading the whole sweep (even while it's still running)
+##########################################
+import numpy as nm
+import Instrument
+import time
+import os
+
+#one row per evaluated design
+resultDtype = nm.dtype([("layers", nm.int32), ("width", nm.float64), ("length", nm.float64),
+                        ("turns", nm.int32), ("gap", nm.float64), ("traceWidth", nm.float64),
+                        ("Q", nm.float64), ("K", nm.float64), ("R_t", nm.float64),
+                        ("N", nm.float64)])
+
+def _ChunkName(index):
+    return "chunk" + str(index).zfill(6) + ".npy"
+
+#list of the finished chunk files in a store, in the order they were written
+def _ChunkFiles(path):
+    return sorted(name for name in os.listdir(path)
+                  if name.startswith("chunk") and name.endswith(".npy"))
+
+#appends rows to a results folder, a chunk is written every chunkRows rows
+#or every flushSeconds, whichever comes first
+#opening an existing folder carries on after the chunks already in it
+class ResultWriter:
+    def __init__(self, path, chunkRows = 4096, flushSeconds = 60):
+        self.path = path
+        self.flushSeconds = flushSeconds
+        os.makedirs(self.path, exist_ok=True)
+        self._buffer = nm.zeros(chunkRows, dtype=resultDtype)
+        self._count = 0
+        self._chunk = len(_ChunkFiles(self.path))
+        self._lastFlush = time.time()
+        #rows in the store, including any chunks that were already there
+        self.rows = sum(len(nm.load(os.path.join(self.path, name), mmap_mode="r"))
+                        for name in _ChunkFiles(self.path))
+
+    #row is (layers, width, length, turns, gap, traceWidth, Q, K, R_t, N)
+    def Append(self, row):
+        self._buffer[self._count] = tuple(row)
+        self._count += 1
+        self.rows += 1
+        if(self._count == len(self._buffer) or
+           time.time() - self._lastFlush > self.flushSeconds):
+            self.Flush()
+
+    #write out whatever is buffered as a new chunk
+    def Flush(self):
+        self._lastFlush = time.time()
+        if(self._count == 0):
+            return
+        fileName = os.path.join(self.path, _ChunkName(self._chunk))
+        #readers only ever see complete chunks
+        temp = fileName + ".tmp"
+        with Instrument.Stage("result store write"):
+            with open(temp, "wb") as output:
+                nm.save(output, self._buffer[:self._count])
+            os.replace(temp, fileName)
+        self._chunk += 1
+        self._count = 0
+
+    #throw away everything after the first rows rows, used when picking a sweep
+    #back up from a checkpoint so rows from half finished work aren't kept twice
+    def Truncate(self, rows):
+        self._count = 0
+        kept = 0
+        for name in _ChunkFiles(self.path):
+            fileName = os.path.join(self.path, name)
+            chunk = nm.load(fileName)
+            if(kept >= rows):
+                os.remove(fileName)
+            elif(kept + len(chunk) > rows):
+                temp = fileName + ".tmp"
+                with open(temp, "wb") as output:
+                    nm.save(output, chunk[:rows-kept])
+                os.replace(temp, fileName)
+            kept += len(chunk)
+        self._chunk = len(_ChunkFiles(self.path))
+        self.rows = min(rows, kept)
+
+    def Close(self):
+        self.Flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.Close()
+
+#reads a results folder, every chunk is memory mapped so only the rows that are
+#used get pulled off the disk
+class ResultReader:
+    def __init__(self, path):
+        self.path = path
+
+    #memory mapped arrays of every finished chunk, new chunks show up on the next call
+    def Chunks(self):
+        return [nm.load(os.path.join(self.path, name), mmap_mode="r")
+                for name in _ChunkFiles(self.path)]
+
+    def __len__(self):
+        return sum(len(chunk) for chunk in self.Chunks())
+
+    #rows matching every condition, a condition is field = value or field = (min, max)
+    #with None for an open end, where is an optional function of a chunk returning a mask
+    #Select(layers = 2, K = (0.3, None))
+    def Select(self, where = None, **conditions):
+        selected = []
+        for chunk in self.Chunks():
+            mask = nm.ones(len(chunk), dtype=bool)
+            for field, value in conditions.items():
+                if(isinstance(value, tuple)):
+                    if(value[0] is not None):
+                        mask &= chunk[field] >= value[0]
+                    if(value[1] is not None):
+                        mask &= chunk[field] <= value[1]
+                else:
+                    mask &= chunk[field] == value
+            if(where is not None):
+                mask &= where(chunk)
+            selected.append(nm.array(chunk[mask]))
+        if(not selected):
+            return nm.zeros(0, dtype=resultDtype)
+        return nm.concatenate(selected)
+
+    #the whole store in memory, only for small sweeps
+    def All(self):
+        return self.Select()
@@ -0,0 +1,130 @@
+##########################################
+#Cheap estimates of a tag antenna's L, R and coupling to the reader
+#every trace is treated as a filament (Antenna.FilamentKernel) instead of a bar and
+#every turn count of a design is read off one matrix, a couple of orders of magnitude
+#cheaper than the PEEC calculation and good enough to rank the designs of a sweep
+#so only the promising ones get worked out in full
+##########################################
+import Antenna as AntennaModule
+import numpy as nm
+
+#each layer of Antenna.DesignAntenna adds up the resistance of every trace designed
+#so far, so m layers come out as 1+2+...+m times the resistance of one layer
+def LayerFactor(layers):
+    layers = nm.asarray(layers)
+    return layers*(layers+1)/2
+
+#start/stop (mm) of the four traces of each of the given turns, laid out the same way as
+#Antenna.TurnTraces, width/length/gap/traceWidth broadcast against each other and
+#the result has their shape + (len(turns), 4, 3)
+def SpiralTraces(width, length, gap, traceWidth, turns, z = 0, clockwise = 1):
+    width, length, gap, traceWidth = [nm.asarray(v, dtype=float)[...,None]
+                                      for v in (width, length, gap, traceWidth)]
+    turns = nm.asarray(turns)
+    delta = gap + traceWidth
+    #corners of every turn
+    inner = (turns+1)*delta
+    outer = turns*delta
+    def Corner(x, y):
+        return nm.stack(nm.broadcast_arrays(x, y, nm.full(nm.shape(x), z, dtype=float),
+                                            width, length, delta)[:3], axis=-1)
+    corners = [Corner(outer, outer),
+               Corner(width-outer, outer),
+               Corner(width-outer, length-outer),
+               Corner(inner, length-outer),
+               Corner(inner, inner)]
+    if(clockwise == 1):
+        order = [0, 1, 2, 3]
+    else:
+        order = [0, 3, 2, 1]
+    start = nm.stack([corners[side] for side in order], axis=-2)
+    stop = nm.stack([corners[side+1] for side in order], axis=-2)
+    return start, stop
+
+#inductance (uH) of every tag with 1..turnCount turns and 1..layers layers, added up the
+#same way as Antenna.DesignAntenna from a partial inductance matrix where every pair
+#of traces is shrunk down to filaments (Antenna.FilamentKernel), the matrix is only
+#built once for the most turns and layers, every smaller antenna is a corner of it
+#shape of the inputs + (layers, turnCount)
+def SpiralInductance(width, length, gap, traceWidth, turnCount, layers = 1, thickness = 0.075):
+    traceWidth = nm.asarray(traceWidth, dtype=float)
+    starts = []
+    stops = []
+    for n in range(0,layers):
+        start, stop = SpiralTraces(width, length, gap, traceWidth, nm.arange(0,turnCount),
+                                   thickness*n, nm.power(-1,n))
+        starts.append(start.reshape(start.shape[:-3] + (4*turnCount,3)))
+        stops.append(stop.reshape(stop.shape[:-3] + (4*turnCount,3)))
+    start = nm.concatenate(starts, axis=-2)
+    stop = nm.concatenate(stops, axis=-2)
+    lengths = nm.sqrt(nm.sum(nm.square(stop - start), axis=-1))/10
+    width_cm = traceWidth[...,None,None]/10
+    height_cm = AntennaModule.conductor_thickness/10
+    
+    #same signs as Antenna.PartialInductanceMatrix, from each trace's place in its turn
+    direction = AntennaModule._currentDirection[nm.arange(4*turnCount*layers)%4]
+    sign = direction @ direction.T
+    E, l_3, P = AntennaModule.RelativePosition(start[...,:,None,:], stop[...,:,None,:],
+                                               start[...,None,:,:], stop[...,None,:,:])
+    M = sign*AntennaModule.FilamentKernel(E, l_3, P, width_cm, height_cm, height_cm, width_cm,
+                                          lengths[...,:,None], lengths[...,None,:])
+    #designs too small for their turns have traces of length <= 0, they come out nan
+    #and get thrown out by the caller
+    with nm.errstate(divide='ignore', invalid='ignore'):
+        selfL = AntennaModule.TraceInductance(lengths, traceWidth[...,None]/10, height_cm)
+    diagonal = nm.arange(M.shape[-1])
+    M[...,diagonal,diagonal] = selfL
+    
+    #sum of the first 4n traces of layer p against the first 4n of layer q for every n
+    #each layer against itself only counts the upper triangle, pairs are counted once
+    block = 4*turnCount
+    corner = 4*nm.arange(1,turnCount+1) - 1
+    def BlockSums(p, q):
+        B = M[...,p*block:(p+1)*block,q*block:(q+1)*block]
+        if(p == q):
+            B = nm.triu(B)
+        B = nm.cumsum(nm.cumsum(B, axis=-1), axis=-2)
+        return B[...,corner,corner]
+    #each layer designed adds up everything designed so far
+    L = []
+    everything = 0
+    for k in range(0,layers):
+        everything = everything + BlockSums(k, k)
+        for p in range(0,k):
+            everything = everything + BlockSums(p, k)
+        L.append(everything)
+    return nm.cumsum(nm.stack(L, axis=-2), axis=-2)
+
+#resistance of the first 1..turnCount turns of a single layer spiral, the traces are
+#straight so this is exact, shape of the inputs + (turnCount,)
+def SpiralResistance(width, length, gap, traceWidth, turnCount):
+    start, stop = SpiralTraces(width, length, gap, traceWidth, nm.arange(0,turnCount))
+    lengths = nm.sqrt(nm.sum(nm.square(stop - start), axis=-1))
+    R = AntennaModule.TraceResistance(lengths/10, nm.asarray(traceWidth)[...,None,None]/10,
+                                      AntennaModule.conductor_thickness/10)
+    return nm.cumsum(nm.sum(R, axis=-1), axis=-1)
+
+#mutual inductance (uH) between readAnt and every tag with 1..turnCount turns and
+#1..layers layers, summed the same way as Antenna.Mutual but with every trace
+#shrunk down to a filament (Antenna.FilamentKernel), each turn is only worked out once
+#shape of the inputs + (layers, turnCount)
+def SpiralMutual(readAnt, width, length, gap, traceWidth, turnCount, layers = 1,
+                 zOffset = 20, xOffset = 0, yOffset = 0, thickness = 0.075):
+    reader = readAnt.traces
+    #Antenna.Mutual pairs up the traces by index parity, each turn is 4 traces
+    parallel = (nm.arange(4)%2)[:,None] == (nm.arange(len(reader))%2)[None,:]
+    perLayer = []
+    for n in range(0,layers):
+        start, stop = SpiralTraces(width, length, gap, traceWidth, nm.arange(0,turnCount),
+                                   thickness*n, nm.power(-1,n))
+        start = start[...,None,:]
+        stop = stop[...,None,:]
+        E, l_3, P = AntennaModule.RelativePosition(reader.start, reader.stop, start, stop,
+                                                   zOffset, xOffset, yOffset)
+        tagLength = nm.sqrt(nm.sum(nm.square(stop - start), axis=-1))/10
+        M = AntennaModule.FilamentKernel(E, l_3, P, reader.width, reader.height,
+                                         AntennaModule.conductor_thickness/10,
+                                         nm.asarray(traceWidth)[...,None,None,None]/10,
+                                         reader.length, tagLength)
+        perLayer.append(nm.cumsum(nm.sum(M*parallel, axis=(-2,-1)), axis=-1))
+    return nm.cumsum(nm.stack(perLayer, axis=-2), axis=-2)
@@ -0,0 +1,5 @@
+#python RFID_Designer <command> ..., see CommandLine.py
+import CommandLine
+import sys
+
+sys.exit(CommandLine.Run())
@@ -0,0 +1,7 @@
+#the designer is a folder of flat modules (import Antenna, import Main, ...) so it goes
+#on the path the same way running python RFID_Designer puts it there
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "RFID_Designer"))
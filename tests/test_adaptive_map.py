@@ -0,0 +1,33 @@
+#the adaptive map against working out every point of the same grid
+import os
+
+import numpy as nm
+import pytest
+
+import Main
+from Antenna import Antenna
+
+def _Designed(width, length, turns, gap, traceWidth, layers = 2):
+    ant = Antenna(width, length, turns, gap, traceWidth)
+    ant.DesignAntenna(layers)
+    ant.Q = 30
+    return ant
+
+#tolerance only bounds the middle of every cell against its corners, the bilinear fill
+#in between stays within twice that of the largest R_t
+@pytest.mark.parametrize("tolerance, share", [(0.01, 0.25), (0.03, 0.12)])
+def test_adaptive_map_error(tmp_path, monkeypatch, tolerance, share):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("Output")
+    readAnt = _Designed(80,60,4,0.3,1)
+    testAnt = _Designed(30,20,3,0.3,0.5)
+    samples, X, Y, Z = Main.AdaptiveOffsetMap(readAnt, testAnt, [-10,-10], [70,50], 2, 16,
+                                              tolerance)
+    full = Main.offsetMap(readAnt, testAnt, [X.min(),Y.min()], [X.max()+1,Y.max()+1], 2,
+                          symmetry = False)
+    assert Z.shape == full.shape
+    assert nm.max(nm.abs(Z - full)) < 2*tolerance*nm.max(full)
+    assert len(samples) < share*Z.size
+    #the points worked out are exact
+    sampled = nm.isin(X + 1j*Y, samples[:,0] + 1j*samples[:,1])
+    assert nm.allclose(Z[sampled], full[sampled], rtol=1e-9, atol=0)
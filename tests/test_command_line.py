@@ -0,0 +1,70 @@
+#every subcommand hands its options to the function it runs the way they're documented
+import os
+
+import numpy as nm
+import pytest
+
+import Benchmark
+import CommandLine
+import Main
+
+@pytest.fixture
+def work(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+def _Capture(monkeypatch, module, name):
+    calls = []
+    def Captured(*args, **kwargs):
+        calls.append((args, kwargs))
+    monkeypatch.setattr(module, name, Captured)
+    return calls
+
+def test_sweep(work, monkeypatch):
+    calls = _Capture(monkeypatch, Main, "Iterate")
+    assert CommandLine.Run(["sweep", "--width", "10", "30", "10", "--turns", "1", "4",
+                            "--layers", "2", "--workers", "3", "--no-cache", "--no-checkpoint",
+                            "--screen", "2"]) == 0
+    args, kwargs = calls[0]
+    assert args == ([10,30,10], [8,9,1], [1,4], [0.15,1.65,0.1], 2)
+    assert kwargs["workers"] == 3 and kwargs["plotWorkers"] == 3
+    assert kwargs["cache"] is None and kwargs["checkpoint"] is None
+    assert kwargs["screen"] == 2 and kwargs["profile"] is False and kwargs["plot"] is False
+    assert os.path.isdir("Output")
+
+def test_optimize(work, monkeypatch):
+    calls = _Capture(monkeypatch, Main, "OptimizeSweep")
+    CommandLine.Run(["optimize", "--objective", "K", "--gap", "0.2", "--tol", "0.05"])
+    assert calls[0][0] == ([10,45,5], [8,9,1], [1,11], 1, "K", 0.05, 0.2, 1, None)
+
+def test_map(work, monkeypatch):
+    assert CommandLine.Run(["map", "--tag", "20", "15", "2", "0.3", "0.5", "1",
+                            "--min", "0", "0", "--max", "21", "11", "--step", "10"]) == 0
+    with nm.load("Output/R_tMap-1.npz") as saved:
+        assert saved["Z"].shape == (2,3)
+        assert nm.all(saved["Z"] > 0)
+    calls = _Capture(monkeypatch, Main, "offsetMap")
+    CommandLine.Run(["map", "--tag", "20", "15", "2", "0.3", "0.5", "1", "--no-symmetry"])
+    assert calls[0][1]["symmetry"] is False
+    calls = _Capture(monkeypatch, Main, "poseMap")
+    CommandLine.Run(["map", "--tag", "20", "15", "2", "0.3", "0.5", "1", "--pose", "--unsigned",
+                     "--offset", "5", "6", "--z-angle", "45"])
+    assert calls[0][0][5:] == (-1, 20, 5, 6, 45, False)
+    #too many turns for the size
+    assert CommandLine.Run(["map", "--tag", "5", "5", "20", "0.3", "0.5", "1"]) == 1
+
+def test_export(work):
+    with open("designs.txt", "w") as designFile:
+        designFile.write("w=8 l=10 n=2 g=0.15 w=1.8 N=1 L=0.0242305494813 R=0.02592\n")
+    assert CommandLine.ReadDesigns("designs.txt") == [[8.0, 10.0, 2, 0.15, 1.8, 1]]
+    CommandLine.Run(["export", "--designs", "designs.txt", "--design", "20", "15", "2", "0.3",
+                     "0.5", "2", "--format", "scr", "svg", "--name", "out/Best"])
+    #named width x length x layers _ place in the list, --design ones first
+    assert sorted(os.listdir("Output/out")) == ["Best20.0x15.0x2_0.scr", "Best20.0x15.0x2_0.svg",
+                                                "Best8.0x10.0x1_1.scr", "Best8.0x10.0x1_1.svg"]
+
+def test_bench_exit_code(work, monkeypatch):
+    monkeypatch.setattr(Benchmark, "Benchmark", lambda output, quick, repeat: {"passed": False})
+    assert CommandLine.Run(["bench", "--quick"]) == 1
+    with pytest.raises(SystemExit):
+        CommandLine.Run([])
@@ -0,0 +1,68 @@
+#the coupling matrix of a set of antennas against summing their trace pairs one antenna
+#pair at a time, and the stack modes that come out of it
+import numpy as nm
+import pytest
+
+import Antenna as AntennaModule
+import Frequency
+from Antenna import Antenna
+
+def _Designed(width, length, turns, gap, traceWidth, layers = 2):
+    ant = Antenna(width, length, turns, gap, traceWidth)
+    ant.DesignAntenna(layers)
+    return ant
+
+#every parallel trace pair between two antennas, signed by their current directions
+def _SignedMutual(table, other, offset):
+    sign = table.direction @ other.direction.T
+    i, j = nm.nonzero(sign)
+    dx, dy, dz = offset
+    E, l_3, P = AntennaModule.RelativePosition(table.start[i], table.stop[i],
+                                               other.start[j], other.stop[j], dz, dx, dy)
+    L = AntennaModule.GroverKernel(E, l_3, P, table.width[i], table.height[i], other.height[j],
+                                   other.width[j], table.length[i], other.length[j])
+    return nm.sum(sign[i,j]*L)
+
+def test_coupling_matrix_matches_pairwise_sum():
+    antennas = [_Designed(30,20,3,0.3,0.5), _Designed(30,20,3,0.3,0.5),
+                _Designed(25,25,2,0.3,0.8,1)]
+    layouts = nm.array([[[0,0,0], [0,0,2], [5,-3,4]],
+                        [[0,0,0], [10,5,1], [-20,0,6]]], dtype=float)
+    M = AntennaModule.CouplingMatrix(antennas, layouts)
+    assert M.shape == (2,3,3)
+    for layout, matrix in zip(layouts, M):
+        assert nm.allclose(matrix, matrix.T, rtol=0, atol=0)
+        assert nm.allclose(nm.diagonal(matrix), [nm.sum(antenna.partialL) for antenna in antennas])
+        for i in range(0,3):
+            for j in range(i+1,3):
+                reference = _SignedMutual(antennas[i].traces, antennas[j].traces,
+                                          layout[j] - layout[i])
+                assert matrix[i,j] == pytest.approx(reference, rel=1e-6)
+    #one layout on its own comes back (N,N)
+    assert nm.allclose(AntennaModule.CouplingMatrix(antennas, layouts[0]), M[0], rtol=1e-12)
+
+#two alike tags closing in couple more and more tightly but never past 1
+def test_coupling_stays_below_one():
+    tag = _Designed(30,20,3,0.3,0.5)
+    gaps = nm.array([5, 1, 0.1, 0.01])
+    layouts = nm.zeros((len(gaps),2,3))
+    layouts[:,1,2] = gaps
+    k = AntennaModule.CouplingCoefficients(AntennaModule.CouplingMatrix([tag, tag], layouts))[:,0,1]
+    assert nm.all(nm.diff(k) > 0)
+    assert nm.all(k < 1)
+    assert k[-1] > 0.99
+    #a one and a two layer tag on top of each other too
+    single = _Designed(30,20,3,0.3,0.5,1)
+    k = AntennaModule.CouplingCoefficients(AntennaModule.CouplingMatrix([tag, single],
+                                                                        [[0,0,0],[0,0,1]]))
+    assert nm.all(nm.abs(k[~nm.eye(2, dtype=bool)]) < 1)
+
+#three tags 1mm apart split into three modes either side of the frequency they're tuned to
+def test_stack_modes():
+    tags = [_Designed(30,20,3,0.3,0.5) for n in range(0,3)]
+    M = AntennaModule.CouplingMatrix(tags, [[0,0,0],[0,0,1],[0,0,2]])
+    k = AntennaModule.CouplingCoefficients(M)
+    assert nm.all(nm.abs(k[~nm.eye(3, dtype=bool)]) < 1)
+    modes = Frequency.StackModes(M)
+    assert nm.all(nm.isfinite(modes))
+    assert modes[0] < Frequency.f_0 < modes[-1]
@@ -0,0 +1,50 @@
+#a design out of the cache is the design worked out from scratch, and the cache stays
+#inside its size by dropping what was used longest ago
+import os
+
+import numpy as nm
+import pytest
+
+import Antenna as AntennaModule
+from Antenna import Antenna
+from DesignCache import DesignCache
+
+@pytest.fixture
+def cache(tmp_path):
+    previous = AntennaModule.designCache
+    yield AntennaModule.UseDesignCache(str(tmp_path/"cache"))
+    AntennaModule.designCache = previous
+
+def _Designed(layers):
+    ant = Antenna(30,20,3,0.3,0.5)
+    ant.DesignAntenna(layers)
+    return ant
+
+@pytest.mark.parametrize("layers", [1,2])
+def test_cached_design_matches_fresh(cache, layers):
+    stored = _Designed(layers)
+    cached = _Designed(layers)
+    assert (cache.hits, cache.misses) == (1, 1)
+    AntennaModule.UseDesignCache(None)
+    fresh = _Designed(layers)
+    assert cached.L == fresh.L and cached.R == fresh.R
+    assert nm.array_equal(cached.partialL, fresh.partialL)
+    for field, values in fresh.traces.Arrays().items():
+        assert nm.array_equal(cached.traces.Arrays()[field], values)
+    assert cached.layer == stored.layer == layers
+
+#four entries where three fit, the oldest two go but not the one read since
+def test_eviction(tmp_path):
+    cache = DesignCache(str(tmp_path/"cache"))
+    entry = {"values": nm.arange(1000, dtype=float)}
+    keys = [cache.Key(n) for n in range(0,4)]
+    for n, key in enumerate(keys[:3]):
+        cache.Put(key, entry)
+        os.utime(cache._File(key), (1000*(n + 1), 1000*(n + 1)))
+    assert cache.Get(keys[0]) is not None
+    size = os.path.getsize(cache._File(keys[0]))
+    cache.maxBytes = int(2.5*size)
+    cache.Put(keys[3], entry)
+    assert sorted(os.listdir(cache.path)) == sorted([keys[0] + ".npz", keys[3] + ".npz"])
+    assert cache.Get(keys[1]) is None
+    assert (cache.hits, cache.misses) == (1, 1)
@@ -0,0 +1,92 @@
+#the Eagle scripts against the ones the original GenerateEagle/GenerateRoundEagle wrote
+#(data/*.scr), and the other writers against the same geometry
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ElementTree
+
+import numpy as nm
+import pytest
+
+import Export
+from Antenna import Antenna
+
+_data = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+@pytest.fixture
+def work(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("Output")
+    return tmp_path
+
+def _Designed(width, length, turns, gap, traceWidth, layers):
+    ant = Antenna(width, length, turns, gap, traceWidth)
+    ant.DesignAntenna(layers)
+    return ant
+
+#the commands of a script without the spacing, which is all that changed
+def _Commands(fileName):
+    with open(fileName) as script:
+        return ["".join(line.split()) for line in script if line.strip()]
+
+#20x15 2 turns straight and 30x20 3 turns round topped, 1 and 2 layers
+@pytest.mark.parametrize("name, design, rounded", [
+    ("square1", (20,15,2,0.3,0.5,1), False),
+    ("square2", (20,15,2,0.3,0.5,2), False),
+    ("round1", (30,20,3,0.3,0.5,1), True),
+    ("round2", (30,20,3,0.3,0.5,2), True)])
+def test_eagle_matches_baseline(work, name, design, rounded):
+    ant = _Designed(*design)
+    if(rounded):
+        ant.GenerateRoundEagle(name)
+    else:
+        ant.GenerateEagle(name)
+    baseline = _Commands(os.path.join(_data, name + ".scr"))
+    commands = _Commands("Output/" + name + ".scr")
+    if(name == "square2"):
+        #the original stacked the second layer's traces on top of the first
+        assert commands.index("LAYER16") == 2 + len(ant.traces)//2
+        commands.remove("LAYER16")
+    assert commands == baseline
+
+#every writer draws every wire and arc of the geometry once, on the right layer
+def test_writers_match_geometry():
+    geometry = Export.RoundGeometry(_Designed(30,20,3,0.3,0.5,2), "round")
+    wires = [p for p in geometry.primitives if p[0] == "wire"]
+    arcs = [p for p in geometry.primitives if p[0] == "arc"]
+
+    svg = ElementTree.fromstring(Export.writers["svg"].Write(geometry))
+    groups = svg.findall("{http://www.w3.org/2000/svg}g")
+    assert [len(group) for group in groups] == [len(geometry.primitives)//2]*2
+    assert sum(" A " in path.get("d") for group in groups for path in group) == len(arcs)
+
+    dxf = Export.writers["dxf"].Write(geometry).split("\n")
+    assert dxf.count("POLYLINE") == len(geometry.primitives)
+    assert dxf.count("VERTEX") == 2*len(geometry.primitives)
+    assert dxf.count("42") == len(arcs)
+
+    kicad = Export.writers["kicad"].Write(geometry)
+    assert kicad.count("(fp_line") == len(wires)
+    assert kicad.count('(layer "B.Cu")') == len(geometry.primitives)//2
+    #the middle of every arc is on its half circle, counter clockwise on the board
+    for (kind, layer, width, x0, y0, x1, y1), (start, mid, end) in zip(arcs, re.findall(
+            r"fp_arc \(start ([^)]*)\) \(mid ([^)]*)\) \(end ([^)]*)\)", kicad)):
+        mid = nm.array(mid.split(), dtype=float)*[1,-1]
+        centre = nm.array([x0 + x1, y0 + y1])/2
+        assert nm.hypot(*(mid - centre)) == pytest.approx(nm.hypot(x1 - x0, y1 - y0)/2, abs=2e-3)
+        u, v = nm.array([x0, y0]) - centre, mid - centre
+        assert u[0]*v[1] - u[1]*v[0] > 0
+
+#loose files, a zip and a process pool all give the same files
+def test_export_designs(work):
+    designs = [(20,15,2,0.3,0.5,1), _Designed(30,20,3,0.3,0.5,2), (25,25,4,0.2,0.4,2)]
+    formats = ("scr", "svg", "dxf", "kicad")
+    written = Export.ExportDesigns(designs, formats, "Output/loose", "Best")
+    assert len(written) == 12
+    zipped = Export.ExportDesigns(designs, formats, name = "Best", archive = "Output/all.zip",
+                                  workers = 2, chunksize = 1)
+    with zipfile.ZipFile("Output/all.zip") as archive:
+        assert sorted(archive.namelist()) == sorted(zipped)
+        for fileName in zipped:
+            with open(os.path.join("Output/loose", fileName)) as loose:
+                assert archive.read(fileName).decode() == loose.read()
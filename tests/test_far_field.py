@@ -0,0 +1,46 @@
+#the far field expansion against the kernel, everywhere it's let take over it's within
+#the tolerance, and it does take over far enough out
+import numpy as nm
+import pytest
+
+import Antenna as AntennaModule
+from Antenna import Antenna
+
+def _Designed(width, length, turns, gap, traceWidth, layers = 2):
+    ant = Antenna(width, length, turns, gap, traceWidth)
+    ant.DesignAntenna(layers)
+    return ant
+
+@pytest.fixture
+def farField():
+    yield AntennaModule.UseFarField
+    AntennaModule.UseFarField(None)
+
+#a map 5x the size of the reader, 2 and 15mm up
+@pytest.mark.parametrize("zOffset", [2,15])
+def test_switchover_within_tolerance(farField, zOffset):
+    readAnt = _Designed(40,40,3,0.3,0.5)
+    testAnt = _Designed(20,15,3,0.3,0.5,1)
+    x, y = nm.meshgrid(nm.arange(-80,121,8.0), nm.arange(-80,121,8.0))
+    exact = readAnt.Mutual(testAnt, zOffset, x, y)
+    M, error, separation = AntennaModule.FarFieldMutual(readAnt.traces, testAnt.traces, zOffset, x, y)
+    far = (separation > 2) & (error < 1e-2*nm.abs(M))
+    assert nm.count_nonzero(far) > 0.4*far.size
+    assert nm.all(nm.abs(M - exact)[far] < 1e-2*nm.abs(exact)[far])
+    #and the error estimate is an upper bound far enough out
+    assert nm.all(nm.abs(M - exact)[far] < error[far])
+    farField(2, 1e-2)
+    tiered = readAnt.Mutual(testAnt, zOffset, x, y)
+    assert nm.allclose(tiered[~far], exact[~far], rtol=1e-12, atol=0)
+    assert nm.allclose(tiered, exact, rtol=1e-2, atol=0)
+
+#the fourth order terms are worth it, the error falls off like R^-4 (relative) not R^-2
+def test_expansion_order():
+    readAnt = _Designed(40,40,3,0.3,0.5)
+    testAnt = _Designed(20,15,3,0.3,0.5,1)
+    x = nm.array([150.0, 300.0])
+    exact = readAnt.Mutual(testAnt, 10, x, 20)
+    M = AntennaModule.FarFieldMutual(readAnt.traces, testAnt.traces, 10, x, 20)[0]
+    relative = nm.abs(M - exact)/exact
+    assert relative[0] < 1e-3
+    assert relative[1] < relative[0]/8
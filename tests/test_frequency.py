@@ -0,0 +1,85 @@
+#R(f) against textbook skin depths and Kuhn & Ibrahim's low frequency crowding, and the
+#self resonance scaling of L, R and Q
+import numpy as nm
+import pytest
+
+import Antenna as AntennaModule
+import Frequency
+from Antenna import Antenna
+
+#copper (1.68e-8 ohm m) is 65.2um deep at 1MHz and 17.7um at 13.56MHz
+def test_skin_depth():
+    assert Frequency.SkinDepth(1) == pytest.approx(0.0652, rel=1e-3)
+    assert Frequency.SkinDepth(13.56) == pytest.approx(0.0177, rel=1e-3)
+    assert Frequency.SkinDepth(0) == nm.inf
+
+def test_skin_factor_goes_to_one_at_dc():
+    #t/delta only goes down with sqrt(f), so it gets there slowly
+    assert Frequency.SkinFactor(0) == 1
+    assert Frequency.SkinFactor(1e-12) == pytest.approx(1, abs=1e-6)
+    assert Frequency.SkinFactor(1e-6) == pytest.approx(1, abs=1e-3)
+    factor = Frequency.SkinFactor([0.1, 1, 13.56, 100])
+    assert nm.all(nm.diff(factor) > 0)
+    #R = rho*l/(w*delta*(1 - e^(-t/delta))) with the copper one skin depth thick
+    assert Frequency.SkinFactor(13.56, Frequency.SkinDepth(13.56)) == pytest.approx(1/(1 - nm.exp(-1)))
+
+#f_crit = 3.1/(2*pi*mu_0)*(W + S)*rho/(W^2*t)
+def _CrowdingFrequency(traceWidth, gap, thickness = AntennaModule.conductor_thickness):
+    rho = float(AntennaModule.resistivity)*1e-3
+    W, S, t = traceWidth*1e-3, gap*1e-3, thickness*1e-3
+    return 3.1/(2*nm.pi*Frequency.mu_0)*(W + S)*rho/(W*W*t)/1e6
+
+#a spiral filled right in is what Kuhn & Ibrahim's 1 + (f/f_crit)^2/10 is for, and it
+#only holds well below f_crit
+def test_proximity_matches_kuhn_below_crossover():
+    f_crit = _CrowdingFrequency(0.5, 0.3)
+    assert 0.5 < f_crit < 2
+    f = nm.array([0.05, 0.1])*f_crit
+    factor = Frequency.ProximityFactor(f, 10, 10, 6, 0.3, 0.5)
+    coefficient = (factor - 1)/nm.square(f/f_crit)
+    assert nm.all((coefficient > 0.05) & (coefficient < 0.2))
+    #still quadratic there
+    assert coefficient[1] == pytest.approx(coefficient[0], rel=0.02)
+    assert Frequency.ProximityFactor(0, 10, 10, 6, 0.3, 0.5) == pytest.approx(1, abs=1e-12)
+
+#past the crossover the crowding grows slower than f^2 and no faster than sqrt(f), more
+#turns and more layers crowd the current more
+def test_proximity_above_crossover():
+    f = nm.array([13.56, 4*13.56])
+    factor = Frequency.ProximityFactor(f, 30, 20, 4, 0.3, 0.5)
+    assert 1.1 < factor[0] < factor[1] < 2*factor[0]
+    turns = Frequency.ProximityFactor(13.56, 30, 20, nm.array([1,2,4,6]), 0.3, 0.5)
+    assert nm.all(nm.diff(turns) > 0)
+    assert Frequency.ProximityFactor(13.56, 30, 20, 4, 0.3, 0.5, 2) > factor[0]
+
+#the filaments are fine enough at 13.56MHz for the widest traces a sweep goes to
+def test_proximity_filaments_converged(monkeypatch):
+    coarse = Frequency.ProximityFactor(13.56, 40, 40, 6, 0.15, 1.9, 2)
+    monkeypatch.setattr(Frequency, "proximityFilaments", 2*Frequency.proximityFilaments)
+    assert Frequency.ProximityFactor(13.56, 40, 40, 6, 0.15, 1.9, 2) == pytest.approx(coarse, rel=0.03)
+
+#towards f_self L goes up by 1/(1 - (f/f_self)^2), R by its square and Q comes down
+def test_self_resonance_scales_r_and_l():
+    L, R, C = 2.0, 1.5, 20.0
+    f_self = Frequency.SelfResonance(L, C)
+    f = nm.array([1e-3, 0.5, 0.8])*f_self
+    result = Frequency.Response(L, R, f, C, R_l = nm.inf)
+    scale = 1 - nm.square(f/f_self)
+    skin = Frequency.SkinFactor(f)
+    assert nm.allclose(result["L"], L/scale)
+    assert nm.allclose(result["R"], R*skin/nm.square(scale))
+    assert nm.allclose(result["Q"], 2*nm.pi*f*L*scale/(R*skin))
+
+def test_design_response():
+    designs = []
+    for turns in (2,4):
+        ant = Antenna(30, 20, turns, 0.3, 0.5)
+        ant.DesignAntenna(1)
+        designs.append(ant)
+    frequencies = [13, 13.56, 14]
+    result = Frequency.DesignResponse(designs, frequencies, [300, 1000])
+    assert result["R"].shape == (3,2,2)
+    #the DC resistance with skin effect, current crowding and the self capacitance on top
+    skin = Frequency.SkinFactor(13.56)*nm.array([design.R for design in designs])
+    assert nm.all(result["R"][1,0] > 1.1*skin)
+    assert nm.all(result["f_self"] > 14)
@@ -0,0 +1,96 @@
+#a sweep that gets stopped part way and picked back up from its checkpoint ends up with
+#the same results as one that ran straight through, and a parallel one with the same
+#results as one worker
+import multiprocessing
+import multiprocessing.pool
+import os
+
+import pytest
+
+import Antenna as AntennaModule
+import Main
+from ResultStore import ResultReader
+
+#2 x 2 cells, 3 trace widths, 1-3 turns
+_sweep = dict(width = [10,30,10], length = [10,30,10], turns = [1,4],
+              traceWidth = [0.3,1.2,0.3], cache = None, plot = False)
+
+@pytest.fixture
+def work(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("Output/scr")
+    return tmp_path
+
+def _Rows(path):
+    return [tuple(row) for row in ResultReader(path).All().tolist()]
+
+def _Best():
+    with open("TheBest.txt") as bestFile:
+        return bestFile.read()
+
+def test_interrupted_sweep_resumes(work, monkeypatch):
+    Main.Iterate(resultPath = "Output/straight", checkpoint = None, **_sweep)
+    straight = _Rows("Output/straight")
+    best = _Best()
+    assert len(straight) == 2*2*3*3
+
+    #stop it inside the third cell, every finished cell is checkpointed
+    sweepTurns = Main._SweepTurns
+    calls = []
+    def Interrupted(design):
+        calls.append(design)
+        if(len(calls) > 7):
+            raise KeyboardInterrupt
+        return sweepTurns(design)
+    monkeypatch.setattr(Main, "_SweepTurns", Interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        Main.Iterate(resultPath = "Output/resumed", checkpoint = "Output/sweep.checkpoint",
+                     checkpointSeconds = 0, **_sweep)
+    assert os.path.exists("Output/sweep.checkpoint")
+    monkeypatch.setattr(Main, "_SweepTurns", sweepTurns)
+
+    #the checkpoint knows where the results go
+    Main.Iterate(checkpoint = "Output/sweep.checkpoint", checkpointSeconds = 0, **_sweep)
+    assert not os.path.exists("Output/sweep.checkpoint")
+    assert _Rows("Output/resumed") == straight
+    assert _Best() == best
+
+#a new sweep into a folder that already has results keeps them
+def test_fresh_sweep_appends(work):
+    Main.Iterate(resultPath = "Output/results", checkpoint = None, **_sweep)
+    first = _Rows("Output/results")
+    Main.Iterate(resultPath = "Output/results", checkpoint = None, **_sweep)
+    assert _Rows("Output/results") == first + first
+
+#two workers give back the same rows and winners as one, and a sweep stopped part way doesn't leave
+#its pool running
+def test_parallel_sweep(work, monkeypatch):
+    Main.Iterate(resultPath = "Output/serial", checkpoint = None, **_sweep)
+    best = _Best()
+    pools = []
+    class Pool(multiprocessing.pool.Pool):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            pools.append(self)
+    monkeypatch.setattr(multiprocessing, "Pool", Pool)
+    Main.Iterate(resultPath = "Output/parallel", checkpoint = None, workers = 2, **_sweep)
+    assert _Rows("Output/parallel") == _Rows("Output/serial")
+    assert _Best() == best
+
+    def Interrupted(design):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(Main, "_SweepAntenna", Interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        Main.Iterate(resultPath = "Output/stopped", checkpoint = None, workers = 2, **_sweep)
+    assert len(pools) == 2
+    for pool in pools:
+        with pytest.raises(ValueError):
+            pool.map(abs, [1])
+
+#whatever design cache was in use before the sweep is back in use after it
+def test_design_cache_restored(work):
+    previous = AntennaModule.designCache
+    Main.Iterate(resultPath = "Output/results", checkpoint = None,
+                 **dict(_sweep, cache = "Output/cache"))
+    assert AntennaModule.designCache is previous
+    assert os.listdir("Output/cache")
@@ -0,0 +1,75 @@
+#Grover's kernel against the original scalar loop over the 64 corners
+import numpy as nm
+import pytest
+
+import Antenna as AntennaModule
+
+#Grover's f(x,y,z) for one corner, the way the original Trace.Mb worked it out
+def _ReferenceMb(x, y, z):
+    x2, y2, z2 = x*x, y*y, z*z
+    d = nm.sqrt(x2 + y2 + z2)
+    M_3 = (x2*x2 + y2*y2 + z2*z2 - 3*x2*y2 - 3*y2*z2 - 3*z2*x2)*d/60
+    with nm.errstate(divide='ignore', invalid='ignore'):
+        M_01 = nm.log((x + d)/nm.sqrt(y2 + z2))
+        M_11 = nm.log((y + d)/nm.sqrt(x2 + z2))
+        M_21 = nm.log((z + d)/nm.sqrt(x2 + y2))
+        #two of x, y and z at 0, only the square root term is left
+        if(not (nm.isfinite(M_01) and nm.isfinite(M_11) and nm.isfinite(M_21))):
+            return M_3
+        #one of them at 0 takes the inverse tangents to 0
+        M_4 = x*y*z*z2/6*nm.arctan(x*y/(z*d))
+        M_5 = x*y*z*y2/6*nm.arctan(x*z/(y*d))
+        M_6 = x*y*z*x2/6*nm.arctan(y*z/(x*d))
+    return (x*(y2*z2/4 - y2*y2/24 - z2*z2/24)*M_01 +
+            y*(x2*z2/4 - x2*x2/24 - z2*z2/24)*M_11 +
+            z*(x2*y2/4 - x2*x2/24 - y2*y2/24)*M_21 + M_3 - M_4 - M_5 - M_6)
+
+#the original loop over every permutation of the corners, in longdouble
+def _ReferenceKernel(E, l_3, P, a, b, c, d, l_1, l_2):
+    E, l_3, P, a, b, c, d, l_1, l_2 = [nm.longdouble(v) for v in (E, l_3, P, a, b, c, d, l_1, l_2)]
+    x = [E - a, E + d - a, E + d, E]
+    y = [l_3 - l_1, l_3 + l_2 - l_1, l_3 + l_2, l_3]
+    z = [P - b, P + c - b, P + c, P]
+    L = nm.longdouble(0)
+    for i in range(0,4):
+        for j in range(0,4):
+            for k in range(0,4):
+                L += (-1)**(i + j + k)*_ReferenceMb(x[i], y[j], z[k])
+    return float(L*0.001/(a*b*c*d))
+
+#trace width and copper thickness in cm
+_w = 0.05
+_h = 0.00175
+
+#(E, l_3, P, a, b, c, d, l_1, l_2) in cm
+_coplanar = [(0.08, 0.0, 0.0, _w, _h, _h, _w, 3.0, 3.0),
+             (0.08, 0.08, 0.0, _w, _h, _h, _w, 3.0, 2.84),
+             (0.3, 0.5, 0.0, _w, _h, _h, _w, 2.0, 1.2),
+             (0.0, 0.0, 0.0, _w, _h, _h, _w, 3.0, 3.0),
+             (0.13, 0.0, 0.0, 0.1, _h, _h, _w, 4.0, 3.0)]
+#layer above layer (0.075mm board) and a tag 2mm over a reader, these go through _TapeSum
+_stacked = [(0.0, 0.0, 0.0075 + _h, _w, _h, _h, _w, 3.0, 3.0),
+            (0.08, 0.1, -(0.0075 + _h), _w, _h, _h, _w, 3.0, 2.8),
+            (0.5, 0.3, 0.2, 0.1, _h, _h, _w, 8.0, 3.0)]
+
+#the reference loses ~1e-8 of its own to the corners cancelling, even in longdouble
+@pytest.mark.parametrize("geometry", _coplanar + _stacked)
+def test_kernel_matches_reference_loop(geometry):
+    assert AntennaModule.GroverKernel(*geometry) == pytest.approx(_ReferenceKernel(*geometry),
+                                                                  rel=1e-6)
+
+#every pair at once has to give the same as one at a time, whichever sum each one takes
+def test_kernel_broadcasts_mixed_pairs():
+    pairs = nm.array(_coplanar + _stacked)
+    L = AntennaModule.GroverKernel(*pairs.T)
+    single = [AntennaModule.GroverKernel(*pair) for pair in pairs]
+    assert nm.allclose(L, single, rtol=1e-12, atol=0)
+
+#bars apart in z come out the same from the thin tape sum and the 64 corner sum
+@pytest.mark.parametrize("geometry", _stacked)
+def test_tape_sum_matches_bar_sum(geometry):
+    args = [nm.atleast_1d(nm.longdouble(v)) for v in geometry]
+    with AntennaModule.Precision(nm.longdouble):
+        tape = AntennaModule._TapeSum(*args)
+        bar = AntennaModule._BarSum(*args)
+    assert float(tape[0]) == pytest.approx(float(bar[0]), rel=1e-6)
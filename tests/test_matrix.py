@@ -0,0 +1,54 @@
+#the partial inductance matrix and growing a coil a turn at a time, each against the plain
+#pair by pair way of working it out
+#coplanar pairs lose a few 1e-7 to the 64 corners cancelling in float64 whichever way round
+#they go through the kernel, so those compare to Benchmark's regressionTolerance
+import numpy as nm
+import pytest
+
+import Antenna as AntennaModule
+from Antenna import Antenna
+
+def _Designed(width, length, turns, gap, traceWidth, layers = 1):
+    ant = Antenna(width, length, turns, gap, traceWidth)
+    ant.DesignAntenna(layers)
+    return ant
+
+#every parallel pair through GroverMutual one at a time, both triangles, no dedupe
+def _FullPartialInductance(table):
+    sign = table.direction @ table.direction.T
+    P = nm.zeros((len(table), len(table)))
+    for i in range(0,len(table)):
+        for j in range(0,len(table)):
+            if(i == j or sign[i,j] == 0):
+                continue
+            P[i,j] = sign[i,j]*AntennaModule.GroverMutual(
+                table.start[i], table.stop[i], table.width[i], table.height[i], table.length[i],
+                table.start[j], table.stop[j], table.width[j], table.height[j], table.length[j])
+    P[nm.diag_indices(len(table))] = table.L
+    return P
+
+@pytest.mark.parametrize("layers", [1,2])
+def test_partial_inductance_matches_full_build(layers):
+    table = _Designed(20,15,3,0.3,0.5,layers).traces
+    P = AntennaModule.PartialInductanceMatrix(table)
+    assert nm.allclose(P, P.T, rtol=0, atol=0)
+    assert nm.allclose(P, _FullPartialInductance(table), rtol=1e-6, atol=0)
+
+@pytest.mark.parametrize("layers", [1,2])
+def test_add_turn_matches_designing_from_scratch(layers):
+    grown = _Designed(25,20,2,0.3,0.5,layers)
+    assert grown.AddTurn() is None
+    assert grown.AddTurn() is None
+    fresh = _Designed(25,20,4,0.3,0.5,layers)
+    assert nm.allclose(grown.traces.start, fresh.traces.start)
+    assert nm.allclose(grown.traces.stop, fresh.traces.stop)
+    assert nm.allclose(grown.partialL, fresh.partialL, rtol=1e-9, atol=1e-12)
+    assert grown.L == pytest.approx(fresh.L, rel=1e-9)
+    assert grown.R == pytest.approx(fresh.R, rel=1e-12)
+
+#a turn that doesn't fit leaves the antenna as it was
+def test_add_turn_that_does_not_fit():
+    ant = _Designed(5,5,1,0.3,1)
+    L = ant.L
+    assert ant.AddTurn() == -1
+    assert ant.turns == 1 and ant.L == L
@@ -0,0 +1,54 @@
+#the trace pair memo gives back what the kernel does, whether it's working a pair out
+#(miss) or looking it up (hit)
+import numpy as nm
+import pytest
+
+import Antenna as AntennaModule
+from Antenna import Antenna
+
+@pytest.fixture
+def memo():
+    yield AntennaModule.UseMutualMemo()
+    AntennaModule.UseMutualMemo(None)
+
+def _Designed(width, length, turns, gap, traceWidth, layers = 2):
+    ant = Antenna(width, length, turns, gap, traceWidth)
+    ant.DesignAntenna(layers)
+    return ant
+
+def test_design_hits_and_misses(memo):
+    AntennaModule.UseMutualMemo(None)
+    plain = _Designed(30,20,3,0.3,0.5)
+    memo = AntennaModule.UseMutualMemo()
+    missed = _Designed(30,20,3,0.3,0.5)
+    assert memo.misses > 0
+    hits = memo.hits
+    hit = _Designed(30,20,3,0.3,0.5)
+    assert memo.hits - hits > 0
+    for ant in (missed, hit):
+        assert nm.allclose(ant.partialL, plain.partialL, rtol=1e-9, atol=0)
+        assert ant.L == pytest.approx(plain.L, rel=1e-9)
+
+#a whole map of offsets, twice, with a memo too small to hold all of it
+def test_mutual_with_eviction(memo):
+    readAnt = _Designed(40,30,3,0.3,0.5)
+    testAnt = _Designed(20,15,2,0.3,0.5,1)
+    x, y = nm.meshgrid(nm.arange(-10,31,10.0), nm.arange(-10,21,10.0))
+    AntennaModule.UseMutualMemo(None)
+    exact = readAnt.Mutual(testAnt, 5, x, y)
+    memo = AntennaModule.UseMutualMemo(maxSize = 500)
+    for n in range(0,2):
+        assert nm.allclose(readAnt.Mutual(testAnt, 5, x, y), exact, rtol=1e-12, atol=0)
+        assert len(memo._memo) <= 500
+    assert memo.hits > 0 and memo.misses > 0
+
+#a pair worked out in longdouble doesn't answer for float64 and the other way round
+def test_precisions_kept_apart(memo):
+    geometry = (0.08, 0.0, 0.0, 0.05, 0.00175, 0.00175, 0.05, 3.0, 3.0)
+    single = AntennaModule.PairMutual(*geometry)
+    with AntennaModule.Precision(nm.longdouble):
+        extended = AntennaModule.PairMutual(*geometry)
+    assert memo.misses == 2 and len(memo._memo) == 2
+    assert extended.dtype == nm.longdouble
+    #coplanar, float64 loses a few 1e-8 to the corners cancelling
+    assert float(extended) == pytest.approx(float(single), rel=1e-6)
@@ -0,0 +1,57 @@
+#the searches on functions with a known peak, and the trace width optimizer against
+#stepping the trace width the way Iterate does
+import numpy as nm
+import pytest
+
+import Antenna as AntennaModule
+import Main
+import Optimize
+from Antenna import Antenna
+
+def test_golden_section():
+    calls = []
+    def f(x):
+        calls.append(x)
+        return -(x - 0.37)**2
+    x, value, evaluations = Optimize.GoldenSection(f, 0, 1, 1e-4)
+    #every point only once, log(1e-4)/log(1/phi) ~ 20 steps
+    assert evaluations == len(calls) < 30
+    assert x == pytest.approx(0.37, abs=1e-4)
+    assert value == f(x)
+    #a peak on the limit
+    assert Optimize.GoldenSection(lambda x: x, 0, 1, 1e-3)[0] == 1
+    assert Optimize.GoldenSection(lambda x: -x, 0, 1, 1e-3, maxEvaluations = 5)[2] <= 7
+
+def test_nelder_mead():
+    peak = nm.array([0.3, 0.7])
+    def f(x):
+        return -nm.sum(nm.square((x - peak)*[1,3]))
+    x, value, evaluations = Optimize.NelderMead(f, [0.5,0.5], [0,0], [1,1], [0.25,0.25], 1e-4)
+    assert nm.allclose(x, peak, atol=1e-3)
+    assert evaluations < 200
+    #a peak outside the box ends up on its edge
+    x = Optimize.NelderMead(lambda x: -nm.sum(nm.square(x - [1.5,0.5])), [0.5,0.5], [0,0],
+                            [1,1], [0.25,0.25], 1e-4)[0]
+    assert nm.allclose(x, [1,0.5], atol=1e-3)
+    assert Optimize.NelderMead(f, [0.5,0.5], [0,0], [1,1], [0.25,0.25], 1e-9,
+                               maxEvaluations = 20)[2] <= 22
+
+#searching the trace width does at least as well as stepping it every 0.05mm
+@pytest.mark.parametrize("objective", ["R_t", "K"])
+def test_optimize_design_beats_steps(objective):
+    readAnt = Antenna(80,60,4,0.3,1)
+    readAnt.DesignAntenna()
+    column = {"K": 1, "R_t": 2}[objective]
+    t, g, QKRN, evaluations = Main.OptimizeDesign(readAnt, 20, 20, 3, objective = objective,
+                                                  gap = 0.15)
+    assert g == 0.15 and evaluations < 30
+    space = 20/6
+    stepped = [Main.GetQKRN(readAnt, Antenna(20,20,3,0.15,width), 40, 30, 20, 1)[column]
+               for width in nm.arange(AntennaModule.minWidth, space - 0.15, 0.05)]
+    assert QKRN[column] >= max(stepped)*(1 - 1e-3)
+    #both at once, never worse than the gap held where it was
+    t, g, both, evaluations = Main.OptimizeDesign(readAnt, 20, 20, 3, objective = objective)
+    assert g >= AntennaModule.minGap and t >= AntennaModule.minWidth
+    assert both[column] >= QKRN[column]*(1 - 1e-2)
+    #too many turns to fit
+    assert Main.OptimizeDesign(readAnt, 5, 5, 20)[0] is None
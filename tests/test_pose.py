@@ -0,0 +1,52 @@
+#the pose model: Neumann's formula against the closed form for parallel filaments, and a
+#turned or tilted tag coupling the way the field says it should
+import numpy as nm
+import pytest
+
+import Antenna as AntennaModule
+from Antenna import Antenna
+
+def _Designed(width, length, turns, gap, traceWidth, layers = 2):
+    ant = Antenna(width, length, turns, gap, traceWidth)
+    ant.DesignAntenna(layers)
+    return ant
+
+#parallel filaments 3cm and 2cm long, the quadrature against FilamentKernel's arcsinh form,
+#turned round the second one goes negative
+def test_neumann_matches_parallel_filaments():
+    exact = AntennaModule.FilamentKernel(0.4, 0.5, 0.2, 0, 0, 0, 0, 3.0, 2.0)
+    M = AntennaModule.NeumannKernel([0,0,0], [0,3.0,0], [0.4,0.5,0.2], [0.4,2.5,0.2], order = 16)
+    assert M == pytest.approx(exact, rel=1e-7)
+    assert AntennaModule.NeumannKernel([0,0,0], [0,3.0,0], [0.4,2.5,0.2], [0.4,0.5,0.2],
+                                       order = 16) == pytest.approx(-exact, rel=1e-7)
+    #at right angles through the same point there's nothing
+    assert AntennaModule.NeumannKernel([0,0,0], [0,3.0,0], [-1,1,0.2], [1,1,0.2]) == \
+        pytest.approx(0, abs=1e-15)
+
+#a 30x20 tag centred 20mm over the 80x60 reader barely notices being turned in its own plane,
+#turned half way round it's the same coil again
+def test_in_plane_rotation():
+    readAnt = _Designed(80,60,4,0.3,1)
+    testAnt = _Designed(30,20,3,0.3,0.5)
+    zAngle = nm.array([0,45,90,180,270])
+    K = readAnt.K(testAnt, 20, 25, 20, pose = (0,0,zAngle))
+    assert nm.all(K > 0)
+    assert nm.allclose(K, K[0], rtol=0.03, atol=0)
+    assert K[3] == pytest.approx(K[0], rel=1e-3)
+    #the unsigned sum is nowhere near it
+    unsigned = readAnt.K(testAnt, 20, 25, 20, pose = (0,0,zAngle), signed = False)
+    assert not nm.allclose(unsigned, unsigned[0], rtol=0.03, atol=0)
+
+#a small tag over the middle of the reader sees a field that's all z, so tilting it about
+#x or y takes K down with cos(tilt), through 0 side on and to -K upside down
+@pytest.mark.parametrize("axis", [0,1])
+def test_tilt_follows_cosine(axis):
+    readAnt = _Designed(80,60,4,0.3,1)
+    testAnt = _Designed(10,10,2,0.3,0.5)
+    tilt = nm.array([0,30,60,90,120,180])
+    pose = [0,0,0]
+    pose[axis] = tilt
+    K = readAnt.K(testAnt, 30, 35, 25, pose = pose)
+    assert nm.allclose(K/K[0], nm.cos(nm.radians(tilt)), rtol=0, atol=0.02)
+    assert abs(K[3]) < 0.01*K[0]
+    assert K[5] == pytest.approx(-K[0], rel=0.01)
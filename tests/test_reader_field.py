@@ -0,0 +1,56 @@
+#the precomputed reader field against the kernel it stands in for
+import os
+
+import numpy as nm
+import pytest
+
+import Antenna as AntennaModule
+import ReaderField
+from Antenna import Antenna
+
+def _Designed(width, length, turns, gap, traceWidth, layers = 2):
+    ant = Antenna(width, length, turns, gap, traceWidth)
+    ant.DesignAntenna(layers)
+    return ant
+
+@pytest.fixture
+def coils():
+    yield _Designed(40,30,2,0.3,1,1), _Designed(20,15,2,0.3,0.5)
+    AntennaModule.UseReaderField(None)
+
+#bilinear in the grid, so the error comes down with step^2
+def test_interpolation_matches_kernel(tmp_path, coils):
+    readAnt, testAnt = coils
+    x, y = nm.meshgrid(nm.arange(0,31,3.0), nm.arange(0,21,4.0))
+    errors = []
+    for step in (1, 0.5):
+        field = ReaderField.ReaderField(readAnt, [0,0], [30,20], [5,5.075], 20, 0.5, step = step,
+                                        path = str(tmp_path))
+        errors.append(field.Check(testAnt, 5, x, y))
+    assert errors[0] < 2e-3
+    assert errors[1] < errors[0]/3
+    #the second time it's read back off the disk
+    assert len(os.listdir(tmp_path)) == 2
+    again = ReaderField.ReaderField(readAnt, [0,0], [30,20], [5,5.075], 20, 0.5, step = 0.5,
+                                    path = str(tmp_path))
+    assert nm.array_equal(again.table, field.table)
+
+#Antenna.Mutual looks up what's on the table and works out the rest, only for tags that fit
+def test_mutual_uses_field(tmp_path, coils):
+    readAnt, testAnt = coils
+    field = AntennaModule.UseReaderField(ReaderField.ReaderField(readAnt, [0,0], [30,20],
+                                                                 [5,5.075], 20, 0.5, step = 1,
+                                                                 path = str(tmp_path)))
+    x = nm.array([0, 15, 30, 100.0])
+    M = readAnt.Mutual(testAnt, 5, x, 10)
+    lookup, covered = field.Interpolate(testAnt.traces, nm.full(4,5.0), x, nm.full(4,10.0))
+    assert covered.tolist() == [True, True, True, False]
+    assert nm.array_equal(M[covered], lookup[covered])
+    AntennaModule.UseReaderField(None)
+    exact = readAnt.Mutual(testAnt, 5, x, 10)
+    assert M[3] == exact[3]
+    assert nm.allclose(M, exact, rtol=2e-3, atol=0)
+    #other trace widths and other readers go through the kernel
+    wider = _Designed(20,15,2,0.3,0.8)
+    assert not field.Matches(readAnt.traces, wider.traces)
+    assert not field.Matches(testAnt.traces, testAnt.traces)
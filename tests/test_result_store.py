@@ -0,0 +1,64 @@
+#rows written by ResultWriter come back from ResultReader, across chunks and reopens
+import numpy as nm
+
+from ResultStore import ResultWriter, ResultReader, resultDtype
+
+def _Row(n):
+    return (1 + n%2, 10.0 + n, 20.0, 1 + n%5, 0.15, 0.5, 50.0 + n, 0.01*n, 100.0*n, 2.0)
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path/"results")
+    with ResultWriter(path, chunkRows = 4) as store:
+        for n in range(0,10):
+            store.Append(_Row(n))
+        assert store.rows == 10
+    rows = ResultReader(path).All()
+    assert rows.dtype == resultDtype
+    assert len(rows) == 10 and len(ResultReader(path)) == 10
+    assert [tuple(row) for row in rows.tolist()] == [_Row(n) for n in range(0,10)]
+    #three chunks of 4, 4 and 2
+    assert [len(chunk) for chunk in ResultReader(path).Chunks()] == [4,4,2]
+
+def test_select(tmp_path):
+    path = str(tmp_path/"results")
+    with ResultWriter(path, chunkRows = 3) as store:
+        for n in range(0,10):
+            store.Append(_Row(n))
+    reader = ResultReader(path)
+    assert nm.all(reader.Select(layers = 2)["layers"] == 2)
+    assert len(reader.Select(layers = 2)) == 5
+    assert reader.Select(K = (0.03, 0.05))["width"].tolist() == [13.0, 14.0, 15.0]
+    assert len(reader.Select(where = lambda chunk: chunk["R_t"] > 450)) == 5
+
+#reopening carries on after the chunks already there
+def test_reopen_appends(tmp_path):
+    path = str(tmp_path/"results")
+    with ResultWriter(path, chunkRows = 4) as store:
+        for n in range(0,6):
+            store.Append(_Row(n))
+    with ResultWriter(path, chunkRows = 4) as store:
+        assert store.rows == 6
+        for n in range(6,9):
+            store.Append(_Row(n))
+    assert [tuple(row) for row in ResultReader(path).All().tolist()] == [_Row(n) for n in range(0,9)]
+
+def test_truncate(tmp_path):
+    path = str(tmp_path/"results")
+    with ResultWriter(path, chunkRows = 4) as store:
+        for n in range(0,10):
+            store.Append(_Row(n))
+    store = ResultWriter(path, chunkRows = 4)
+    #inside the second chunk, the third chunk goes and the second is cut short
+    store.Truncate(6)
+    assert store.rows == 6
+    assert [len(chunk) for chunk in ResultReader(path).Chunks()] == [4,2]
+    store.Append(_Row(100))
+    store.Close()
+    rows = [tuple(row) for row in ResultReader(path).All().tolist()]
+    assert rows == [_Row(n) for n in range(0,6)] + [_Row(100)]
+    #past the end keeps everything
+    store = ResultWriter(path)
+    store.Truncate(100)
+    assert store.rows == 7 and len(ResultReader(path)) == 7
+    store.Truncate(0)
+    assert store.rows == 0 and len(ResultReader(path)) == 0
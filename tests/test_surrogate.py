@@ -0,0 +1,62 @@
+#the filament surrogate against the full PEEC design, and the shortlist Iterate works
+#out in full from it
+import os
+
+import numpy as nm
+import pytest
+
+import Main
+import Surrogate
+from Antenna import Antenna
+from ResultStore import ResultReader
+
+def _Designed(width, length, turns, gap, traceWidth, layers = 2):
+    ant = Antenna(width, length, turns, gap, traceWidth)
+    ant.DesignAntenna(layers)
+    return ant
+
+#same traces, same resistance, L within a few % (filaments instead of bars) and M a lot
+#closer than that since the coils are further apart than the traces are wide
+def test_surrogate_matches_design():
+    readAnt = _Designed(80,60,4,0.3,1)
+    start, stop = Surrogate.SpiralTraces(30,20,0.15,0.5,nm.arange(3))
+    single = _Designed(30,20,3,0.15,0.5,1)
+    assert nm.array_equal(start.reshape(-1,3), single.traces.start)
+    assert nm.array_equal(stop.reshape(-1,3), single.traces.stop)
+
+    L = Surrogate.SpiralInductance(30,20,0.15,0.5,5,2)
+    R = Surrogate.SpiralResistance(30,20,0.15,0.5,5)
+    M = Surrogate.SpiralMutual(readAnt,30,20,0.15,0.5,5,2,20,40,30)
+    assert L.shape == M.shape == (2,5) and R.shape == (5,)
+    for layers in (1,2):
+        for turns in (1,3,5):
+            ant = _Designed(30,20,turns,0.15,0.5,layers)
+            assert L[layers-1,turns-1] == pytest.approx(ant.L, rel=0.05)
+            assert R[turns-1]*Surrogate.LayerFactor(layers) == pytest.approx(ant.R, rel=1e-12)
+            assert M[layers-1,turns-1] == pytest.approx(readAnt.Mutual(ant,20,40,30), rel=1e-4)
+
+def test_shortlist():
+    K = nm.array([[[0.1, 0.5, nm.nan], [0.3, 0.49, 0.2]]])
+    R_t = nm.array([[[1.0, 2.0, nm.nan], [9.0, 8.5, 3.0]]])
+    screened = dict(K = K, R_t = R_t)
+    keep = Main.Shortlist(screened, top = 1)
+    assert keep.tolist() == [[[False, True, False], [True, False, False]]]
+    #within 5% of the best of either
+    keep = Main.Shortlist(screened, top = 1, margin = 0.05)
+    assert keep.tolist() == [[[False, True, False], [True, True, False]]]
+    #a design that doesn't fit never makes it
+    assert not Main.Shortlist(screened, top = 6)[0,0,2]
+
+#a screened sweep only works out the shortlist and still finds the best design of each cell
+def test_screened_sweep(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("Output/scr")
+    sweep = dict(width = [20,31,10], length = [20,31,10], turns = [1,5],
+                 traceWidth = [0.3,1.2,0.3], cache = None, plot = False, checkpoint = None)
+    Main.Iterate(resultPath = "Output/full", **sweep)
+    Main.Iterate(resultPath = "Output/screened", screen = 2, **sweep)
+    full = ResultReader("Output/full").All()
+    screened = ResultReader("Output/screened").All()
+    assert 0 < len(screened) < len(full)
+    for name in ("K", "R_t"):
+        assert nm.max(screened[name]) == nm.max(full[name])
@@ -0,0 +1,87 @@
+#the pair dedupe and the offset map symmetry, each against working everything out
+import os
+
+import numpy as nm
+import pytest
+
+import Antenna as AntennaModule
+import Main
+from Antenna import Antenna
+
+def _Designed(width, length, turns, gap, traceWidth, layers = 2):
+    ant = Antenna(width, length, turns, gap, traceWidth)
+    ant.DesignAntenna(layers)
+    ant.Q = 30
+    return ant
+
+#a single closed turn, unlike a spiral it doesn't step in at the end
+def _Ring(width, length, layers = 1):
+    ant = Antenna(width, length, 1, 0.3, 0.5)
+    corners = nm.array([[0,0],[width,0],[width,length],[0,length],[0,0]], dtype=float)
+    for n in range(0,layers):
+        z = nm.full((4,1), 0.075*n)
+        ant.traces.Append(nm.hstack([corners[:-1], z]), nm.hstack([corners[1:], z]),
+                          0.5, AntennaModule.conductor_thickness)
+    ant.partialL = AntennaModule.PartialInductanceMatrix(ant.traces)
+    ant.L = nm.sum(ant.partialL)
+    ant.Q = 30
+    return ant
+
+@pytest.fixture
+def work(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("Output")
+    return tmp_path
+
+#the different pairs UniquePairs gives back, spread out again, are the pairs it was given
+def test_unique_pairs_round_trip():
+    table = _Designed(20,15,3,0.3,0.5).traces
+    i, j = nm.nonzero(nm.triu(table.direction @ table.direction.T != 0, 1))
+    E, l_3, P = AntennaModule.RelativePosition(table.start[i], table.stop[i],
+                                               table.start[j], table.stop[j])
+    sizes = (table.width[i], table.height[i], table.height[j], table.width[j],
+             table.length[i], table.length[j])
+    geometry, inverse = AntennaModule.UniquePairs(E, l_3, P, *sizes)
+    assert len(geometry) < len(i)
+    assert nm.allclose(AntennaModule.GroverKernel(*geometry.T)[inverse],
+                       AntennaModule.GroverKernel(E, l_3, P, *sizes), rtol=1e-6, atol=0)
+
+#rows that hash alike but aren't the same still come apart
+def test_unique_rows_hash_clash(monkeypatch):
+    keys = nm.random.default_rng(0).integers(0, 4, (200,9))
+    monkeypatch.setattr(AntennaModule, "_rowHash", nm.zeros(9, dtype=nm.int64))
+    first, inverse = AntennaModule._UniqueRows(keys)
+    unique = nm.unique(keys, axis=0)
+    assert len(first) == len(unique)
+    assert nm.array_equal(keys[first][inverse], keys)
+
+def test_coupling_symmetry():
+    readAnt = _Designed(80,60,4,0.3,1)
+    testAnt = _Designed(30,20,3,0.3,0.5)
+    #a spiral steps in every turn, the reader and a tag aren't symmetric at all
+    assert AntennaModule.CouplingSymmetry(readAnt.traces, testAnt.traces) == ([None,None], None)
+    #two alike tags are, turned half way round about 0
+    mirror, point = AntennaModule.CouplingSymmetry(testAnt.traces, testAnt.traces)
+    assert mirror == [None,None]
+    assert point == pytest.approx([0,0], abs=1e-9)
+    #closed square turns are mirror symmetric both ways
+    mirror, point = AntennaModule.CouplingSymmetry(_Ring(40,40).traces, _Ring(20,20,2).traces)
+    assert mirror == pytest.approx([10,0], abs=1e-9)
+    assert point == pytest.approx([10,0], abs=1e-9)
+
+#the mirrored map is the full map, with a quarter (or half) of the points worked out
+@pytest.mark.parametrize("coils, minXY, maxXY, share", [
+    ((_Ring(40,40), _Ring(20,20,2)), [-20,-30], [41,31], 0.3),
+    ((_Designed(30,20,3,0.3,0.5),)*2, [-30,-30], [31,31], 0.55)])
+def test_offset_map_symmetry(work, monkeypatch, coils, minXY, maxXY, share):
+    readAnt, testAnt = coils
+    full = Main.offsetMap(readAnt, testAnt, minXY, maxXY, 5, symmetry = False)
+    K = readAnt.K
+    points = []
+    def Counted(other, zOffset, xOffset, yOffset, **kwargs):
+        points.append(nm.size(xOffset))
+        return K(other, zOffset, xOffset, yOffset, **kwargs)
+    monkeypatch.setattr(readAnt, "K", Counted)
+    mirrored = Main.offsetMap(readAnt, testAnt, minXY, maxXY, 5)
+    assert nm.allclose(mirrored, full, rtol=1e-9, atol=0)
+    assert points[0] < share*full.size
@@ -0,0 +1,37 @@
+#the array backed trace table against a Trace made for every trace on its own
+import numpy as nm
+import pytest
+
+import Antenna as AntennaModule
+from Antenna import Antenna, Trace, TraceTable
+
+def test_append_matches_traces():
+    start = nm.array([[0,0,0],[10,0,0],[10,5,0],[0,5,0]], dtype=float)
+    stop = nm.roll(start, -1, axis=0)
+    table = TraceTable(capacity = 1)
+    for n in range(0,3):
+        table.Append(start, stop + [[n,0,0]], 0.5 + n*0.1, AntennaModule.conductor_thickness)
+    assert len(table) == 12
+    for n, view in enumerate(table):
+        trace = Trace(start[n%4], stop[n%4] + [n//4,0,0], 0.5 + (n//4)*0.1,
+                      AntennaModule.conductor_thickness)
+        assert nm.array_equal(view.start, trace.start)
+        assert nm.array_equal(view.stop, trace.stop)
+        for field in ("width", "height", "length", "L", "R"):
+            assert getattr(view, field) == pytest.approx(getattr(trace, field), rel=1e-12)
+    assert nm.array_equal(table[-1].stop, table.stop[11])
+    with pytest.raises(IndexError):
+        table[12]
+
+#a designed coil's table comes back the same from its arrays
+def test_arrays_round_trip():
+    ant = Antenna(30,20,3,0.3,0.5)
+    ant.DesignAntenna(2)
+    arrays = ant.traces.Arrays()
+    table = TraceTable.FromArrays(arrays)
+    assert len(table) == len(ant.traces)
+    for field, values in table.Arrays().items():
+        assert nm.array_equal(values, arrays[field])
+    #copies, not views
+    arrays["width"][:] = 0
+    assert nm.all(ant.traces.width > 0)